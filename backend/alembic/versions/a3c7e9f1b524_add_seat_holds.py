@@ -0,0 +1,35 @@
+"""add seat_holds
+
+Revision ID: a3c7e9f1b524
+Revises: f8a1d6c4b237
+Create Date: 2026-10-18 23:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a3c7e9f1b524'
+down_revision = 'f8a1d6c4b237'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seat_holds',
+        sa.Column('flight_id', sa.Integer(), sa.ForeignKey('flights.flight_id', ondelete='CASCADE'), nullable=False, comment='航班ID'),
+        sa.Column('flight_date', sa.Date(), nullable=False, comment='航班日期'),
+        sa.Column('seat_number', sa.String(10), nullable=False, comment='座位号'),
+        sa.Column('order_item_id', sa.BigInteger(), nullable=False, comment='持有保留的订单项ID'),
+        sa.Column('expires_at', sa.DateTime(), nullable=False, comment='过期时间'),
+        sa.PrimaryKeyConstraint('flight_id', 'flight_date', 'seat_number'),
+    )
+    op.create_index('idx_seat_holds_holder', 'seat_holds', ['flight_id', 'flight_date', 'order_item_id'])
+    op.create_index('idx_seat_holds_expires', 'seat_holds', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_seat_holds_expires', table_name='seat_holds')
+    op.drop_index('idx_seat_holds_holder', table_name='seat_holds')
+    op.drop_table('seat_holds')
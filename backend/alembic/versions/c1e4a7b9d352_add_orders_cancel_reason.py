@@ -0,0 +1,29 @@
+"""add orders.cancel_reason
+
+Revision ID: c1e4a7b9d352
+Revises: a3c7e9f1b524
+Create Date: 2026-10-19 10:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c1e4a7b9d352'
+down_revision = 'a3c7e9f1b524'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'orders',
+        sa.Column(
+            'cancel_reason', sa.Enum('expired', 'user', name='cancel_reason'), nullable=True,
+            comment='取消原因：expired 超时未支付由回收线程取消，user 用户取消',
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'cancel_reason')
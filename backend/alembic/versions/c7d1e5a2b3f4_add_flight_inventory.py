@@ -0,0 +1,44 @@
+"""add flight_inventory and order_items.flight_date
+
+Revision ID: c7d1e5a2b3f4
+Revises: 9e5f2c1abcde
+Create Date: 2026-10-18 10:12:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c7d1e5a2b3f4'
+down_revision = '9e5f2c1abcde'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'order_items',
+        sa.Column('flight_date', sa.Date(), nullable=True, comment='乘机日期')
+    )
+    op.create_index('idx_flight_date', 'order_items', ['flight_id', 'flight_date'])
+
+    op.create_table(
+        'flight_inventory',
+        sa.Column('flight_id', sa.Integer(), sa.ForeignKey('flights.flight_id', ondelete='CASCADE'), nullable=False, comment='航班ID'),
+        sa.Column('flight_date', sa.Date(), nullable=False, comment='航班日期'),
+        sa.Column('cabin_class', sa.Enum('economy', 'business', 'first', name='cabin_class'), nullable=False, comment='舱位'),
+        sa.Column('capacity', sa.Integer(), nullable=False, server_default='0', comment='舱位总座位数'),
+        sa.Column('held', sa.Integer(), nullable=False, server_default='0', comment='待支付订单占用的座位数'),
+        sa.Column('sold', sa.Integer(), nullable=False, server_default='0', comment='已支付订单占用的座位数'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('flight_id', 'flight_date', 'cabin_class'),
+    )
+    op.create_index('idx_inventory_date', 'flight_inventory', ['flight_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_inventory_date', table_name='flight_inventory')
+    op.drop_table('flight_inventory')
+    op.drop_index('idx_flight_date', table_name='order_items')
+    op.drop_column('order_items', 'flight_date')
@@ -0,0 +1,22 @@
+"""add orders (user_id, status, created_at) index
+
+Revision ID: d2a8f4c6e913
+Revises: c7d1e5a2b3f4
+Create Date: 2026-10-18 16:40:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8f4c6e913'
+down_revision = 'c7d1e5a2b3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_user_status_created', 'orders', ['user_id', 'status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_user_status_created', table_name='orders')
@@ -0,0 +1,35 @@
+"""add idempotency_keys
+
+Revision ID: e5b3c9d7f021
+Revises: d2a8f4c6e913
+Create Date: 2026-10-18 19:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5b3c9d7f021'
+down_revision = 'd2a8f4c6e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('user_id', sa.BigInteger(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, comment='用户ID'),
+        sa.Column('idempotency_key', sa.String(64), nullable=False, comment='客户端提供的幂等键'),
+        sa.Column('request_hash', sa.String(64), nullable=False, comment='请求指纹（接口 + 参数的 SHA-256）'),
+        sa.Column('status_code', sa.Integer(), nullable=True, comment='响应状态码，为空表示首个请求仍在处理'),
+        sa.Column('response_body', sa.Text(), nullable=True, comment='响应体 JSON'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, comment='首次请求时间'),
+        sa.Column('expires_at', sa.DateTime(), nullable=False, comment='过期时间，过期后由后台清理'),
+        sa.PrimaryKeyConstraint('user_id', 'idempotency_key'),
+    )
+    op.create_index('idx_idempotency_expires', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_idempotency_expires', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,33 @@
+"""add flight_seat_maps
+
+Revision ID: f8a1d6c4b237
+Revises: e5b3c9d7f021
+Create Date: 2026-10-18 21:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f8a1d6c4b237'
+down_revision = 'e5b3c9d7f021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'flight_seat_maps',
+        sa.Column('flight_id', sa.Integer(), sa.ForeignKey('flights.flight_id', ondelete='CASCADE'), nullable=False, comment='航班ID'),
+        sa.Column('flight_date', sa.Date(), nullable=False, comment='航班日期'),
+        sa.Column('layout_code', sa.String(20), nullable=False, comment='座位布局编号'),
+        sa.Column('occupied', sa.LargeBinary(), nullable=False, comment='占用位图，第 i 位对应布局中第 i 个座位'),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0', comment='每次占用/释放递增'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('flight_id', 'flight_date'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('flight_seat_maps')
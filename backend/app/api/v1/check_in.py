@@ -1,13 +1,18 @@
-from typing import List, Optional, Any
-from datetime import datetime, time
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, List, Optional, Any
+from datetime import date, datetime, time, timedelta
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app import dependencies as deps
 from app import crud, schemas, models
+from app.services import seat_hold
+from app.services.seat_map import InvalidSeatError, SeatMapFullError, SeatUnavailableError
 
 router = APIRouter()
 
+# 登机开始时间：起飞前的分钟数
+BOARDING_LEAD_MINUTES = 40
+
 
 @router.post("/", response_model=schemas.CheckIn)
 def create_check_in(
@@ -17,7 +22,8 @@ def create_check_in(
     current_user: models.User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    创建值机记录
+    单个订单项办理值机：指定座位时经座位图原子占用（可替换已选座位），
+    未指定时沿用已选座位或自动分配；座位、值机状态与值机记录同一事务提交
     """
     # 验证订单项是否存在且属于当前用户
     order_item = crud.order_item.get(db, id=check_in_in.order_item_id)
@@ -27,32 +33,44 @@ def create_check_in(
     order = crud.order.get(db, id=order_item.order_id)
     if not order or order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="无权为此订单项办理值机")
+    if order_item.ticket_status == models.order.TicketStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="机票已取消，无法值机")
+    if order_item.flight_date is None:
+        raise HTTPException(status_code=400, detail="订单项缺少乘机日期，无法值机")
     
     # 检查是否已经值机
     existing_check_in = crud.check_in.get_by_order_item(db, order_item_id=check_in_in.order_item_id)
     if existing_check_in:
         raise HTTPException(status_code=400, detail="该订单项已办理值机")
-    
-    # 检查座位是否可用
+
     if check_in_in.seat_number:
-        seat_available = crud.check_in.check_seat_availability(
-            db,
-            flight_id=order_item.flight_id,
-            flight_date=order_item.flight_date,
-            seat_number=check_in_in.seat_number
-        )
-        if not seat_available:
-            raise HTTPException(status_code=400, detail="座位已被占用")
-    
-    check_in = crud.check_in.create(db, obj_in=check_in_in)
-    
-    # 更新订单项的值机状态
-    crud.order_item.update_check_in_status(
-        db,
-        item_id=check_in_in.order_item_id,
-        check_in_status=schemas.CheckInStatus.CHECKED_IN
+        seat_number = _claim_item_seat(db, order_item, check_in_in.seat_number)
+    elif order_item.seat_number:
+        seat_number = order_item.seat_number
+    else:
+        try:
+            seat_number = _assign_order_seats(db, [order_item], {})[order_item.item_id]
+        except SeatMapFullError as e:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=str(e))
+
+    flight = order_item.flight
+    departure = datetime.combine(order_item.flight_date, flight.scheduled_departure_time)
+    hold_keys = _hold_keys([order_item])
+    order_item.seat_number = seat_number
+    order_item.check_in_status = models.order.CheckInStatus.CHECKED
+    check_in = models.check_in.CheckIn(
+        order_item_id=order_item.item_id,
+        passenger_id=order_item.passenger_id,
+        flight_id=order_item.flight_id,
+        seat_number=seat_number,
+        boarding_time=departure - timedelta(minutes=BOARDING_LEAD_MINUTES),
+        check_in_time=check_in_in.check_in_time or datetime.utcnow(),
     )
-    
+    db.add(check_in)
+    db.commit()
+    db.refresh(check_in)
+    _release_holds(hold_keys)
     return check_in
 
 
@@ -102,18 +120,18 @@ def update_check_in(
         if not order or order.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="无权修改此值机记录")
     
-    # 如果更新座位号，检查座位是否可用
-    if check_in_in.seat_number and check_in_in.seat_number != check_in.seat_number:
-        seat_available = crud.check_in.check_seat_availability(
-            db,
-            flight_id=order_item.flight_id,
-            flight_date=order_item.flight_date,
-            seat_number=check_in_in.seat_number
-        )
-        if not seat_available:
-            raise HTTPException(status_code=400, detail="座位已被占用")
-    
-    check_in = crud.check_in.update(db, db_obj=check_in, obj_in=check_in_in)
+    # 更换座位：经座位图原子占用新座位并释放原座位，值机记录与订单项的座位号同一事务更新
+    hold_keys = []
+    if check_in_in.seat_number and order_item and check_in_in.seat_number.upper().strip() != check_in.seat_number:
+        seat_number = _claim_item_seat(db, order_item, check_in_in.seat_number)
+        hold_keys = _hold_keys([order_item])
+        order_item.seat_number = seat_number
+        check_in.seat_number = seat_number
+    if check_in_in.check_in_time:
+        check_in.check_in_time = check_in_in.check_in_time
+    db.commit()
+    db.refresh(check_in)
+    _release_holds(hold_keys)
     return check_in
 
 
@@ -138,14 +156,8 @@ def cancel_check_in(
         if not order or order.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="无权取消此值机记录")
     
-    # 更新订单项的值机状态
-    crud.order_item.update_check_in_status(
-        db,
-        item_id=check_in.order_item_id,
-        check_in_status=schemas.CheckInStatus.NOT_CHECKED_IN
-    )
-    
-    crud.check_in.remove(db, id=check_in_id)
+    # 释放座位、恢复订单项的值机状态并删除记录，同一事务提交
+    crud.check_in.cancel(db, check_in=check_in)
     return {"message": "值机取消成功"}
 
 
@@ -157,27 +169,13 @@ def get_passenger_check_ins(
     current_user: models.User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    获取乘客的值机记录列表
+    获取乘客的值机记录列表（仅当前用户订单下的记录）
     """
-    # 验证乘客是否属于当前用户的订单
-    passenger = crud.passenger.get(db, id=passenger_id)
-    if not passenger:
+    # 一次联表查询，归属在 SQL 中按订单用户过滤；无记录时再区分乘客是否存在
+    check_ins = crud.check_in.get_passenger_history(db, passenger_id=passenger_id, user_id=current_user.id)
+    if not check_ins and not crud.passenger.get(db, id=passenger_id):
         raise HTTPException(status_code=404, detail="乘客不存在")
-    
-    check_ins = crud.check_in.get_by_passenger(db, passenger_id=passenger_id)
-    
-    # 过滤属于当前用户的值机记录
-    user_check_ins = []
-    for check_in in check_ins:
-        check_in_details = crud.check_in.get_with_details(db, check_in_id=check_in.check_in_id)
-        if check_in_details:
-            order_item = crud.order_item.get(db, id=check_in_details.order_item_id)
-            if order_item:
-                order = crud.order.get(db, id=order_item.order_id)
-                if order and order.user_id == current_user.id:
-                    user_check_ins.append(check_in_details)
-    
-    return user_check_ins
+    return check_ins
 
 
 @router.get("/flight/{flight_id}/seats", response_model=List[str])
@@ -185,10 +183,11 @@ def get_occupied_seats(
     *,
     db: Session = Depends(deps.get_db),
     flight_id: int,
-    flight_date: str = Query(..., description="航班日期 (YYYY-MM-DD)")
+    flight_date: str = Query(..., description="航班日期 (YYYY-MM-DD)"),
+    include_held: bool = Query(True, description="是否包含其他乘客保留中的座位")
 ) -> Any:
     """
-    获取航班已占用的座位列表
+    获取航班已占用（及保留中）的座位列表
     """
     try:
         flight_date_obj = datetime.strptime(flight_date, "%Y-%m-%d").date()
@@ -199,8 +198,326 @@ def get_occupied_seats(
     if not flight:
         raise HTTPException(status_code=404, detail="航班不存在")
     
-    occupied_seats = crud.check_in.get_occupied_seats(db, flight_id=flight_id, flight_date=flight_date_obj)
-    return occupied_seats
+    _, layout, bitmap = crud.seat_map.get_bitmap(db, flight_id=flight_id, flight_date=flight_date_obj)
+    seats = [layout.seat(i) for i in bitmap.iter_set()]
+    if include_held:
+        occupied = set(seats)
+        seats.extend(sorted(
+            (s for s in seat_hold.held_seats(flight_id, flight_date_obj) if s not in occupied), key=layout.index
+        ))
+    return seats
+
+
+@router.get("/flight/{flight_id}/seat-map", response_model=schemas.SeatMap)
+def get_seat_map(
+    *,
+    db: Session = Depends(deps.get_db),
+    flight_id: int,
+    flight_date: date = Query(..., description="航班日期 (YYYY-MM-DD)")
+) -> Any:
+    """
+    获取航班日的完整座位图（布局 + 占用位图），客户端据此渲染并判断座位是否可选
+    """
+    flight = crud.flight.get(db, id=flight_id)
+    if not flight:
+        raise HTTPException(status_code=404, detail="航班不存在")
+    
+    row, layout, bitmap = crud.seat_map.get_bitmap(db, flight_id=flight_id, flight_date=flight_date)
+    cabins = []
+    for cabin in layout.cabins:
+        seats = layout.cabin_range(cabin.cabin_class)
+        cabins.append(schemas.SeatMapCabin(
+            cabin_class=cabin.cabin_class,
+            first_row=cabin.first_row,
+            last_row=cabin.last_row,
+            columns=cabin.columns,
+            total=len(seats),
+            available=len(seats) - bitmap.count(seats),
+        ))
+    return schemas.SeatMap(
+        flight_id=flight_id,
+        flight_date=flight_date,
+        layout=layout.code,
+        version=row.version,
+        cabins=cabins,
+        occupied=bitmap.to_base64(),
+        held=sorted(
+            (s for s in seat_hold.held_seats(flight_id, flight_date) if not bitmap.is_set(layout.index(s))),
+            key=layout.index,
+        ),
+    )
+
+
+def _assign_order_seats(db: Session, items, preferences) -> Dict[int, str]:
+    """
+    为尚未选座的订单项分配座位（同一航班日、同一舱位为一组），返回 item_id -> 座位号，不提交事务。
+    乘客自己保留中的座位直接转为占用（期间已被他人占用则改为自动分配），其他人保留的座位不参与分配；
+    余座不足时抛出 SeatMapFullError
+    """
+    groups = {}
+    for item in items:
+        if item.seat_number or item.flight_date is None:
+            continue
+        groups.setdefault((item.flight_id, item.flight_date, str(item.cabin_class)), []).append(item)
+
+    seats = {}
+    # 按键序锁定座位图，多航班订单之间不会死锁
+    for (flight_id, flight_date, cabin_class), group in sorted(groups.items()):
+        held = seat_hold.held_seats(flight_id, flight_date)
+        own = {holder: s for s, holder in held.items()}
+        chosen = {}
+        for item in group:
+            if item.item_id in own:
+                try:
+                    chosen[item.item_id] = crud.seat_map.claim(
+                        db, flight_id=flight_id, flight_date=flight_date,
+                        seat_number=own[item.item_id], cabin_class=cabin_class,
+                    )
+                except (InvalidSeatError, SeatUnavailableError):
+                    pass
+        rest = [item for item in group if item.item_id not in chosen]
+        numbers = crud.seat_map.assign(
+            db,
+            flight_id=flight_id,
+            flight_date=flight_date,
+            cabin_class=cabin_class,
+            preferences=[preferences.get(item.item_id) for item in rest],
+            exclude=[s for s, holder in held.items() if holder not in chosen],
+        )
+        chosen.update(zip((item.item_id for item in rest), numbers))
+        seats.update(chosen)
+    return seats
+
+
+def _claim_item_seat(db: Session, order_item, seat_number: str) -> str:
+    """
+    为订单项原子占用座位并释放其原座位（与 PUT /orders/items/{item_id}/check-in 相同的规则），不提交事务。
+    其他乘客保留中的座位不可选；失败时回滚并抛出 HTTPException，返回规范化的座位号
+    """
+    sn = seat_number.upper().strip()
+    if sn == order_item.seat_number:
+        return sn
+    try:
+        seat_hold.check_not_held(order_item.flight_id, order_item.flight_date, sn, order_item.item_id)
+        return crud.seat_map.claim(
+            db,
+            flight_id=order_item.flight_id,
+            flight_date=order_item.flight_date,
+            seat_number=sn,
+            cabin_class=str(order_item.cabin_class),
+            release_seat=order_item.seat_number,
+        )
+    except InvalidSeatError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except SeatUnavailableError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="座位已被占用")
+    except seat_hold.SeatHeldError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _hold_keys(items) -> list:
+    """(flight_id, flight_date, item_id)，须在提交前取出（提交后访问订单项会逐个刷新）"""
+    return [(item.flight_id, item.flight_date, item.item_id) for item in items if item.flight_date is not None]
+
+
+def _release_holds(keys) -> None:
+    """座位已正式占用后释放各订单项的保留"""
+    for flight_id, flight_date, item_id in keys:
+        seat_hold.release_seat(flight_id, flight_date, item_id)
+
+
+@router.post("/orders/{order_id}/seats/auto", response_model=List[schemas.SeatAssignment])
+def auto_assign_seats(
+    *,
+    db: Session = Depends(deps.get_db),
+    order_id: int,
+    assignment_in: schemas.AutoSeatAssignmentRequest = Body(default_factory=schemas.AutoSeatAssignmentRequest),
+    current_user: models.User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    为订单中尚未选座的乘客自动选座：同一航班日、同一舱位的乘客尽量相邻，兼顾靠窗/靠过道偏好，
+    每个航班日的座位一次性原子占用，任一舱位余座不足时整单不分配
+    """
+    order = crud.order.get(db, id=order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="订单不存在")
+    if order.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="无权为此订单选座")
+    if order.status == models.order.OrderStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="订单已取消，无法选座")
+
+    items = [item for item in order.items if item.ticket_status != models.order.TicketStatus.CANCELLED]
+    try:
+        seats = _assign_order_seats(db, items, assignment_in.preferences)
+    except SeatMapFullError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    crud.order_item.set_seat_numbers(db, seats=seats)
+    assigned = [item for item in items if item.item_id in seats]
+    assignments = [
+        schemas.SeatAssignment(
+            item_id=item.item_id, passenger_id=item.passenger_id, flight_id=item.flight_id,
+            seat_number=seats[item.item_id],
+        )
+        for item in assigned
+    ]
+    hold_keys = _hold_keys(assigned)
+    db.commit()
+    _release_holds(hold_keys)
+    return assignments
+
+
+@router.post("/orders/{order_id}", response_model=List[schemas.BoardingPass])
+def check_in_order(
+    *,
+    db: Session = Depends(deps.get_db),
+    order_id: int,
+    assignment_in: schemas.AutoSeatAssignmentRequest = Body(default_factory=schemas.AutoSeatAssignmentRequest),
+    current_user: models.User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    整单值机：为订单中所有可值机的乘客（机票有效、尚未值机）一次办理，返回全部登机牌。
+    订单连同乘客、航班一次加载并只校验一次归属；未选座的乘客按自动选座规则分配座位，
+    值机状态、座位号与值机记录各一条语句写入，同一事务提交，语句数与乘客人数无关
+    """
+    order = crud.order.get_with_items(db, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="订单不存在")
+    if order.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="无权为此订单办理值机")
+    if order.status == models.order.OrderStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="订单已取消，无法值机")
+    if order.payment_status != models.order.PaymentStatus.PAID:
+        raise HTTPException(status_code=400, detail="订单未支付，无法值机")
+
+    items = [
+        item for item in order.items
+        if item.ticket_status != models.order.TicketStatus.CANCELLED
+        and item.check_in_status != models.order.CheckInStatus.CHECKED
+        and item.flight_date is not None
+    ]
+    if not items:
+        raise HTTPException(status_code=400, detail="订单中没有可办理值机的乘客")
+
+    # 与单项选座相同的加锁顺序：先座位图后订单项。并发的重复整单值机在座位图锁上排队，
+    # 随后条件更新的条数不符而整体回滚，不会重复分配座位
+    try:
+        seats = _assign_order_seats(db, items, assignment_in.preferences)
+    except SeatMapFullError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    if crud.order_item.mark_checked_in(db, item_ids=[item.item_id for item in items]) != len(items):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="部分乘客已办理值机，请刷新后重试")
+    crud.order_item.set_seat_numbers(db, seats=seats)
+
+    now = datetime.utcnow()
+    rows = []
+    boarding_passes = []
+    for item in items:
+        flight = item.flight
+        route = flight.route
+        seat_number = seats.get(item.item_id) or item.seat_number
+        departure = datetime.combine(item.flight_date, flight.scheduled_departure_time)
+        arrival = datetime.combine(item.flight_date, flight.scheduled_arrival_time)
+        if arrival < departure:
+            arrival += timedelta(days=1)
+        boarding_time = departure - timedelta(minutes=BOARDING_LEAD_MINUTES)
+        rows.append({
+            "order_item_id": item.item_id,
+            "passenger_id": item.passenger_id,
+            "flight_id": item.flight_id,
+            "seat_number": seat_number,
+            "boarding_time": boarding_time,
+            "check_in_time": now,
+        })
+        boarding_passes.append(schemas.BoardingPass(
+            order_item_id=item.item_id,
+            passenger_name=item.passenger.name,
+            flight_number=flight.flight_number,
+            departure_time=departure,
+            arrival_time=arrival,
+            origin=route.departure_airport.airport_name if route and route.departure_airport else "",
+            destination=route.arrival_airport.airport_name if route and route.arrival_airport else "",
+            seat_number=seat_number,
+            boarding_time=boarding_time,
+        ))
+    crud.check_in.create_many(db, rows=rows)
+    hold_keys = _hold_keys(items)
+    db.commit()
+    _release_holds(hold_keys)
+    return boarding_passes
+
+
+@router.post("/seat-holds", response_model=schemas.SeatHold)
+def hold_seat(
+    *,
+    db: Session = Depends(deps.get_db),
+    hold_in: schemas.SeatHoldCreate,
+    current_user: models.User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    保留座位：在 SEAT_HOLD_TTL_SECONDS 内为订单项占住座位，期间其他乘客无法选择，
+    通过 PUT /orders/items/{item_id}/check-in 确认后转为正式占用；同一订单项再次保留会替换原保留
+    """
+    order_item = crud.order_item.get(db, id=hold_in.order_item_id)
+    if not order_item:
+        raise HTTPException(status_code=404, detail="订单项不存在")
+    order = crud.order.get(db, id=order_item.order_id)
+    if not order or order.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="无权为此订单项选择座位")
+    if order_item.flight_date is None:
+        raise HTTPException(status_code=400, detail="订单项缺少乘机日期，无法选座")
+
+    _, layout, bitmap = crud.seat_map.get_bitmap(db, flight_id=order_item.flight_id, flight_date=order_item.flight_date)
+    # 座位图可能刚在本事务中初始化，先提交：保留存储（database 实现）使用独立的短事务写入
+    db.commit()
+    try:
+        index = layout.index(hold_in.seat_number)
+    except InvalidSeatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if layout.cabin_of(index) != str(order_item.cabin_class):
+        raise HTTPException(status_code=400, detail="座位与舱位不匹配")
+    seat_number = layout.seat(index)
+    if seat_number == order_item.seat_number:
+        raise HTTPException(status_code=400, detail="已是当前座位")
+    if bitmap.is_set(index):
+        raise HTTPException(status_code=409, detail="座位已被占用")
+    try:
+        expires_at = seat_hold.hold_seat(order_item.flight_id, order_item.flight_date, seat_number, order_item.item_id)
+    except seat_hold.SeatHeldError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return schemas.SeatHold(
+        flight_id=order_item.flight_id,
+        flight_date=order_item.flight_date,
+        seat_number=seat_number,
+        order_item_id=order_item.item_id,
+        expires_at=expires_at,
+    )
+
+
+@router.delete("/seat-holds/{order_item_id}")
+def release_seat_hold(
+    *,
+    db: Session = Depends(deps.get_db),
+    order_item_id: int,
+    current_user: models.User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    释放订单项保留的座位
+    """
+    order_item = crud.order_item.get(db, id=order_item_id)
+    if not order_item:
+        raise HTTPException(status_code=404, detail="订单项不存在")
+    order = crud.order.get(db, id=order_item.order_id)
+    if not order or order.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="无权为此订单项选择座位")
+    if order_item.flight_date is not None:
+        seat_hold.release_seat(order_item.flight_id, order_item.flight_date, order_item_id)
+    return {"message": "座位保留已释放"}
 
 
 @router.post("/seat-selection", response_model=schemas.SeatSelection)
@@ -211,7 +528,7 @@ def select_seat(
     current_user: models.User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    选择座位
+    选择座位：经座位图原子占用并释放原座位；已值机时同步更新值机记录的座位号
     """
     # 验证订单项是否存在且属于当前用户
     order_item = crud.order_item.get(db, id=seat_selection.order_item_id)
@@ -221,32 +538,20 @@ def select_seat(
     order = crud.order.get(db, id=order_item.order_id)
     if not order or order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="无权为此订单项选择座位")
-    
-    # 检查座位是否可用
-    seat_available = crud.check_in.check_seat_availability(
-        db,
-        flight_id=order_item.flight_id,
-        flight_date=order_item.flight_date,
-        seat_number=seat_selection.seat_number
-    )
-    if not seat_available:
-        raise HTTPException(status_code=400, detail="座位已被占用")
-    
-    # 检查是否已有值机记录
+    if order_item.ticket_status == models.order.TicketStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="机票已取消，无法选座")
+    if order_item.flight_date is None:
+        raise HTTPException(status_code=400, detail="订单项缺少乘机日期，无法选座")
+
+    seat_number = _claim_item_seat(db, order_item, seat_selection.seat_number)
+    hold_keys = _hold_keys([order_item])
+    order_item.seat_number = seat_number
     existing_check_in = crud.check_in.get_by_order_item(db, order_item_id=seat_selection.order_item_id)
     if existing_check_in:
-        # 更新座位号
-        check_in_update = schemas.CheckInUpdate(seat_number=seat_selection.seat_number)
-        crud.check_in.update(db, db_obj=existing_check_in, obj_in=check_in_update)
-    else:
-        # 创建值机记录
-        check_in_create = schemas.CheckInCreate(
-            order_item_id=seat_selection.order_item_id,
-            seat_number=seat_selection.seat_number
-        )
-        crud.check_in.create(db, obj_in=check_in_create)
-    
-    return seat_selection
+        existing_check_in.seat_number = seat_number
+    db.commit()
+    _release_holds(hold_keys)
+    return schemas.SeatSelection(order_item_id=seat_selection.order_item_id, seat_number=seat_number)
 
 
 @router.get("/boarding-pass/{check_in_id}", response_model=schemas.BoardingPass)
@@ -1,140 +1,418 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from datetime import date, time, datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 
 from ... import dependencies as deps
-from ... import crud, schemas
+from ... import crud, schemas, models
 from ...models.flight_pricing import CabinClass
+from ...services.timetable import timetable, TimetableFlight
+from ...services.search_cache import search_cache, search_cache_key
+from ...services.fare_calendar import build_fare_calendar
+from ...services.connections import get_connection_graph
+from ...services.reference_cache import reference_cache
+from ...core.config import settings
+from ...core.streaming import STREAM_CHUNK_SIZE, NDJSON_MEDIA_TYPE, chunked, ndjson_lines, ndjson_response, wants_ndjson
+from ...crud.flight_inventory import cabin_capacity
+from ...crud.base import keyset_query, paginate_keyset
+from ...core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 
 router = APIRouter()
 
+# 中转候选数相对 max_results 的倍数，为座位校验后的过滤留余量
+CONNECTION_CANDIDATE_FACTOR = 3
+
+
+def _build_results(
+    rows: List[Any],
+    departure_date: date,
+    target_cabin: CabinClass,
+    inventory_map: Dict[Any, Any],
+    total_passengers: int
+) -> List[schemas.FlightSearchResult]:
+    """搜索结果行 -> 座位充足的航班结果"""
+    results = []
+    for row in rows:
+        (
+            flight_id,
+            flight_number,
+            scheduled_departure_time,
+            scheduled_arrival_time,
+            economy_seats,
+            business_seats,
+            first_seats,
+            route_id,
+            dep_code,
+            dep_name,
+            dep_city,
+            arr_code,
+            arr_name,
+            arr_city,
+            airline_code,
+            airline_name,
+            base_price,
+        ) = row
+
+        # 计算总座位数（不读取 Flight 实体，避免触发 status）
+        if target_cabin == CabinClass.ECONOMY:
+            total_seats = economy_seats
+        elif target_cabin == CabinClass.BUSINESS:
+            total_seats = business_seats
+        else:
+            total_seats = first_seats
+
+        # 无库存行说明该日尚无订单占座
+        inventory = inventory_map.get((flight_id, departure_date, target_cabin.value))
+        available_seats = inventory.available_seats if inventory else total_seats
+        if available_seats < total_passengers:
+            continue
+
+        # 计算到达日期
+        arrival_date = departure_date
+        if scheduled_arrival_time < scheduled_departure_time:
+            arrival_date += timedelta(days=1)
+
+        result = schemas.FlightSearchResult(
+            flight_id=flight_id,
+            flight_number=flight_number,
+            airline_code=airline_code,
+            airline_name=airline_name,
+            departure_airport_code=dep_code,
+            departure_airport_name=dep_name,
+            departure_city=dep_city,
+            arrival_airport_code=arr_code,
+            arrival_airport_name=arr_name,
+            arrival_city=arr_city,
+            departure_date=departure_date,
+            arrival_date=arrival_date,
+            scheduled_departure_time=scheduled_departure_time,
+            scheduled_arrival_time=scheduled_arrival_time,
+            aircraft_type=None,
+            cabin_class=schemas.CabinClass[target_cabin.name],
+            base_price=float(base_price) if base_price is not None else 0.0,
+            current_price=float(base_price) if base_price is not None else 0.0, # 简化：当前价格等于基础价格
+            available_seats=available_seats,
+        )
+        results.append(result)
+    return results
+
+
+def _return_leg_request(search_request: schemas.FlightSearchRequest) -> schemas.FlightSearchRequest:
+    """往返搜索中返程方向的单程请求"""
+    return search_request.model_copy(update={
+        "departure_city": search_request.arrival_city,
+        "arrival_city": search_request.departure_city,
+        "departure_date": search_request.return_date,
+        "return_date": None,
+    })
+
+
+def _stream_search_results(
+    db: Session,
+    search_request: schemas.FlightSearchRequest,
+    target_cabin: CabinClass
+) -> Iterator[schemas.FlightSearchResult]:
+    """
+    按批查询候选航班的库存并逐批产出结果，先去程后返程。
+    数据库路径先一次读完候选行（仅航班列，不加载 ORM 对象）：服务端游标未读完前
+    同一连接无法执行库存查询，边读游标边查库存会使流在第一批之后中断
+    """
+    total_passengers = search_request.adult_count + search_request.child_count
+    legs = [search_request]
+    if search_request.return_date is not None:
+        legs.append(_return_leg_request(search_request))
+    for leg in legs:
+        if timetable.is_loaded:
+            rows = timetable.search(leg)
+        else:
+            query = crud.flight.search_flights_query(db, request=leg)
+            rows = query.all() if query is not None else []
+        for chunk in chunked(rows):
+            inventory_map = crud.flight_inventory.get_many(
+                db,
+                keys=[(row[0], leg.departure_date, target_cabin.value) for row in chunk]
+            )
+            yield from _build_results(chunk, leg.departure_date, target_cabin, inventory_map, total_passengers)
+
 
 @router.post("/search", response_model=schemas.FlightSearchResponse)
 def search_flights(
     *,
     db: Session = Depends(deps.get_db),
-    search_request: schemas.FlightSearchRequest
+    search_request: schemas.FlightSearchRequest,
+    request: Request
 ) -> Any:
     """
-    搜索航班
+    搜索航班（提供 return_date 时同时返回返程航班）
+
+    请求头 Accept: application/x-ndjson 时以 NDJSON 流式逐行返回航班结果（先去程后返程，不含统计信息）
     """
-    try:
-        # 搜索航班
-        flights = crud.flight.search_flights(
-            db,
-            request=search_request
+    if wants_ndjson(request):
+        if search_request.cabin_class:
+            stream_cabin = CabinClass[search_request.cabin_class.name]
+        else:
+            stream_cabin = CabinClass.ECONOMY
+        return StreamingResponse(
+            ndjson_lines(_stream_search_results(db, search_request, stream_cabin)),
+            media_type=NDJSON_MEDIA_TYPE,
         )
-        
-        # 转换为搜索结果格式
-        results = []
-        for row in flights:
-            (
-                flight_id,
-                flight_number,
-                scheduled_departure_time,
-                scheduled_arrival_time,
-                economy_seats,
-                business_seats,
-                first_seats,
-                route_id,
-                dep_code,
-                dep_name,
-                dep_city,
-                arr_code,
-                arr_name,
-                arr_city,
-                airline_code,
-                airline_name,
-                base_price,
-            ) = row
-            
-            # 检查总乘客数是否超过可用座位
-            total_passengers = search_request.adult_count + search_request.child_count
-            # 若未指定舱位，默认以经济舱计可用座；将 schema 的枚举转换为 model 的枚举
-            if search_request.cabin_class:
-                target_cabin = CabinClass[search_request.cabin_class.name]
-            else:
-                target_cabin = CabinClass.ECONOMY
-            # 计算总座位数（不读取 Flight 实体，避免触发 status）
-            if target_cabin == CabinClass.ECONOMY:
-                total_seats = economy_seats
-            elif target_cabin == CabinClass.BUSINESS:
-                total_seats = business_seats
-            else:
-                total_seats = first_seats
-
-            # 计算已占用座位（订单项未过期且状态为pending/paid）
-            from ...models.order import Order, OrderItem, OrderStatus
-            now = datetime.utcnow()
-            occupied = db.query(func.count(OrderItem.item_id)).join(Order, OrderItem.order_id == Order.order_id).filter(
-                OrderItem.flight_id == flight_id,
-                OrderItem.cabin_class == target_cabin.value,
-                or_(
-                    Order.status == OrderStatus.PENDING,
-                    Order.status == OrderStatus.PAID,
-                ),
-                or_(
-                    Order.expired_at.is_(None),
-                    Order.expired_at > now
-                )
-            ).scalar() or 0
+    return _search_flights(db, search_request=search_request)
 
-            available_seats = max(total_seats - occupied, 0)
-            if available_seats < total_passengers:
-                continue
 
-            # 计算到达日期
-            arrival_date = search_request.departure_date
-            if scheduled_arrival_time < scheduled_departure_time:
-                arrival_date += timedelta(days=1)
-            
-            result = schemas.FlightSearchResult(
-                flight_id=flight_id,
-                flight_number=flight_number,
-                airline_code=airline_code,
-                airline_name=airline_name,
-                departure_airport_code=dep_code,
-                departure_airport_name=dep_name,
-                departure_city=dep_city,
-                arrival_airport_code=arr_code,
-                arrival_airport_name=arr_name,
-                arrival_city=arr_city,
-                departure_date=search_request.departure_date,
-                arrival_date=arrival_date,
-                scheduled_departure_time=scheduled_departure_time,
-                scheduled_arrival_time=scheduled_arrival_time,
-                aircraft_type=None,
-                cabin_class=schemas.CabinClass[target_cabin.name],
-                base_price=float(base_price) if base_price is not None else 0.0,
-                current_price=float(base_price) if base_price is not None else 0.0, # 简化：当前价格等于基础价格
-                available_seats=available_seats,
+def _search_flights(db: Session, *, search_request: schemas.FlightSearchRequest) -> schemas.FlightSearchResponse:
+    try:
+        # 命中缓存时仅替换回显的请求
+        cache_key = search_cache_key(search_request)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return cached.model_copy(update={"request": search_request})
+
+        # 搜索航班：优先使用内存时刻表索引，未加载时回退到数据库查询（往返时两个方向共用一条查询）
+        return_date = search_request.return_date
+        if timetable.is_loaded:
+            flights = timetable.search(search_request)
+            return_flights = []
+            if return_date is not None:
+                return_flights = timetable.search(_return_leg_request(search_request))
+        elif return_date is not None:
+            flights, return_flights = crud.flight.search_round_trip(db, request=search_request)
+        else:
+            flights = crud.flight.search_flights(
+                db,
+                request=search_request
             )
-            results.append(result)
+            return_flights = []
+        
+        # 检查总乘客数是否超过可用座位
+        total_passengers = search_request.adult_count + search_request.child_count
+        # 若未指定舱位，默认以经济舱计可用座；将 schema 的枚举转换为 model 的枚举
+        if search_request.cabin_class:
+            target_cabin = CabinClass[search_request.cabin_class.name]
+        else:
+            target_cabin = CabinClass.ECONOMY
+
+        # 一次查询获取全部候选航班（含返程）当日该舱位的座位库存
+        inventory_map = crud.flight_inventory.get_many(
+            db,
+            keys=[(row[0], search_request.departure_date, target_cabin.value) for row in flights]
+            + [(row[0], return_date, target_cabin.value) for row in return_flights]
+        )
+
+        # 转换为搜索结果格式
+        results = _build_results(
+            flights, search_request.departure_date, target_cabin, inventory_map, total_passengers
+        )
+        return_results = _build_results(
+            return_flights, return_date, target_cabin, inventory_map, total_passengers
+        ) if return_date is not None else []
         
         # 构建响应统计
         all_prices = [f.current_price for f in results]
-        airlines = list({r.airline_code for r in results})
-        airports = list({r.departure_airport_code for r in results} | {r.arrival_airport_code for r in results})
+        return_prices = [f.current_price for f in return_results]
+        all_results = results + return_results
+        airlines = list({r.airline_code for r in all_results})
+        airports = list({r.departure_airport_code for r in all_results} | {r.arrival_airport_code for r in all_results})
 
         # 构建响应
         response = schemas.FlightSearchResponse(
             request=search_request,
             outbound_flights=results,
             total_count=len(results),
+            return_flights=return_results,
+            return_count=len(return_results),
             min_price=min(all_prices) if all_prices else None,
             max_price=max(all_prices) if all_prices else None,
+            return_min_price=min(return_prices) if return_prices else None,
             airlines=airlines,
             airports=airports,
         )
-        
+
+        # 以全部候选航班为标签缓存，候选航班发生订单变更时失效（包括因座位不足被过滤的航班）
+        search_cache.set(cache_key, response, tags=[row[0] for row in flights] + [row[0] for row in return_flights])
         return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"搜索航班时发生错误: {str(e)}")
 
 
+def _leg_result(
+    flight: TimetableFlight,
+    departure_date: date,
+    cabin_class: CabinClass,
+    available_seats: int
+) -> schemas.FlightSearchResult:
+    """时刻表航班 -> 单航段搜索结果"""
+    arrival_date = departure_date
+    if flight.scheduled_arrival_time < flight.scheduled_departure_time:
+        arrival_date += timedelta(days=1)
+    price = flight.prices.get(cabin_class.value, 0.0)
+    return schemas.FlightSearchResult(
+        flight_id=flight.flight_id,
+        flight_number=flight.flight_number,
+        airline_code=flight.airline_code,
+        airline_name=flight.airline_name,
+        departure_airport_code=flight.dep_code,
+        departure_airport_name=flight.dep_name,
+        departure_city=flight.dep_city,
+        arrival_airport_code=flight.arr_code,
+        arrival_airport_name=flight.arr_name,
+        arrival_city=flight.arr_city,
+        departure_date=departure_date,
+        arrival_date=arrival_date,
+        scheduled_departure_time=flight.scheduled_departure_time,
+        scheduled_arrival_time=flight.scheduled_arrival_time,
+        aircraft_type=None,
+        cabin_class=schemas.CabinClass[cabin_class.name],
+        base_price=price,
+        current_price=price,
+        available_seats=available_seats,
+    )
+
+
+@router.post("/search/connections", response_model=schemas.ConnectionSearchResponse)
+def search_connections(
+    *,
+    db: Session = Depends(deps.get_db),
+    search_request: schemas.ConnectionSearchRequest
+) -> Any:
+    """
+    一次中转联程搜索（基于内存时刻表，未加载时先加载；TIMETABLE_INDEX_ENABLED 关闭时不可用）
+    """
+    if not settings.TIMETABLE_INDEX_ENABLED:
+        raise HTTPException(status_code=503, detail="中转搜索依赖内存时刻表索引，当前未启用")
+    try:
+        if not timetable.is_loaded:
+            timetable.reload(db)
+        graph = get_connection_graph()
+
+        if search_request.cabin_class:
+            target_cabin = CabinClass[search_request.cabin_class.name]
+        else:
+            target_cabin = CabinClass.ECONOMY
+
+        candidates = graph.search(
+            departure_city=search_request.departure_city,
+            arrival_city=search_request.arrival_city,
+            departure_date=search_request.departure_date,
+            cabin_class=target_cabin.value,
+            min_connection_minutes=search_request.min_connection_minutes,
+            max_connection_minutes=search_request.max_connection_minutes,
+            price_max=search_request.price_max,
+            limit=search_request.max_results * CONNECTION_CANDIDATE_FACTOR,
+        )
+
+        # 一次查询获取全部候选航段当日该舱位的座位库存
+        inventory_map = crud.flight_inventory.get_many(
+            db,
+            keys=[
+                key
+                for it in candidates
+                for key in (
+                    (it.first.flight_id, it.first_date, target_cabin.value),
+                    (it.second.flight_id, it.second_date, target_cabin.value),
+                )
+            ]
+        )
+
+        def available(flight: TimetableFlight, flight_date: date) -> int:
+            # 无库存行说明该日尚无订单占座
+            inventory = inventory_map.get((flight.flight_id, flight_date, target_cabin.value))
+            return inventory.available_seats if inventory else cabin_capacity(flight, target_cabin.value)
+
+        total_passengers = search_request.adult_count + search_request.child_count
+        itineraries = []
+        for it in candidates:
+            if search_request.price_min is not None and it.total_price < search_request.price_min:
+                continue
+            first_seats = available(it.first, it.first_date)
+            second_seats = available(it.second, it.second_date)
+            if min(first_seats, second_seats) < total_passengers:
+                continue
+            first_leg = _leg_result(it.first, it.first_date, target_cabin, first_seats)
+            second_leg = _leg_result(it.second, it.second_date, target_cabin, second_seats)
+            itineraries.append(schemas.ConnectionItinerary(
+                legs=[first_leg, second_leg],
+                connection_airport_code=it.first.arr_code,
+                connection_city=it.first.arr_city,
+                connection_minutes=it.connection_minutes,
+                total_price=it.total_price,
+                departure_date=it.first_date,
+                arrival_date=second_leg.arrival_date,
+                available_seats=min(first_seats, second_seats),
+            ))
+            if len(itineraries) >= search_request.max_results:
+                break
+
+        return schemas.ConnectionSearchResponse(
+            request=search_request,
+            itineraries=itineraries,
+            total_count=len(itineraries),
+            min_price=itineraries[0].total_price if itineraries else None,
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"搜索中转航班时发生错误: {str(e)}")
+
+
+@router.post("/calendar", response_model=schemas.FareCalendarResponse)
+def get_fare_calendar(
+    *,
+    db: Session = Depends(deps.get_db),
+    calendar_request: schemas.FareCalendarRequest
+) -> Any:
+    """
+    低价日历：返回日期窗口内每天的最低价与可订航班数
+    """
+    try:
+        return build_fare_calendar(db, calendar_request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询低价日历时发生错误: {str(e)}")
+
+
+def _timetable_status() -> schemas.TimetableStatus:
+    return schemas.TimetableStatus(
+        loaded=timetable.is_loaded,
+        version=timetable.version,
+        loaded_at=timetable.loaded_at,
+        flight_count=timetable.flight_count,
+    )
+
+
+@router.get("/timetable", response_model=schemas.TimetableStatus)
+def get_timetable_status() -> Any:
+    """
+    获取时刻表索引状态（版本号、加载时间）
+    """
+    return _timetable_status()
+
+
+@router.post("/timetable/reload", response_model=schemas.TimetableStatus)
+def reload_timetable(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser)
+) -> Any:
+    """
+    重新加载时刻表索引（管理员在修改航班计划后调用）
+    """
+    timetable.reload(db)
+    search_cache.clear()
+    reference_cache.clear()
+    return _timetable_status()
+
+
+@router.get("/search/cache-stats", response_model=schemas.CacheStats)
+def get_search_cache_stats(
+    current_user: models.User = Depends(deps.get_current_active_superuser)
+) -> Any:
+    """
+    获取搜索结果缓存的命中、未命中与淘汰计数
+    """
+    return search_cache.stats()
+
+
 @router.get("/{flight_id}", response_model=schemas.FlightWithDetails)
 def get_flight_details(
     *,
@@ -185,21 +463,39 @@ def get_flight_availability(
 
 @router.get("/", response_model=List[schemas.Flight])
 def list_flights(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
+    cursor: Optional[str] = Query(None, description="分页游标（取自上一页响应头 X-Next-Cursor）"),
     skip: int = 0,
     limit: int = 100,
     airline_code: Optional[str] = None,
     flight_number: Optional[str] = None,
 ) -> Any:
     """
-    获取航班列表（不使用status过滤）
+    获取航班列表（不使用status过滤），按航班ID键集分页，下一页游标在响应头 X-Next-Cursor 中；
+    skip 仅为兼容旧调用方，在未提供游标时生效
+
+    请求头 Accept: application/x-ndjson 时按批读取并以 NDJSON 流式返回（不返回游标）
     """
     query = db.query(crud.flight.model)
     if airline_code:
         query = query.filter(crud.flight.model.airline_code == airline_code)
     if flight_number:
         query = query.filter(crud.flight.model.flight_number.contains(flight_number))
-    return query.offset(skip).limit(limit).all()
+    key_columns = [crud.flight.model.flight_id]
+    try:
+        if wants_ndjson(request):
+            query = keyset_query(query, key_columns=key_columns, cursor=cursor, skip=skip).limit(limit)
+            return ndjson_response(query.yield_per(STREAM_CHUNK_SIZE), schemas.Flight)
+        flights, next_cursor = paginate_keyset(
+            query, key_columns=key_columns, cursor=cursor, limit=limit, skip=skip
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return flights
 
 
 @router.get("/{flight_id}/pricing", response_model=List[schemas.FlightPricing])
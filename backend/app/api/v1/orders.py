@@ -1,6 +1,7 @@
 from typing import List, Optional, Any
-from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, date, timedelta
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 import re
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_, and_
@@ -8,15 +9,39 @@ from sqlalchemy import func, or_, and_
 from ... import dependencies as deps
 from ... import crud, schemas, models
 from ...crud.order import order_item as order_item_crud
-from ...crud.order import order_item as order_item_crud
+from ...crud.order import OrderStateError
+from ...crud.passenger import identity_key
+from ...services.order_events import order_changed
+from ...services.order_stats import stats_cache
+from ...services.bulk_booking import BookingError, book_orders, resolve_flight_date
+from ...services.expiry_reaper import expiry_reaper
+from ...services.seat_map import InvalidSeatError, SeatUnavailableError
+from ...services import idempotency, order_export, seat_hold
+from ...services.idempotency import (
+    IDEMPOTENCY_KEY_HEADER, IDEMPOTENT_REPLAYED_HEADER, IdempotencyConflictError, request_fingerprint,
+)
+from ...core.config import settings
+from ...core.order_no import next_order_no
+from ...core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from ...core.streaming import STREAM_CHUNK_SIZE, ndjson_response
 
 router = APIRouter()
 
 
+def _resolve_flight_date(flight, requested: Optional[date], today: date) -> date:
+    """校验乘机日期落在21天运营掩码内且当日运营；未指定时取最近的运营日"""
+    try:
+        return resolve_flight_date(flight, requested, today)
+    except BookingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_model=List[schemas.OrderWithItems])
 def list_orders(
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = Query(None, description="分页游标（取自上一页响应头 X-Next-Cursor）"),
     skip: int = 0,
     limit: int = 100,
     status: Optional[schemas.OrderStatus] = Query(None, description="订单状态"),
@@ -25,25 +50,129 @@ def list_orders(
     end_date: Optional[date] = Query(None, description="结束日期")
 ) -> Any:
     """
-    获取当前用户的订单列表
+    获取当前用户的订单列表（按创建时间倒序，键集分页，下一页游标在响应头 X-Next-Cursor 中）
     """
-    # 一次性加载订单及其订单项与航班详情，避免多次查询导致的异常
-    orders = crud.order.get_user_orders_with_items(db, user_id=current_user.id, skip=skip, limit=limit)
+    # 一次性加载订单及其订单项与航班详情；状态与日期过滤在 SQL 中执行，分页大小精确
+    try:
+        orders, next_cursor = crud.order.get_user_orders_with_items(
+            db,
+            user_id=current_user.id,
+            status=models.order.OrderStatus(status.value) if status else None,
+            payment_status=models.order.PaymentStatus(payment_status.value) if payment_status else None,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return orders
+
 
-    # 过滤条件（在内存中按枚举值进行比对）
-    def to_val(x):
-        return x.value if hasattr(x, 'value') else str(x)
+@router.get("/pending-payment", response_model=List[schemas.OrderWithItems])
+def get_pending_payment_orders(
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = Query(None, description="分页游标（取自上一页响应头 X-Next-Cursor）"),
+    limit: int = Query(20, ge=1, le=100)
+) -> Any:
+    """
+    获取当前用户的待支付订单列表（订单项、乘客、航班按层批量加载，键集分页）
+    """
+    try:
+        orders, next_cursor = crud.order.get_pending_payment_orders(
+            db, user_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return orders
 
-    if status:
-        orders = [o for o in orders if to_val(o.status) == status.value]
-    if payment_status:
-        orders = [o for o in orders if to_val(o.payment_status) == payment_status.value]
-    if start_date and end_date:
-        orders = [o for o in orders if (o.created_at.date() >= start_date and o.created_at.date() <= end_date)]
 
+@router.get("/expired", response_model=List[schemas.OrderWithItems])
+def get_expired_orders(
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = Query(None, description="分页游标（取自上一页响应头 X-Next-Cursor）"),
+    limit: int = Query(20, ge=1, le=100)
+) -> Any:
+    """
+    获取当前用户超时未支付的订单列表（含已被过期回收取消的订单；订单项、乘客、航班按层批量加载，键集分页）
+    """
+    try:
+        orders, next_cursor = crud.order.get_expired_orders(
+            db, user_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return orders
 
 
+@router.get("/admin/unpaid")
+def stream_unpaid_orders(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    expired: bool = Query(False, description="true 为超时未支付订单（含已被过期回收取消的），false 为待支付订单"),
+    user_id: Optional[int] = Query(None, description="仅导出指定用户")
+) -> Any:
+    """
+    管理员：以 NDJSON 流式导出全系统的待支付或超时未支付订单（逐页批量加载，内存占用恒定）
+    """
+    orders = crud.order.iter_unpaid_orders(db, expired=expired, user_id=user_id, batch_size=STREAM_CHUNK_SIZE)
+    return ndjson_response(orders, schemas.OrderWithItems)
+
+
+@router.get("/export")
+def export_orders(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    format: schemas.ExportFormat = Query(schemas.ExportFormat.CSV, description="导出格式：csv / ndjson / parquet"),
+    gzip: bool = Query(True, description="gzip 压缩（parquet 使用自带的列压缩，忽略此参数）"),
+    start_date: Optional[date] = Query(None, description="下单起始日期（含）"),
+    end_date: Optional[date] = Query(None, description="下单结束日期（含）"),
+    user_id: Optional[int] = Query(None, description="管理员：仅导出指定用户，缺省导出全部")
+) -> Any:
+    """
+    导出订单明细（每个订单项一行）：个人用户导出本人订单，旅行社账号导出本社全部账号的订单。
+    服务端游标流式读取并边压缩边输出，内存占用与导出行数无关
+    """
+    if current_user.is_superuser:
+        scope = {"user_id": user_id}
+    elif current_user.role == "agency" and current_user.agency_id is not None:
+        scope = {"agency_id": current_user.agency_id}
+    else:
+        scope = {"user_id": current_user.id}
+    try:
+        order_export.check_available(format)
+    except order_export.ExportFormatUnavailableError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stmt = crud.order.export_query(start_date=start_date, end_date=end_date, **scope)
+    filename = order_export.export_filename(format, gzip)
+    return StreamingResponse(
+        order_export.export_chunks(db, stmt, fmt=format, compress=gzip),
+        media_type=order_export.export_media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/admin/reaper-stats", response_model=schemas.ReaperStats)
+def get_reaper_stats(
+    current_user: models.User = Depends(deps.get_current_active_superuser)
+) -> Any:
+    """
+    管理员：过期订单回收线程的吞吐与延迟指标
+    """
+    return expiry_reaper.stats()
+
+
 @router.get("/{order_id}", response_model=schemas.OrderWithItems)
 def get_order(
     *,
@@ -65,88 +194,94 @@ def get_order(
     return order
 
 
+def _idempotent_order_response(db: Session, *, current_user: models.User, key: Optional[str],
+                               fingerprint: str, handler) -> JSONResponse:
+    """携带幂等键时保存首次成功响应，重试直接回放（响应头 Idempotent-Replayed: true）"""
+    try:
+        status_code, body, replayed = idempotency.run(
+            db, user_id=current_user.id, key=key, fingerprint=fingerprint, handler=handler,
+            serialize=lambda order: schemas.OrderWithItems.model_validate(order).model_dump(mode="json"),
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    headers = {IDEMPOTENT_REPLAYED_HEADER: "true"} if replayed else None
+    return JSONResponse(content=body, status_code=status_code, headers=headers)
+
+
 @router.post("/", response_model=schemas.OrderWithItems)
 def create_order(
     *,
     db: Session = Depends(deps.get_db),
     order_in: schemas.OrderCreate,
-    current_user: models.User = Depends(deps.get_current_active_user)
+    current_user: models.User = Depends(deps.get_current_active_user),
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_KEY_HEADER, max_length=64, description="幂等键，超时重试时携带相同的值"
+    )
 ) -> Any:
     """创建新订单（含订单项），支持多人同航班或多个航班，座位校验与价格计算"""
-    from sqlalchemy import select
-    from sqlalchemy.orm import joinedload
+    return _idempotent_order_response(
+        db, current_user=current_user, key=idempotency_key,
+        fingerprint=request_fingerprint("create_order", order_in.model_dump(mode="json")),
+        handler=lambda: _create_order(db, order_in=order_in, current_user=current_user),
+    )
+
+
+def _create_order(db: Session, *, order_in: schemas.OrderCreate, current_user: models.User) -> Any:
+    from sqlalchemy import insert
     from decimal import Decimal
     from datetime import timedelta
-    from app.models import flight_pricing as fp_model
-    from app.models import passenger as passenger_model
     from app.models.order import Order as OrderModel, OrderItem as OrderItemModel, OrderStatus, PaymentStatus, PaymentMethod
     from app.schemas.passenger import PassengerCreate
     from app.models.flight_pricing import CabinClass
     from sqlalchemy import func
-
-    # 聚合每个 (flight_id, cabin_class) 需占用的座位数
-    seats_needed: dict[tuple[int, str], int] = {}
+    from app.models.flight import Flight as FlightModel
+    from app.crud.flight_inventory import SeatsUnavailableError
+
+    # 一次加载订单涉及的全部航班
+    flight_ids = {it.flight_id for it in order_in.items}
+    flights = {
+        f.flight_id: f
+        for f in db.query(FlightModel).filter(FlightModel.flight_id.in_(flight_ids)).all()
+    }
+
+    # 确定每个订单项的乘机日期，并聚合每个 (flight_id, flight_date, cabin_class) 需占用的座位数
+    today = date.today()
+    item_dates: list[date] = []
+    seats_needed: dict[tuple[int, date, str], int] = {}
     for it in order_in.items:
-        key = (it.flight_id, it.cabin_class.value)
-        seats_needed[key] = seats_needed.get(key, 0) + 1
-
-    # 校验航班存在与座位充足
-    for (flight_id, cabin), count in seats_needed.items():
-        flight = crud.flight.get(db, id=flight_id)
+        flight = flights.get(it.flight_id)
         if not flight:
-            raise HTTPException(status_code=400, detail=f"航班 {flight_id} 不存在")
-        # 计算可用座位（不按日期）：总座位 - 已占用（订单状态pending/paid且未过期的pending）
-        if CabinClass(cabin) == CabinClass.ECONOMY:
-            total_seats = flight.economy_seats
-        elif CabinClass(cabin) == CabinClass.BUSINESS:
-            total_seats = flight.business_seats
-        else:
-            total_seats = flight.first_seats
+            raise HTTPException(status_code=400, detail=f"航班 {it.flight_id} 不存在")
+        flight_date = _resolve_flight_date(flight, it.flight_date, today)
+        item_dates.append(flight_date)
+        key = (it.flight_id, flight_date, it.cabin_class.value)
+        seats_needed[key] = seats_needed.get(key, 0) + 1
 
-        now = datetime.utcnow()
-        from app.models.order import Order as OrderModel, OrderItem as OrderItemModel, OrderStatus as ModelOrderStatus, PaymentStatus as ModelPaymentStatus
-        occupied = db.query(func.count(OrderItemModel.item_id)).join(OrderModel, OrderItemModel.order_id == OrderModel.order_id).filter(
-            OrderItemModel.flight_id == flight_id,
-            OrderItemModel.cabin_class == cabin,
-            (
-                (
-                    (OrderModel.payment_status == ModelPaymentStatus.UNPAID)
-                    & (OrderModel.status == ModelOrderStatus.PENDING)
-                    & ((OrderModel.expired_at.is_(None)) | (OrderModel.expired_at > now))
-                )
-                | (OrderModel.payment_status == ModelPaymentStatus.PAID)
-            )
-        ).scalar() or 0
-        available = max(total_seats - occupied, 0)
-        if available < count:
-            raise HTTPException(status_code=409, detail=f"航班 {flight_id} 的 {cabin} 座位不足（可用 {available}，需求 {count}）")
-
-    # 事务：创建订单与订单项
+    # 事务：占用座位库存，创建订单与订单项
     try:
-        # 价格查询缓存：每个 (flight_id,cabin) 的base_price
-        price_cache: dict[tuple[int, str], Decimal] = {}
-        def get_price(fid: int, cab: str) -> Decimal:
-            key = (fid, cab)
-            if key in price_cache:
-                return price_cache[key]
-            pricing = db.query(fp_model.FlightPricing).filter(fp_model.FlightPricing.flight_id==fid, fp_model.FlightPricing.cabin_class==cab).first()
-            base = Decimal(pricing.base_price) if pricing else Decimal('0.00')
-            price_cache[key] = base
-            return base
+        # 条件更新原子占座（按键排序加锁），座位不足时整单回滚
+        try:
+            crud.flight_inventory.reserve(db, counts=seats_needed)
+        except SeatsUnavailableError as e:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=str(e))
+
+        # 一次查询全部航班各舱位的基础价格，先汇总金额再写订单
+        prices = crud.flight_pricing.get_base_prices(db, flight_ids=flight_ids)
+        item_prices = [prices.get((it.flight_id, it.cabin_class.value), Decimal('0.00')) for it in order_in.items]
+        total_original = sum(item_prices, Decimal('0.00'))
+        total_paid = total_original
 
         # 订单号
         now = datetime.utcnow()
-        order_no = f"ORD{now.strftime('%Y%m%d%H%M%S')}"
-        # 汇总金额
-        total_original = Decimal('0.00')
-        total_paid = Decimal('0.00')
+        order_no = next_order_no()
 
         # 创建订单
         order_obj = OrderModel(
             order_no=order_no,
             user_id=current_user.id,
-            total_amount_original=Decimal('0.00'),
-            total_amount=Decimal('0.00'),
+            total_amount_original=total_original,
+            total_amount=total_paid,
             currency='CNY',
             payment_method=PaymentMethod(order_in.payment_method.value),
             payment_status=PaymentStatus.UNPAID,
@@ -156,68 +291,81 @@ def create_order(
         db.add(order_obj)
         db.flush()  # 获取order_id
 
-        # 为每个item创建/获取乘客，并插入订单项
-        for it in order_in.items:
-            # 乘客：按 (id_card,name) 查找，若无则创建
-            p = db.query(passenger_model.Passenger).filter(
-                passenger_model.Passenger.id_card==it.passenger_info.id_card.upper(),
-                passenger_model.Passenger.name==it.passenger_info.name
-            ).first()
-            if not p:
-                p_in = PassengerCreate(
-                    name=it.passenger_info.name,
-                    id_card=it.passenger_info.id_card,
-                    gender=it.passenger_info.gender,
-                    birthday=it.passenger_info.birthday,
-                    nationality=it.passenger_info.nationality,
-                    contact_phone=it.passenger_info.contact_phone,
-                )
-                p = db.merge(passenger_model.Passenger(**p_in.dict()))
-                db.flush()
-
-            base_price = get_price(it.flight_id, it.cabin_class.value)
-            total_original += base_price
-            total_paid += base_price
-
-            oi = OrderItemModel(
-                order_id=order_obj.order_id,
-                flight_id=it.flight_id,
-                cabin_class=it.cabin_class.value,
-                passenger_id=p.passenger_id,
-                original_price=base_price,
-                paid_price=base_price,
-            )
-            # 统一为同订单的联系邮箱（若提供）
-            if order_in.contact_email:
-                oi.contact_email = order_in.contact_email
-            db.add(oi)
-
-        # 更新订单金额
-        order_obj.total_amount_original = total_original
-        order_obj.total_amount = total_paid
-        db.add(order_obj)
+        # 乘客：按 (id_card,name) 一次查询，缺失的单条多行 INSERT 创建
+        passengers = crud.passenger.get_or_create_many(
+            db, passengers=[PassengerCreate(**it.passenger_info.model_dump()) for it in order_in.items]
+        )
+
+        # 订单项：单条多行 INSERT，同订单统一联系邮箱（若提供）
+        item_rows = [
+            {
+                "order_id": order_obj.order_id,
+                "flight_id": it.flight_id,
+                "flight_date": flight_date,
+                "cabin_class": it.cabin_class.value,
+                "passenger_id": passengers[
+                    identity_key(it.passenger_info.id_card, it.passenger_info.name)
+                ].passenger_id,
+                "original_price": price,
+                "paid_price": price,
+                "contact_email": order_in.contact_email,
+            }
+            for it, flight_date, price in zip(order_in.items, item_dates, item_prices)
+        ]
+        db.execute(insert(OrderItemModel).values(item_rows))
         db.commit()
         db.refresh(order_obj)
+        order_changed(flight_ids=flight_ids, user_ids=[current_user.id])
 
         # 返回包含订单项的订单
         result = crud.order.get_with_items(db, order_id=order_obj.order_id)
         return result
+    except (HTTPException, IdempotencyConflictError):
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"创建订单失败: {str(e)}")
 
 
+@router.post("/bulk", response_model=schemas.BulkOrderResponse)
+def create_orders_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    bulk_in: schemas.BulkOrderCreate,
+    current_user: models.User = Depends(deps.get_current_agency_user),
+    chunk_size: int = Query(settings.BULK_BOOKING_CHUNK_SIZE, ge=1, le=500, description="每个事务处理的订单数")
+) -> Any:
+    """
+    旅行社批量下单：一次提交多个订单，按批提交事务，返回逐单成功或失败原因
+    """
+    return book_orders(db, user_id=current_user.id, orders=bulk_in.orders, chunk_size=chunk_size)
+
+
 @router.put("/{order_id}/payment", response_model=schemas.OrderWithItems)
 def update_payment_status(
     *,
     db: Session = Depends(deps.get_db),
     order_id: int,
     payment_status: schemas.PaymentStatus,
-    current_user: models.User = Depends(deps.get_current_active_user)
+    current_user: models.User = Depends(deps.get_current_active_user),
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_KEY_HEADER, max_length=64, description="幂等键，超时重试时携带相同的值"
+    )
 ) -> Any:
     """
     更新订单支付状态
     """
+    return _idempotent_order_response(
+        db, current_user=current_user, key=idempotency_key,
+        fingerprint=request_fingerprint("update_payment_status", order_id, payment_status.value),
+        handler=lambda: _update_payment_status(
+            db, order_id=order_id, payment_status=payment_status, current_user=current_user
+        ),
+    )
+
+
+def _update_payment_status(db: Session, *, order_id: int, payment_status: schemas.PaymentStatus,
+                           current_user: models.User) -> Any:
     order = crud.order.get(db, id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="订单不存在")
@@ -230,14 +378,24 @@ def update_payment_status(
     current_payment = order.payment_status.value if hasattr(order.payment_status, 'value') else str(order.payment_status)
     if current_payment == schemas.PaymentStatus.PAID.value:
         raise HTTPException(status_code=400, detail="订单已支付，无法重复支付")
+    current_status = order.status.value if hasattr(order.status, 'value') else str(order.status)
+    if current_status == schemas.OrderStatus.CANCELLED.value:
+        raise HTTPException(status_code=400, detail="订单已取消，无法支付")
+    now = datetime.utcnow()
+    if payment_status == schemas.PaymentStatus.PAID and order.expired_at is not None and order.expired_at <= now:
+        raise HTTPException(status_code=400, detail="订单已超时，无法支付")
 
     from app.models.order import PaymentStatus as ModelPaymentStatus
-    updated = crud.order.update_payment_status(
-        db,
-        order_id=order_id,
-        payment_status=ModelPaymentStatus(payment_status.value),
-        payment_time=datetime.utcnow() if payment_status == schemas.PaymentStatus.PAID else None,
-    )
+    try:
+        updated = crud.order.update_payment_status(
+            db,
+            order_id=order_id,
+            payment_status=ModelPaymentStatus(payment_status.value),
+            payment_time=now if payment_status == schemas.PaymentStatus.PAID else None,
+            now=now,
+        )
+    except OrderStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated:
         raise HTTPException(status_code=500, detail="更新支付状态失败")
     return crud.order.get_with_items(db, order_id=order_id)
@@ -309,8 +467,9 @@ def cancel_order(
     if order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="无权取消此订单")
     
-    # 只能取消待支付或已支付的订单
-    if order.status not in [schemas.OrderStatus.PENDING, schemas.OrderStatus.PAID]:
+    # 只能取消待支付或已支付的订单（模型枚举与 schema 枚举按值比较）
+    current_status = order.status.value if hasattr(order.status, 'value') else str(order.status)
+    if current_status not in [schemas.OrderStatus.PENDING.value, schemas.OrderStatus.PAID.value]:
         raise HTTPException(status_code=400, detail="订单状态无法取消")
 
     order_with_items = crud.order.get_with_items(db, order_id=order_id)
@@ -335,7 +494,10 @@ def cancel_order(
             _ = (dep_dt - now).total_seconds() < 24 * 3600  # 计算结果若需落库，可在此扩展
 
     # 更新订单状态
-    cancelled = crud.order.cancel_order(db, order_id=order_id)
+    try:
+        cancelled = crud.order.cancel_order(db, order_id=order_id)
+    except OrderStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not cancelled:
         raise HTTPException(status_code=500, detail="取消订单失败")
 
@@ -349,50 +511,13 @@ def get_order_stats(
     current_user: models.User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    获取当前用户的订单统计：总数、待支付、已支付、已完成、累计消费
+    获取当前用户的订单统计：总数、待支付、已支付、已完成、累计消费（单条聚合查询，按用户短期缓存）
     """
-    now = datetime.utcnow()
-    OrderModel = models.order.Order
-    PaymentStatus = models.order.PaymentStatus
-    OrderStatus = models.order.OrderStatus
-
-    total_orders = db.query(func.count(OrderModel.order_id)).filter(OrderModel.user_id == current_user.id).scalar() or 0
-
-    unpaid_count = db.query(func.count(OrderModel.order_id)).filter(
-        OrderModel.user_id == current_user.id,
-        OrderModel.payment_status == PaymentStatus.UNPAID.value,
-        OrderModel.status == OrderStatus.PENDING.value,
-        or_(OrderModel.expired_at.is_(None), OrderModel.expired_at > now)
-    ).scalar() or 0
-
-    paid_count = db.query(func.count(OrderModel.order_id)).filter(
-        OrderModel.user_id == current_user.id,
-        OrderModel.payment_status == PaymentStatus.PAID.value
-    ).scalar() or 0
-
-    completed_count = db.query(func.count(OrderModel.order_id)).filter(
-        OrderModel.user_id == current_user.id,
-        OrderModel.status == OrderStatus.COMPLETED.value
-    ).scalar() or 0
-
-    cancelled_count = db.query(func.count(OrderModel.order_id)).filter(
-        OrderModel.user_id == current_user.id,
-        OrderModel.status == OrderStatus.CANCELLED.value
-    ).scalar() or 0
-
-    total_spent = db.query(func.coalesce(func.sum(OrderModel.total_amount), 0)).filter(
-        OrderModel.user_id == current_user.id,
-        OrderModel.payment_status == PaymentStatus.PAID.value
-    ).scalar() or 0.0
-
-    return schemas.OrderStats(
-        total_orders=total_orders,
-        unpaid_count=unpaid_count,
-        paid_count=paid_count,
-        completed_count=completed_count,
-        cancelled_count=cancelled_count,
-        total_spent=float(total_spent),
-    )
+    stats = stats_cache.get(current_user.id)
+    if stats is None:
+        stats = schemas.OrderStats(**crud.order.get_user_stats(db, user_id=current_user.id))
+        stats_cache.set(current_user.id, stats)
+    return stats
 
 
 @router.get("/{order_id}/items", response_model=List[schemas.OrderItemWithDetails])
@@ -443,34 +568,37 @@ def update_check_in_status(
         sn = seat_number.upper().strip()
         if not re.fullmatch(r"\d{1,2}[A-F]", sn):
             raise HTTPException(status_code=400, detail="座位号格式错误")
-        try:
-            row = int(sn[:-1])
-            col = sn[-1]
-        except Exception:
-            raise HTTPException(status_code=400, detail="座位号格式错误")
-        cabin = str(order_item.cabin_class)
-        if cabin == "first":
-            if not (1 <= row <= 4 and col in {"A", "B"}):
-                raise HTTPException(status_code=400, detail="座位与舱位不匹配")
-        elif cabin == "business":
-            if not (5 <= row <= 10 and col in {"A", "B", "D", "E"}):
-                raise HTTPException(status_code=400, detail="座位与舱位不匹配")
-        else:
-            if not (11 <= row <= 30 and col in {"A", "B", "C", "D", "E", "F"}):
-                raise HTTPException(status_code=400, detail="座位与舱位不匹配")
-        existing = db.query(models.order.OrderItem).filter(
-            models.order.OrderItem.flight_id == order_item.flight_id,
-            models.order.OrderItem.seat_number == sn,
-            models.order.OrderItem.item_id != item_id,
-        ).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="座位已被占用")
+        if order_item.flight_date is None:
+            raise HTTPException(status_code=400, detail="订单项缺少乘机日期，无法选座")
+        if sn != order_item.seat_number:
+            # 锁定航班日座位图，位图校验并占用新座位、释放原座位，随值机状态一并提交；
+            # 其他乘客保留中的座位不可选，本订单项的保留在提交后转为正式占用
+            try:
+                seat_hold.check_not_held(order_item.flight_id, order_item.flight_date, sn, item_id)
+                sn = crud.seat_map.claim(
+                    db,
+                    flight_id=order_item.flight_id,
+                    flight_date=order_item.flight_date,
+                    seat_number=sn,
+                    cabin_class=str(order_item.cabin_class),
+                    release_seat=order_item.seat_number,
+                )
+            except InvalidSeatError as e:
+                db.rollback()
+                raise HTTPException(status_code=400, detail=str(e))
+            except SeatUnavailableError:
+                db.rollback()
+                raise HTTPException(status_code=400, detail="座位已被占用")
+            except seat_hold.SeatHeldError as e:
+                db.rollback()
+                raise HTTPException(status_code=400, detail=str(e))
         order_item = order_item_crud.update_check_in_status(
             db,
             item_id=item_id,
             check_in_status=check_in_status,
             seat_number=sn,
         )
+        seat_hold.release_seat(order_item.flight_id, order_item.flight_date, item_id)
     else:
         order_item = order_item_crud.update_check_in_status(
             db,
@@ -506,43 +634,3 @@ def update_ticket_status(
         ticket_status=ticket_status
     )
     return order_item
-
-
-@router.get("/pending-payment", response_model=List[schemas.OrderWithItems])
-def get_pending_payment_orders(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user)
-) -> Any:
-    """
-    获取待支付订单列表
-    """
-    orders = crud.order.get_pending_payment_orders(db)
-    
-    # 获取包含订单项的订单信息
-    orders_with_items = []
-    for order in orders:
-        order_with_items = crud.order.get_with_items(db, order_id=order.order_id)
-        if order_with_items:
-            orders_with_items.append(order_with_items)
-    
-    return orders_with_items
-
-
-@router.get("/expired", response_model=List[schemas.OrderWithItems])
-def get_expired_orders(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user)
-) -> Any:
-    """
-    获取过期订单列表
-    """
-    orders = crud.order.get_expired_orders(db)
-    
-    # 获取包含订单项的订单信息
-    orders_with_items = []
-    for order in orders:
-        order_with_items = crud.order.get_with_items(db, order_id=order.order_id)
-        if order_with_items:
-            orders_with_items.append(order_with_items)
-    
-    return orders_with_items
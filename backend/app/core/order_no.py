@@ -0,0 +1,129 @@
+"""
+订单号生成
+
+Snowflake 风格：毫秒时间戳 | 节点号 | 进程号 | 毫秒内序号，全部在进程内生成，无需访问数据库。
+- 节点号（settings.ORDER_NO_NODE_ID）区分主机，多机部署时每台主机须配置不同的值；
+- 进程号取完整 PID，同一主机上存活的进程 PID 互不相同，多 worker 无需额外协调；
+- 同一毫秒内序号用尽或系统时钟回拨时沿用逻辑时钟（借用下一毫秒），保证单进程内严格递增。
+订单号为 "ORD" + 定宽十进制数，字典序与生成顺序一致，总长 29，不超过 order_no 列宽 32。
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, NamedTuple
+
+from app.core.config import settings
+
+# 2024-01-01T00:00:00Z，41 位毫秒时间戳可用约 69 年
+ORDER_NO_EPOCH_MS = 1704067200000
+
+TIMESTAMP_BITS = 41
+NODE_BITS = 10
+PID_BITS = 22  # Linux pid_max 上限为 2^22
+SEQUENCE_BITS = 12
+
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_PID = (1 << PID_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+PID_SHIFT = SEQUENCE_BITS
+NODE_SHIFT = PID_SHIFT + PID_BITS
+TIMESTAMP_SHIFT = NODE_SHIFT + NODE_BITS
+
+ORDER_NO_PREFIX = "ORD"
+ORDER_NO_DIGITS = len(str((1 << (TIMESTAMP_SHIFT + TIMESTAMP_BITS)) - 1))
+
+
+class OrderNoParts(NamedTuple):
+    timestamp_ms: int
+    node_id: int
+    pid: int
+    sequence: int
+
+
+class OrderNoGenerator(ABC):
+    """订单号生成器接口：next() 返回一个全局唯一的订单号字符串"""
+
+    @abstractmethod
+    def next(self) -> str:
+        """生成下一个订单号"""
+
+
+class SnowflakeOrderNoGenerator(OrderNoGenerator):
+    """线程安全；fork 后在子进程中首次调用时自动切换到子进程 PID 并重置序号"""
+
+    def __init__(
+        self,
+        node_id: int = 0,
+        *,
+        epoch_ms: int = ORDER_NO_EPOCH_MS,
+        clock: Callable[[], float] = time.time,
+    ):
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id 须在 0..{MAX_NODE_ID} 之间")
+        self.node_id = node_id
+        self.epoch_ms = epoch_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pid = -1
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _now_ms(self) -> int:
+        return int(self._clock() * 1000) - self.epoch_ms
+
+    def next_int(self) -> int:
+        with self._lock:
+            pid = os.getpid()
+            if pid != self._pid:
+                if pid > MAX_PID:
+                    raise RuntimeError(f"进程号 {pid} 超出订单号可编码范围")
+                self._pid = pid
+                self._last_ms = -1
+                self._sequence = 0
+            now = self._now_ms()
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # 同一毫秒或时钟回拨：在逻辑时钟上递增，序号用尽时借用下一毫秒
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (
+                (self._last_ms << TIMESTAMP_SHIFT)
+                | (self.node_id << NODE_SHIFT)
+                | (pid << PID_SHIFT)
+                | self._sequence
+            )
+
+    def next(self) -> str:
+        return f"{ORDER_NO_PREFIX}{self.next_int():0{ORDER_NO_DIGITS}d}"
+
+
+def parse_order_no(order_no: str, epoch_ms: int = ORDER_NO_EPOCH_MS) -> OrderNoParts:
+    """拆解 Snowflake 订单号（排查问题用）"""
+    if not order_no.startswith(ORDER_NO_PREFIX):
+        raise ValueError("不是 Snowflake 订单号")
+    value = int(order_no[len(ORDER_NO_PREFIX):])
+    return OrderNoParts(
+        timestamp_ms=(value >> TIMESTAMP_SHIFT) + epoch_ms,
+        node_id=(value >> NODE_SHIFT) & MAX_NODE_ID,
+        pid=(value >> PID_SHIFT) & MAX_PID,
+        sequence=value & MAX_SEQUENCE,
+    )
+
+
+order_no_generator: OrderNoGenerator = SnowflakeOrderNoGenerator(settings.ORDER_NO_NODE_ID)
+
+
+def set_order_no_generator(generator: OrderNoGenerator) -> None:
+    """替换全局订单号生成器（例如接入集中式发号服务）"""
+    global order_no_generator
+    order_no_generator = generator
+
+
+def next_order_no() -> str:
+    return order_no_generator.next()
@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Sequence, Tuple
+
+# 下一页游标通过响应头返回，响应体保持列表结构不变
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise InvalidCursorError("未知的游标字段类型")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """键值序列 -> 不透明游标（URL 安全 base64）"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """不透明游标 -> 键值元组，长度须与分页键列数一致"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("无效的分页游标") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("无效的分页游标")
+    try:
+        return tuple(_decode_value(v) for v in values)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("无效的分页游标") from e
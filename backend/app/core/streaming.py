@@ -0,0 +1,39 @@
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 流式读取时每批从数据库取回的行数
+STREAM_CHUNK_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    """客户端通过 Accept: application/x-ndjson 选择流式响应"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def chunked(rows: Iterable[Any], size: int = STREAM_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """按固定大小分批，末批可能不足"""
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ndjson_lines(items: Iterable[BaseModel]) -> Iterator[str]:
+    for item in items:
+        yield item.model_dump_json() + "\n"
+
+
+def ndjson_response(rows: Iterable[Any], schema: Type[BaseModel]) -> StreamingResponse:
+    """逐行校验并序列化 ORM 对象，边读边写，内存占用与结果集大小无关"""
+    return StreamingResponse(
+        ndjson_lines(schema.model_validate(row) for row in rows),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
@@ -2,6 +2,12 @@ from .user import user
 from .flight import flight
 from .order import order, order_item
 from .flight_pricing import flight_pricing
+from .flight_inventory import flight_inventory
+from .passenger import passenger
+from .idempotency_key import idempotency_key
+from .seat_map import seat_map
+from .seat_hold import seat_hold
+from .check_in import check_in
 from .base import CRUDBase
 
 __all__ = [
@@ -10,5 +16,11 @@ __all__ = [
     "order",
     "order_item",
     "flight_pricing",
+    "flight_inventory",
+    "passenger",
+    "idempotency_key",
+    "seat_map",
+    "seat_hold",
+    "check_in",
     "CRUDBase",
 ]
@@ -1,9 +1,13 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, insert, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Query, Session
 
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -11,6 +15,58 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def insert_ignore(model: Type[Base]):
+    """构造忽略唯一键冲突的 INSERT（MySQL: INSERT IGNORE，SQLite: INSERT OR IGNORE）"""
+    return insert(model).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+
+
+def insert_skip_duplicates(db: Session, model: Type[Base]):
+    """
+    构造遇唯一键冲突时跳过该行的 INSERT（MySQL: ON DUPLICATE KEY UPDATE 主键=主键，SQLite: ON CONFLICT DO NOTHING）。
+    与 INSERT IGNORE 不同，数据截断、非空约束等其他错误照常抛出
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(model)
+        pk = inspect(model).primary_key[0]
+        return stmt.on_duplicate_key_update({pk.name: stmt.table.c[pk.name]})
+    if dialect == "sqlite":
+        return sqlite_insert(model).on_conflict_do_nothing()
+    return insert(model)
+
+
+def keyset_query(query: Query, *, key_columns: Sequence[Any], cursor: Optional[str] = None,
+                 descending: bool = False, skip: int = 0) -> Query:
+    """
+    按键列排序并从游标之后开始（键列须唯一确定一行，通常以主键结尾）。
+    skip 仅为兼容旧的 offset 调用方，提供游标时忽略；游标无效时抛出 InvalidCursorError
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(key_columns))
+        keys = tuple_(*key_columns)
+        query = query.filter(keys < tuple_(*values) if descending else keys > tuple_(*values))
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in key_columns])
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query
+
+
+def paginate_keyset(query: Query, *, key_columns: Sequence[Any], cursor: Optional[str] = None,
+                    limit: int = 100, descending: bool = False, skip: int = 0) -> Tuple[List[Any], Optional[str]]:
+    """
+    键集分页：返回 (本页数据, 下一页游标)，没有下一页时游标为 None。
+    多取一行判断是否还有下一页，任意深度的页与第一页开销相同
+    """
+    rows = keyset_query(
+        query, key_columns=key_columns, cursor=cursor, descending=descending, skip=skip
+    ).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in key_columns])
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -31,6 +87,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def get_multi_keyset(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """按主键键集分页，返回 (本页数据, 下一页游标)"""
+        key_columns = [getattr(self.model, c.key) for c in inspect(self.model).primary_key]
+        return paginate_keyset(db.query(self.model), key_columns=key_columns, cursor=cursor, limit=limit)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from app.crud.base import CRUDBase
+from app.models.check_in import CheckIn
+from app.models.flight import Flight
+from app.models.order import CheckInStatus, Order, OrderItem
+from app.models.route import Route
+from app.schemas.check_in import CheckInCreate, CheckInUpdate
+
+
+class CRUDCheckIn(CRUDBase[CheckIn, CheckInCreate, CheckInUpdate]):
+    """值机记录CRUD操作"""
+    def get(self, db: Session, id: int) -> Optional[CheckIn]:
+        """根据主键check_in_id获取值机记录"""
+        return db.query(CheckIn).filter(CheckIn.check_in_id == id).first()
+
+    def get_by_order_item(self, db: Session, *, order_item_id: int) -> Optional[CheckIn]:
+        return db.query(CheckIn).filter(CheckIn.order_item_id == order_item_id).first()
+
+    def get_by_passenger(self, db: Session, *, passenger_id: int) -> List[CheckIn]:
+        return db.query(CheckIn).filter(CheckIn.passenger_id == passenger_id).all()
+
+    def get_with_details(self, db: Session, *, check_in_id: int) -> Optional[CheckIn]:
+        """值机记录连同订单项、乘客、航班及航线机场（登机牌所需）一次查询加载"""
+        return db.query(CheckIn).options(
+            joinedload(CheckIn.order_item),
+            joinedload(CheckIn.passenger),
+            joinedload(CheckIn.flight).joinedload(Flight.route).joinedload(Route.departure_airport),
+            joinedload(CheckIn.flight).joinedload(Flight.route).joinedload(Route.arrival_airport),
+        ).filter(CheckIn.check_in_id == check_in_id).first()
+
+    def get_passenger_history(self, db: Session, *, passenger_id: int, user_id: int) -> List[CheckIn]:
+        """
+        乘客在该用户订单下的值机记录（含订单项），按值机时间倒序。
+        经订单项关联订单，在 SQL 中按 orders.user_id 过滤归属，订单项随同一条查询填充
+        """
+        return (
+            db.query(CheckIn)
+            .join(CheckIn.order_item)
+            .join(Order, Order.order_id == OrderItem.order_id)
+            .filter(CheckIn.passenger_id == passenger_id, Order.user_id == user_id)
+            .options(contains_eager(CheckIn.order_item))
+            .order_by(CheckIn.check_in_time.desc(), CheckIn.check_in_id.desc())
+            .all()
+        )
+
+    def create_many(self, db: Session, *, rows: List[Dict[str, Any]]) -> None:
+        """单条多行 INSERT 写入值机记录，不提交事务"""
+        if rows:
+            db.execute(insert(CheckIn).values(rows))
+
+    def cancel(self, db: Session, *, check_in: CheckIn) -> None:
+        """
+        取消值机：释放座位图上的座位、清空订单项座位号并恢复为未值机，删除值机记录，一个事务提交
+        """
+        from app.crud.seat_map import seat_map
+
+        item = check_in.order_item
+        if item is not None:
+            seat_map.release_many(db, seats=[(item.flight_id, item.flight_date, item.seat_number)])
+            item.seat_number = None
+            item.check_in_status = CheckInStatus.NOT_CHECKED
+        db.delete(check_in)
+        db.commit()
+
+    def update_boarding_info(self, db: Session, *, check_in_id: int, **fields: Any) -> Optional[CheckIn]:
+        """更新航站楼、登机口、登机时间"""
+        check_in = self.get(db, id=check_in_id)
+        if not check_in:
+            return None
+        for field, value in fields.items():
+            setattr(check_in, field, value)
+        db.commit()
+        db.refresh(check_in)
+        return check_in
+
+
+check_in = CRUDCheckIn(CheckIn)
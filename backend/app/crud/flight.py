@@ -1,14 +1,14 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import date, time, datetime
-from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy.orm import Query, Session, joinedload, aliased
 from sqlalchemy import and_, or_, func
 from app.crud.base import CRUDBase
+from app.crud.flight_inventory import flight_inventory, cabin_capacity
 from app.models.flight import Flight
 from app.models.flight_pricing import FlightPricing, CabinClass
 from app.models.route import Route
 from app.models.airport import Airport
 from app.models.airline import Airline
-from app.models.order import Order, OrderItem, OrderStatus
 from app.schemas.flight import FlightCreate, FlightUpdate
 from app.schemas.flight_search import FlightSearchRequest, FlightSearchResult
 
@@ -40,12 +40,8 @@ class CRUDFlight(CRUDBase[Flight, FlightCreate, FlightUpdate]):
             joinedload(Flight.pricing)
         ).filter(Flight.flight_id == flight_id).first()
     
-    def search_flights(self, db: Session, *, request: FlightSearchRequest) -> List[Dict[str, Any]]:
-        """基于地点与日期的航班搜索，忽略status，按21天掩码过滤并排序"""
-        day_diff = (request.departure_date - date.today()).days
-        if not (0 <= day_diff < 21):
-            return []
-
+    def _search_query(self, db: Session, *, request: FlightSearchRequest):
+        """搜索的公共部分：航线/机场/航司关联与舱位、价格过滤，返回 (query, 出发机场别名, 到达机场别名)"""
         dep_airport = aliased(Airport, name='dep_airport')
         arr_airport = aliased(Airport, name='arr_airport')
 
@@ -78,10 +74,6 @@ class CRUDFlight(CRUDBase[Flight, FlightCreate, FlightUpdate]):
             Airline, Flight.airline_code == Airline.airline_code
         ).outerjoin(
             FlightPricing, FlightPricing.flight_id == Flight.flight_id
-        ).filter(
-            func.lower(dep_airport.city) == request.departure_city.lower(),
-            func.lower(arr_airport.city) == request.arrival_city.lower(),
-            func.substring(Flight.operating_days, day_diff + 1, 1) == '1'
         )
 
         # 舱位过滤（如果提供）
@@ -97,11 +89,105 @@ class CRUDFlight(CRUDBase[Flight, FlightCreate, FlightUpdate]):
         if request.price_max is not None:
             query = query.filter(FlightPricing.base_price <= request.price_max)
 
+        return query, dep_airport, arr_airport
+
+    @staticmethod
+    def _leg_condition(dep_airport, arr_airport, departure_city: str, arrival_city: str, day_diff: int):
+        """单方向的城市对与21天掩码条件"""
+        return and_(
+            func.lower(dep_airport.city) == departure_city.lower(),
+            func.lower(arr_airport.city) == arrival_city.lower(),
+            func.substring(Flight.operating_days, day_diff + 1, 1) == '1'
+        )
+
+    def search_flights_query(self, db: Session, *, request: FlightSearchRequest) -> Optional[Query]:
+        """构建单程搜索查询（不执行），日期超出21天掩码范围时返回 None；供流式读取使用"""
+        day_diff = (request.departure_date - date.today()).days
+        if not (0 <= day_diff < 21):
+            return None
+
+        query, dep_airport, arr_airport = self._search_query(db, request=request)
+        query = query.filter(
+            self._leg_condition(dep_airport, arr_airport, request.departure_city, request.arrival_city, day_diff)
+        )
+
         # 按计划起飞时刻排序（离当前时间最近）
-        query = query.order_by(Flight.scheduled_departure_time.asc())
+        return query.order_by(Flight.scheduled_departure_time.asc())
 
+    def search_flights(self, db: Session, *, request: FlightSearchRequest) -> List[Dict[str, Any]]:
+        """基于地点与日期的航班搜索，忽略status，按21天掩码过滤并排序"""
+        query = self.search_flights_query(db, request=request)
+        if query is None:
+            return []
         return query.all()
-    
+
+    def search_round_trip(
+        self,
+        db: Session,
+        *,
+        request: FlightSearchRequest
+    ) -> Tuple[List[Any], List[Any]]:
+        """往返搜索：一条查询同时取回去程与返程航班，按出发城市拆分为 (去程, 返程)"""
+        today = date.today()
+        legs = []
+        out_diff = (request.departure_date - today).days
+        if 0 <= out_diff < 21:
+            legs.append((request.departure_city, request.arrival_city, out_diff))
+        ret_diff = (request.return_date - today).days
+        if 0 <= ret_diff < 21:
+            legs.append((request.arrival_city, request.departure_city, ret_diff))
+        if not legs:
+            return [], []
+
+        query, dep_airport, arr_airport = self._search_query(db, request=request)
+        query = query.filter(or_(*[
+            self._leg_condition(dep_airport, arr_airport, dep_city, arr_city, diff)
+            for dep_city, arr_city, diff in legs
+        ])).order_by(Flight.scheduled_departure_time.asc())
+
+        outbound, inbound = [], []
+        departure_city = request.departure_city.lower()
+        for row in query.all():
+            if row.dep_city.lower() == departure_city:
+                outbound.append(row)
+            else:
+                inbound.append(row)
+        return outbound, inbound
+
+    def get_city_pair_flights(
+        self,
+        db: Session,
+        *,
+        departure_city: str,
+        arrival_city: str,
+        cabin_class: CabinClass
+    ) -> List[Any]:
+        """城市对之间的全部直飞航班及指定舱位基础价格（不按日期过滤，附带运营掩码）"""
+        dep_airport = aliased(Airport, name='dep_airport')
+        arr_airport = aliased(Airport, name='arr_airport')
+        return db.query(
+            Flight.flight_id,
+            Flight.operating_days,
+            Flight.economy_seats,
+            Flight.business_seats,
+            Flight.first_seats,
+            FlightPricing.base_price
+        ).join(
+            Route, Flight.route_id == Route.route_id
+        ).join(
+            dep_airport, Route.departure_airport_code == dep_airport.airport_code
+        ).join(
+            arr_airport, Route.arrival_airport_code == arr_airport.airport_code
+        ).join(
+            Airline, Flight.airline_code == Airline.airline_code
+        ).join(
+            FlightPricing, FlightPricing.flight_id == Flight.flight_id
+        ).filter(
+            func.lower(dep_airport.city) == departure_city.lower(),
+            func.lower(arr_airport.city) == arrival_city.lower(),
+            FlightPricing.cabin_class == cabin_class.value
+        ).all()
+
     # 废弃旧函数：合并到新的 search_flights 中
     
     def get_available_seats(
@@ -112,37 +198,15 @@ class CRUDFlight(CRUDBase[Flight, FlightCreate, FlightUpdate]):
         flight_date: date,
         cabin_class: CabinClass
     ) -> int:
-        """获取指定航班与舱位的可用座位数（扣除未过期的pending与已支付订单项）"""
+        """获取指定航班、日期与舱位的可用座位数（读取座位库存，无库存行时即为舱位总座位数）"""
+        inventory = flight_inventory.get(db, id=(flight_id, flight_date, cabin_class.value))
+        if inventory:
+            return inventory.available_seats
+
         flight = db.query(Flight).filter(Flight.flight_id == flight_id).first()
         if not flight:
             return 0
-
-        # 总座位数
-        if cabin_class == CabinClass.ECONOMY:
-            total_seats = flight.economy_seats
-        elif cabin_class == CabinClass.BUSINESS:
-            total_seats = flight.business_seats
-        elif cabin_class == CabinClass.FIRST:
-            total_seats = flight.first_seats
-        else:
-            total_seats = 0
-
-        # 已占用座位：订单项关联该航班、该舱位、该日期，订单状态为pending或paid，且未过期
-        now = datetime.utcnow()
-        occupied = db.query(func.count(OrderItem.item_id)).join(Order, OrderItem.order_id == Order.order_id).filter(
-            OrderItem.flight_id == flight_id,
-            OrderItem.cabin_class == cabin_class.value,
-            or_(
-                Order.status == OrderStatus.PENDING,
-                Order.status == OrderStatus.PAID,
-            ),
-            or_(
-                Order.expired_at.is_(None),
-                Order.expired_at > now
-            )
-        ).scalar() or 0
-
-        return max(total_seats - occupied, 0)
+        return cabin_capacity(flight, cabin_class.value)
     
     def get_flights_with_pricing(
         self,
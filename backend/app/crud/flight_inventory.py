@@ -0,0 +1,268 @@
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import date, datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, case, tuple_
+from app.crud.base import CRUDBase, insert_skip_duplicates
+from app.models.flight import Flight
+from app.models.flight_inventory import FlightInventory
+from app.models.flight_pricing import CabinClass
+from app.models.order import Order, OrderItem, OrderStatus
+
+# (flight_id, flight_date, cabin_class)
+InventoryKey = Tuple[int, date, str]
+
+
+class SeatsUnavailableError(Exception):
+    """库存不足，无法占用所需座位"""
+    def __init__(self, key: InventoryKey, available: int, requested: int):
+        self.key = key
+        self.available = available
+        self.requested = requested
+        super().__init__(f"航班 {key[0]} 的 {key[2]} 座位不足（可用 {available}，需求 {requested}）")
+
+
+def cabin_capacity(flight: Flight, cabin_class: str) -> int:
+    """航班指定舱位的总座位数"""
+    cabin = CabinClass(cabin_class)
+    if cabin == CabinClass.ECONOMY:
+        return flight.economy_seats or 0
+    elif cabin == CabinClass.BUSINESS:
+        return flight.business_seats or 0
+    return flight.first_seats or 0
+
+
+def count_items(items: Iterable[OrderItem]) -> Dict[InventoryKey, int]:
+    """按 (flight_id, flight_date, cabin_class) 汇总订单项数量，忽略未记录乘机日期的历史订单项"""
+    counts: Dict[InventoryKey, int] = {}
+    for it in items:
+        if it.flight_date is None:
+            continue
+        key = (it.flight_id, it.flight_date, str(it.cabin_class))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+class CRUDFlightInventory(CRUDBase[FlightInventory, dict, dict]):
+    """航班座位库存CRUD操作"""
+    def get(self, db: Session, id: InventoryKey) -> Optional[FlightInventory]:
+        """根据主键 (flight_id, flight_date, cabin_class) 获取库存行"""
+        flight_id, flight_date, cabin_class = id
+        return db.query(FlightInventory).filter(
+            FlightInventory.flight_id == flight_id,
+            FlightInventory.flight_date == flight_date,
+            FlightInventory.cabin_class == cabin_class,
+        ).first()
+
+    def get_many(self, db: Session, *, keys: Iterable[InventoryKey]) -> Dict[InventoryKey, FlightInventory]:
+        """一次查询获取多个库存行，缺失的键不出现在结果中"""
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        rows = db.query(FlightInventory).filter(
+            tuple_(FlightInventory.flight_id, FlightInventory.flight_date, FlightInventory.cabin_class).in_(keys)
+        ).all()
+        return {(r.flight_id, r.flight_date, str(r.cabin_class)): r for r in rows}
+
+    def get_range(
+        self,
+        db: Session,
+        *,
+        flight_ids: Iterable[int],
+        cabin_class: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[InventoryKey, FlightInventory]:
+        """一次查询获取多个航班在日期区间（含两端）内指定舱位的库存行"""
+        flight_ids = list(set(flight_ids))
+        if not flight_ids:
+            return {}
+        rows = db.query(FlightInventory).filter(
+            FlightInventory.flight_id.in_(flight_ids),
+            FlightInventory.cabin_class == cabin_class,
+            FlightInventory.flight_date >= start_date,
+            FlightInventory.flight_date <= end_date,
+        ).all()
+        return {(r.flight_id, r.flight_date, str(r.cabin_class)): r for r in rows}
+
+    def ensure_rows(self, db: Session, *, keys: Iterable[InventoryKey]) -> None:
+        """
+        确保库存行存在，缺失时按航班座位数初始化（held/sold 为 0），不提交事务。
+        在调用方事务内执行，不另取连接（请求已占用一个连接时再从连接池取第二个，并发高时会互相等待耗尽连接池）。
+        有缺失时以单条 INSERT ... ON DUPLICATE KEY UPDATE 按键序写入全部键：已存在的行不修改、只加排他锁，
+        加锁顺序与随后的条件更新、lock_many 一致；不使用 INSERT IGNORE，避免重复键上的共享锁升级为排他锁时死锁
+        """
+        keys = sorted(set(keys))
+        existing = self.get_many(db, keys=keys)
+        if all(k in existing for k in keys):
+            return
+        flights = {
+            f.flight_id: f
+            for f in db.query(Flight).filter(Flight.flight_id.in_({k[0] for k in keys})).all()
+        }
+        rows = [
+            {
+                "flight_id": key[0],
+                "flight_date": key[1],
+                "cabin_class": key[2],
+                "capacity": cabin_capacity(flights[key[0]], key[2]),
+                "held": 0,
+                "sold": 0,
+            }
+            for key in keys
+            if key[0] in flights
+        ]
+        if rows:
+            db.execute(insert_skip_duplicates(db, FlightInventory).values(rows))
+
+    def _increment(self, db: Session, key: InventoryKey, *, held: int = 0, sold: int = 0) -> int:
+        """原子增减 held/sold 计数"""
+        values = {}
+        if held:
+            values[FlightInventory.held] = FlightInventory.held + held
+        if sold:
+            values[FlightInventory.sold] = FlightInventory.sold + sold
+        if not values:
+            return 0
+        return db.query(FlightInventory).filter(
+            FlightInventory.flight_id == key[0],
+            FlightInventory.flight_date == key[1],
+            FlightInventory.cabin_class == key[2],
+        ).update(values, synchronize_session=False)
+
+    def reserve(self, db: Session, *, counts: Dict[InventoryKey, int]) -> None:
+        """
+        下单：原子占用待支付座位。
+        对每个键执行条件更新 held = held + n WHERE capacity - held - sold >= n，
+        按 (flight_id, flight_date, cabin_class) 排序加锁，多舱位/多航班订单之间不会死锁；
+        任一键座位不足时抛出 SeatsUnavailableError，调用方回滚事务即可释放已占用的座位
+        """
+        self.ensure_rows(db, keys=counts.keys())
+        for key in sorted(counts):
+            n = counts[key]
+            updated = db.query(FlightInventory).filter(
+                FlightInventory.flight_id == key[0],
+                FlightInventory.flight_date == key[1],
+                FlightInventory.cabin_class == key[2],
+                FlightInventory.capacity - FlightInventory.held - FlightInventory.sold >= n,
+            ).update({FlightInventory.held: FlightInventory.held + n}, synchronize_session=False)
+            if not updated:
+                row = self.get(db, id=key)
+                raise SeatsUnavailableError(key, row.available_seats if row else 0, n)
+
+    def confirm(self, db: Session, *, counts: Dict[InventoryKey, int]) -> None:
+        """支付：待支付座位转为已售"""
+        for key, n in counts.items():
+            self._increment(db, key, held=-n, sold=n)
+
+    def release(self, db: Session, *, counts: Dict[InventoryKey, int], sold: bool = False) -> None:
+        """取消/过期：释放待支付（或已售）座位"""
+        for key, n in counts.items():
+            if sold:
+                self._increment(db, key, sold=-n)
+            else:
+                self._increment(db, key, held=-n)
+
+    def lock_many(self, db: Session, *, keys: Iterable[InventoryKey]) -> Dict[InventoryKey, FlightInventory]:
+        """按 (flight_id, flight_date, cabin_class) 排序一次锁定多个库存行（SELECT ... FOR UPDATE）"""
+        keys = sorted(set(keys))
+        if not keys:
+            return {}
+        rows = db.query(FlightInventory).filter(
+            tuple_(FlightInventory.flight_id, FlightInventory.flight_date, FlightInventory.cabin_class).in_(keys)
+        ).order_by(
+            FlightInventory.flight_id, FlightInventory.flight_date, FlightInventory.cabin_class
+        ).with_for_update().all()
+        return {(r.flight_id, r.flight_date, str(r.cabin_class)): r for r in rows}
+
+    def _adjust_held_many(self, db: Session, counts: Dict[InventoryKey, int], sign: int) -> int:
+        """单条 UPDATE 按键以 CASE 增减各自的 held 数量，返回更新的库存行数"""
+        if not counts:
+            return 0
+        key_columns = (FlightInventory.flight_id, FlightInventory.flight_date, FlightInventory.cabin_class)
+        delta = case(
+            *[
+                (and_(key_columns[0] == key[0], key_columns[1] == key[1], key_columns[2] == key[2]), n)
+                for key, n in sorted(counts.items())
+            ],
+            else_=0,
+        )
+        return db.query(FlightInventory).filter(
+            tuple_(*key_columns).in_(list(counts))
+        ).update({FlightInventory.held: FlightInventory.held + sign * delta}, synchronize_session=False)
+
+    def hold_many(self, db: Session, *, counts: Dict[InventoryKey, int]) -> int:
+        """批量占用待支付座位（调用方须已通过 lock_many 锁定并校验余量）"""
+        return self._adjust_held_many(db, counts, 1)
+
+    def release_held_many(self, db: Session, *, counts: Dict[InventoryKey, int]) -> int:
+        """批量释放待支付座位：单条 UPDATE，按键以 CASE 扣减各自的数量，返回更新的库存行数"""
+        return self._adjust_held_many(db, counts, -1)
+
+    def rebuild(self, db: Session, *, flight_id: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """
+        对账：按订单项重新计算库存（held=未过期待支付，sold=已支付/已完成），返回写入的库存行数
+        """
+        now = now or datetime.utcnow()
+        held_expr = func.sum(case(
+            (and_(
+                Order.status == OrderStatus.PENDING,
+                or_(Order.expired_at.is_(None), Order.expired_at > now),
+            ), 1),
+            else_=0,
+        ))
+        sold_expr = func.sum(case(
+            (Order.status.in_([OrderStatus.PAID, OrderStatus.COMPLETED]), 1),
+            else_=0,
+        ))
+        query = db.query(
+            OrderItem.flight_id,
+            OrderItem.flight_date,
+            OrderItem.cabin_class,
+            held_expr,
+            sold_expr,
+        ).join(Order, OrderItem.order_id == Order.order_id).filter(OrderItem.flight_date.isnot(None))
+        inventory_query = db.query(FlightInventory)
+        flight_query = db.query(Flight)
+        if flight_id is not None:
+            query = query.filter(OrderItem.flight_id == flight_id)
+            inventory_query = inventory_query.filter(FlightInventory.flight_id == flight_id)
+            flight_query = flight_query.filter(Flight.flight_id == flight_id)
+
+        computed = {
+            (fid, fdate, str(cabin)): (int(held or 0), int(sold or 0))
+            for fid, fdate, cabin, held, sold in query.group_by(
+                OrderItem.flight_id, OrderItem.flight_date, OrderItem.cabin_class
+            ).all()
+        }
+        flights = {f.flight_id: f for f in flight_query.all()}
+
+        touched = 0
+        for row in inventory_query.all():
+            key = (row.flight_id, row.flight_date, str(row.cabin_class))
+            held, sold = computed.pop(key, (0, 0))
+            flight = flights.get(row.flight_id)
+            if flight:
+                row.capacity = cabin_capacity(flight, key[2])
+            row.held = held
+            row.sold = sold
+            touched += 1
+
+        for (fid, fdate, cabin), (held, sold) in computed.items():
+            flight = flights.get(fid)
+            if not flight:
+                continue
+            db.add(FlightInventory(
+                flight_id=fid,
+                flight_date=fdate,
+                cabin_class=cabin,
+                capacity=cabin_capacity(flight, cabin),
+                held=held,
+                sold=sold,
+            ))
+            touched += 1
+
+        db.commit()
+        return touched
+
+
+flight_inventory = CRUDFlightInventory(FlightInventory)
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
 from app.models.flight_pricing import FlightPricing
@@ -9,5 +10,18 @@ class CRUDFlightPricing(CRUDBase[FlightPricing, FlightPricingCreate, FlightPrici
     def get_by_flight(self, db: Session, *, flight_id: int) -> List[FlightPricing]:
         return db.query(FlightPricing).filter(FlightPricing.flight_id == flight_id).all()
 
+    def get_base_prices(self, db: Session, *, flight_ids: Iterable[int]) -> Dict[Tuple[int, str], Decimal]:
+        """一次查询获取多个航班各舱位的基础价格：(flight_id, cabin_class) -> base_price"""
+        flight_ids = list(set(flight_ids))
+        if not flight_ids:
+            return {}
+        rows = db.query(FlightPricing.flight_id, FlightPricing.cabin_class, FlightPricing.base_price).filter(
+            FlightPricing.flight_id.in_(flight_ids)
+        ).all()
+        return {
+            (fid, cabin.value if hasattr(cabin, "value") else str(cabin)): Decimal(price)
+            for fid, cabin, price in rows
+        }
+
 
 flight_pricing = CRUDFlightPricing(FlightPricing)
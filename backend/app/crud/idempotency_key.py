@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase, insert_ignore
+from app.models.idempotency_key import IdempotencyKey
+
+
+class CRUDIdempotencyKey(CRUDBase[IdempotencyKey, dict, dict]):
+    """幂等键CRUD操作（各写操作自行提交，与业务事务相互独立）"""
+    def get_by_key(self, db: Session, *, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        """按主键 (user_id, idempotency_key) 查找"""
+        return db.get(IdempotencyKey, (user_id, key), populate_existing=True)
+
+    def reserve(self, db: Session, *, user_id: int, key: str, request_hash: str,
+                now: datetime, expires_at: datetime) -> bool:
+        """占用幂等键（状态为处理中）；已被其他请求占用时返回 False"""
+        result = db.execute(insert_ignore(IdempotencyKey).values(
+            user_id=user_id, idempotency_key=key, request_hash=request_hash,
+            created_at=now, expires_at=expires_at,
+        ))
+        db.commit()
+        return result.rowcount == 1
+
+    def mark_committed(self, db: Session, *, user_id: int, key: str, created_at: datetime) -> bool:
+        """
+        在业务事务内标记请求已提交（写入状态码，响应体稍后保存），不提交事务。
+        仅当幂等键仍由本请求占用（created_at 一致且仍在处理中）时生效，被超时接管时返回 False
+        """
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.idempotency_key == key,
+            IdempotencyKey.created_at == created_at,
+            IdempotencyKey.status_code.is_(None),
+        ).update({"status_code": 200}, synchronize_session=False) == 1
+
+    def complete(self, db: Session, *, user_id: int, key: str, status_code: int, response_body: str) -> None:
+        """保存首次请求的响应"""
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key
+        ).update({"status_code": status_code, "response_body": response_body}, synchronize_session=False)
+        db.commit()
+
+    def release(self, db: Session, *, user_id: int, key: str, created_at: Optional[datetime] = None) -> None:
+        """删除幂等键（请求失败或记录已过期），允许使用同一键重试；指定 created_at 时只删除本请求的占用"""
+        query = db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key
+        )
+        if created_at is not None:
+            query = query.filter(IdempotencyKey.created_at == created_at, IdempotencyKey.status_code.is_(None))
+        query.delete(synchronize_session=False)
+        db.commit()
+
+    def purge_expired(self, db: Session, *, now: Optional[datetime] = None, batch_size: int = 1000) -> int:
+        """分批删除已过期的幂等键，返回删除条数"""
+        now = now or datetime.utcnow()
+        purged = 0
+        while True:
+            keys = db.query(IdempotencyKey.user_id, IdempotencyKey.idempotency_key).filter(
+                IdempotencyKey.expires_at <= now
+            ).order_by(IdempotencyKey.expires_at).limit(batch_size).all()
+            if not keys:
+                break
+            db.query(IdempotencyKey).filter(
+                tuple_(IdempotencyKey.user_id, IdempotencyKey.idempotency_key).in_([tuple(k) for k in keys])
+            ).delete(synchronize_session=False)
+            db.commit()
+            purged += len(keys)
+            if len(keys) < batch_size:
+                break
+        return purged
+
+
+idempotency_key = CRUDIdempotencyKey(IdempotencyKey)
@@ -1,13 +1,30 @@
-from typing import List, Optional
-from datetime import datetime, date
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
-from app.crud.base import CRUDBase
-from app.models.order import Order, OrderItem, OrderStatus, PaymentStatus, CheckInStatus, TicketStatus
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, date, time, timedelta
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import Select, and_, or_, func, case, select
+from app.core.config import settings
+from app.crud.base import CRUDBase, paginate_keyset
+from app.crud.flight_inventory import flight_inventory, count_items
+from app.crud.seat_map import seat_map
+from app.services.order_events import order_changed
+from app.services.reference_cache import reference_cache
+from app.models.order import Order, OrderItem, OrderStatus, PaymentStatus, CheckInStatus, TicketStatus, CancelReason
 from app.schemas.order import OrderCreate, OrderUpdate
 from app.models.flight import Flight
 from app.models.route import Route
 from app.models.airport import Airport
+from app.models.passenger import Passenger
+from app.models.user import User
+
+# 订单详情加载策略（见 settings.ORDER_LOAD_STRATEGY）
+ORDER_LOAD_JOINED = "joined"
+ORDER_LOAD_SELECTIN = "selectin"
+ORDER_LOAD_CACHED = "cached"
+
+
+class OrderStateError(Exception):
+    """订单状态已被其他请求或过期回收改变，本次状态变更未执行"""
 
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
@@ -32,33 +49,100 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         """根据支付状态获取订单列表"""
         return db.query(Order).filter(Order.payment_status == payment_status).all()
     
-    def get_with_items(self, db: Session, order_id: int) -> Optional[Order]:
-        """获取包含订单项的订单"""
-        from app.models.flight import Flight
-        from app.models.route import Route
-        from app.models.airport import Airport
-        return db.query(Order).options(
-            joinedload(Order.items).joinedload(OrderItem.passenger),
-            joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.route).joinedload(Route.departure_airport),
-            joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.route).joinedload(Route.arrival_airport),
-            joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.airline),
-        ).filter(Order.order_id == order_id).first()
+    def _graph_options(self, strategy: str) -> list:
+        """订单 -> 订单项 -> 乘客/航班 -> 航线/机场/航司 的加载选项"""
+        if strategy == ORDER_LOAD_JOINED:
+            return [
+                joinedload(Order.items).joinedload(OrderItem.passenger),
+                joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.route).joinedload(Route.departure_airport),
+                joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.route).joinedload(Route.arrival_airport),
+                joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.airline),
+            ]
+        items = selectinload(Order.items)
+        options = [
+            items.selectinload(OrderItem.passenger),
+            items.selectinload(OrderItem.flight),
+        ]
+        if strategy == ORDER_LOAD_SELECTIN:
+            # 每一层关系各一条 IN 查询，不产生笛卡尔积
+            route = items.selectinload(OrderItem.flight).selectinload(Flight.route)
+            options += [
+                route.selectinload(Route.departure_airport),
+                route.selectinload(Route.arrival_airport),
+                items.selectinload(OrderItem.flight).selectinload(Flight.airline),
+            ]
+        return options
+
+    def _load_orders(self, db: Session, query, strategy: Optional[str]):
+        """返回 (加载后的查询, 取回订单后的回调)"""
+        strategy = strategy or settings.ORDER_LOAD_STRATEGY
+        query = query.options(*self._graph_options(strategy))
+        if strategy != ORDER_LOAD_CACHED:
+            return query, lambda orders: orders
+
+        def attach(orders):
+            # 从引用缓存挂接航线（含机场）与航司；缓存中没有的（新增航线）保留惰性加载
+            refs = reference_cache.get(db)
+            for order in orders:
+                for item in order.items:
+                    flight = item.flight
+                    if flight is None:
+                        continue
+                    route = refs.routes.get(flight.route_id)
+                    if route is not None:
+                        set_committed_value(flight, "route", route)
+                    airline = refs.airlines.get(flight.airline_code)
+                    if airline is not None:
+                        set_committed_value(flight, "airline", airline)
+            return orders
+        return query, attach
+
+    def get_with_items(self, db: Session, order_id: int, strategy: Optional[str] = None) -> Optional[Order]:
+        """获取包含订单项的订单（加载策略默认取 ORDER_LOAD_STRATEGY 配置）"""
+        query, attach = self._load_orders(db, db.query(Order).filter(Order.order_id == order_id), strategy)
+        order = query.first()
+        if order is not None:
+            attach([order])
+        return order
     
     def get_user_orders_with_items(
         self, 
         db: Session, 
         *, 
         user_id: int,
+        status: Optional[OrderStatus] = None,
+        payment_status: Optional[PaymentStatus] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        cursor: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Order]:
-        """获取用户的订单列表（包含订单项）"""
-        return db.query(Order).options(
-            joinedload(Order.items).joinedload(OrderItem.passenger),
-            joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.route).joinedload(Route.departure_airport),
-            joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.route).joinedload(Route.arrival_airport),
-            joinedload(Order.items).joinedload(OrderItem.flight).joinedload(Flight.airline),
-        ).filter(Order.user_id == user_id).offset(skip).limit(limit).all()
+        limit: int = 100,
+        strategy: Optional[str] = None
+    ) -> Tuple[List[Order], Optional[str]]:
+        """
+        获取用户的订单列表（包含订单项），过滤条件在 SQL 中执行（走 idx_user_status_created 索引），
+        按创建时间倒序键集分页，返回 (本页订单, 下一页游标)。skip 仅为兼容旧调用方，在未提供游标时生效
+        """
+        query = db.query(Order).filter(Order.user_id == user_id)
+        if status is not None:
+            query = query.filter(Order.status == status)
+        if payment_status is not None:
+            query = query.filter(Order.payment_status == payment_status)
+        # 日期条件改写为 created_at 的半开区间，避免对列套函数导致索引失效
+        if start_date is not None:
+            query = query.filter(Order.created_at >= datetime.combine(start_date, time.min))
+        if end_date is not None:
+            query = query.filter(Order.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        query, attach = self._load_orders(db, query, strategy)
+        orders, next_cursor = paginate_keyset(
+            query,
+            key_columns=[Order.created_at, Order.order_id],
+            cursor=cursor,
+            limit=limit,
+            descending=True,
+            skip=skip,
+        )
+        return attach(orders), next_cursor
     
     def get_orders_by_date_range(
         self,
@@ -79,58 +163,336 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         
         return query.all()
     
-    def get_pending_payment_orders(self, db: Session) -> List[Order]:
-        """获取待支付订单"""
-        return db.query(Order).filter(
-            Order.payment_status == PaymentStatus.UNPAID,
-            Order.status == OrderStatus.PENDING
-        ).all()
-    
-    def get_expired_orders(self, db: Session, *, expire_minutes: int = 30) -> List[Order]:
-        """获取过期未支付订单"""
-        from datetime import timedelta
-        expire_time = datetime.utcnow() - timedelta(minutes=expire_minutes)
-        
-        return db.query(Order).filter(
+    def _unpaid_query(self, db: Session, *, expired: bool, user_id: Optional[int] = None,
+                      now: Optional[datetime] = None, expire_minutes: int = 30):
+        """
+        待支付订单（expired=False）或超时未支付订单（expired=True）。
+        超时订单由回收线程在一个轮询周期内取消并记录 cancel_reason=expired，因此包括这些已取消订单，
+        以及尚未被回收的过期待支付订单；未记录 expired_at 的历史订单按创建时间推算
+        """
+        now = now or datetime.utcnow()
+        legacy_deadline = now - timedelta(minutes=expire_minutes)
+        if expired:
+            condition = or_(
+                and_(Order.status == OrderStatus.CANCELLED, Order.cancel_reason == CancelReason.EXPIRED),
+                and_(Order.status == OrderStatus.PENDING, or_(
+                    Order.expired_at <= now,
+                    and_(Order.expired_at.is_(None), Order.created_at < legacy_deadline),
+                )),
+            )
+        else:
+            condition = and_(Order.status == OrderStatus.PENDING, or_(
+                Order.expired_at > now,
+                and_(Order.expired_at.is_(None), Order.created_at >= legacy_deadline),
+            ))
+        query = db.query(Order).filter(
             Order.payment_status == PaymentStatus.UNPAID,
-            Order.status == OrderStatus.PENDING,
-            Order.created_at < expire_time
-        ).all()
+            condition,
+        )
+        if user_id is not None:
+            query = query.filter(Order.user_id == user_id)
+        return query
+
+    def _unpaid_page(self, db: Session, *, expired: bool, user_id: Optional[int], cursor: Optional[str],
+                     limit: int, strategy: Optional[str]) -> Tuple[List[Order], Optional[str]]:
+        query, attach = self._load_orders(db, self._unpaid_query(db, expired=expired, user_id=user_id), strategy)
+        orders, next_cursor = paginate_keyset(
+            query,
+            key_columns=[Order.created_at, Order.order_id],
+            cursor=cursor,
+            limit=limit,
+            descending=True,
+        )
+        return attach(orders), next_cursor
+
+    def get_pending_payment_orders(
+        self,
+        db: Session,
+        *,
+        user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        strategy: Optional[str] = None
+    ) -> Tuple[List[Order], Optional[str]]:
+        """获取待支付订单（含订单项、乘客、航班），按创建时间倒序键集分页，查询数与页大小无关"""
+        return self._unpaid_page(
+            db, expired=False, user_id=user_id, cursor=cursor, limit=limit, strategy=strategy
+        )
+
+    def get_expired_orders(
+        self,
+        db: Session,
+        *,
+        user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        strategy: Optional[str] = None
+    ) -> Tuple[List[Order], Optional[str]]:
+        """获取过期未支付订单（含订单项、乘客、航班），按创建时间倒序键集分页，查询数与页大小无关"""
+        return self._unpaid_page(
+            db, expired=True, user_id=user_id, cursor=cursor, limit=limit, strategy=strategy
+        )
+
+    def iter_unpaid_orders(
+        self,
+        db: Session,
+        *,
+        expired: bool,
+        user_id: Optional[int] = None,
+        batch_size: int = 500
+    ) -> Iterator[Order]:
+        """逐页遍历待支付/过期订单，每页固定查询数，供流式导出使用"""
+        cursor = None
+        while True:
+            orders, cursor = self._unpaid_page(
+                db, expired=expired, user_id=user_id, cursor=cursor, limit=batch_size, strategy=None
+            )
+            yield from orders
+            if cursor is None:
+                return
+            # 已输出的页不再需要，释放会话中的对象
+            db.expunge_all()
     
+    def export_query(
+        self,
+        *,
+        user_id: Optional[int] = None,
+        agency_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Select:
+        """
+        订单导出的扁平投影：每个订单项一行，联接订单、乘客、航班与航线，只取导出所需的列。
+        按 (order_id, item_id) 排序，可直接用服务端游标流式读取
+        """
+        stmt = select(
+            Order.order_no,
+            Order.created_at,
+            Order.status,
+            Order.payment_status,
+            Order.paid_at,
+            Order.total_amount,
+            Order.currency,
+            OrderItem.item_id,
+            OrderItem.flight_date,
+            Flight.flight_number,
+            Flight.airline_code,
+            Route.departure_airport_code,
+            Route.arrival_airport_code,
+            Flight.scheduled_departure_time,
+            OrderItem.cabin_class,
+            Passenger.name.label("passenger_name"),
+            Passenger.id_card.label("passenger_id_card"),
+            OrderItem.original_price,
+            OrderItem.paid_price,
+            OrderItem.ticket_status,
+            OrderItem.check_in_status,
+            OrderItem.seat_number,
+        ).select_from(OrderItem).join(
+            Order, Order.order_id == OrderItem.order_id
+        ).join(
+            Passenger, Passenger.passenger_id == OrderItem.passenger_id
+        ).join(
+            Flight, Flight.flight_id == OrderItem.flight_id
+        ).outerjoin(
+            Route, Route.route_id == Flight.route_id
+        )
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        if agency_id is not None:
+            stmt = stmt.where(Order.user_id.in_(select(User.id).where(User.agency_id == agency_id)))
+        if start_date:
+            stmt = stmt.where(Order.created_at >= datetime.combine(start_date, time.min))
+        if end_date:
+            stmt = stmt.where(Order.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        return stmt.order_by(Order.order_id, OrderItem.item_id)
+
     def update_payment_status(
         self,
         db: Session,
         *,
         order_id: int,
         payment_status: PaymentStatus,
-        payment_time: Optional[datetime] = None
+        payment_time: Optional[datetime] = None,
+        now: Optional[datetime] = None
     ) -> Optional[Order]:
-        """更新订单支付状态"""
+        """
+        更新订单支付状态。
+        支付（PAID）以条件 UPDATE 完成：仅未过期的待支付订单生效，与过期回收、取消互斥，
+        只有状态确实由待支付变为已支付时才把待支付座位转为已售；条件不满足时抛出 OrderStateError
+        """
+        now = now or datetime.utcnow()
+        values = {Order.payment_status: payment_status}
+        if payment_time:
+            values[Order.paid_at] = payment_time
+        query = db.query(Order).filter(Order.order_id == order_id)
+        if payment_status == PaymentStatus.PAID:
+            values[Order.status] = OrderStatus.PAID
+            query = query.filter(
+                Order.status == OrderStatus.PENDING,
+                or_(Order.expired_at.is_(None), Order.expired_at > now),
+            )
+        if query.update(values, synchronize_session=False) != 1:
+            db.rollback()
+            if payment_status == PaymentStatus.PAID and self.get(db, id=order_id) is not None:
+                raise OrderStateError("订单已取消、已过期或已支付，无法支付")
+            return None
+        items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+        if payment_status == PaymentStatus.PAID:
+            # 待支付座位转为已售
+            flight_inventory.confirm(db, counts=count_items(items))
+        db.commit()
         order = self.get(db, id=order_id)
-        if order:
-            order.payment_status = payment_status
-            if payment_time:
-                order.paid_at = payment_time
-            if payment_status == PaymentStatus.PAID:
-                order.status = OrderStatus.PAID
-            db.add(order)
-            db.commit()
-            db.refresh(order)
+        order_changed(flight_ids=[item.flight_id for item in items], user_ids=[order.user_id])
         return order
     
     def cancel_order(self, db: Session, *, order_id: int) -> Optional[Order]:
-        """取消订单"""
-        order = self.get(db, id=order_id)
-        if order and order.status in [OrderStatus.PENDING, OrderStatus.PAID]:
-            order.status = OrderStatus.CANCELLED
-            # 同时取消所有订单项
-            for item in order.items:
-                item.ticket_status = TicketStatus.CANCELLED
-            db.add(order)
-            db.commit()
-            db.refresh(order)
+        """
+        取消订单：锁定订单行后按当前状态释放库存（待支付释放 held，已支付释放 sold）
+        并在同一事务中释放座位图上的座位；已被取消（如过期回收）或不可取消时抛出 OrderStateError
+        """
+        order = db.query(Order).filter(Order.order_id == order_id).populate_existing().with_for_update().first()
+        if not order:
+            db.rollback()
+            return None
+        if order.status not in (OrderStatus.PENDING, OrderStatus.PAID):
+            db.rollback()
+            raise OrderStateError("订单状态无法取消")
+        flight_inventory.release(
+            db,
+            counts=count_items(order.items),
+            sold=order.status == OrderStatus.PAID
+        )
+        seat_map.release_many(
+            db, seats=[(item.flight_id, item.flight_date, item.seat_number) for item in order.items]
+        )
+        order.status = OrderStatus.CANCELLED
+        order.cancel_reason = CancelReason.USER
+        # 同时取消所有订单项
+        for item in order.items:
+            item.ticket_status = TicketStatus.CANCELLED
+            item.seat_number = None
+        db.add(order)
+        db.commit()
+        db.refresh(order)
+        order_changed(flight_ids=[item.flight_id for item in order.items], user_ids=[order.user_id])
         return order
 
+    def get_user_stats(self, db: Session, *, user_id: int, now: Optional[datetime] = None) -> dict:
+        """一条条件聚合查询得到用户的订单总数、待支付、已支付、已完成、已取消数与累计消费"""
+        now = now or datetime.utcnow()
+
+        def count_if(*conditions):
+            return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+        row = db.query(
+            func.count(Order.order_id).label("total_orders"),
+            count_if(
+                Order.payment_status == PaymentStatus.UNPAID,
+                Order.status == OrderStatus.PENDING,
+                or_(Order.expired_at.is_(None), Order.expired_at > now),
+            ).label("unpaid_count"),
+            count_if(Order.payment_status == PaymentStatus.PAID).label("paid_count"),
+            count_if(Order.status == OrderStatus.COMPLETED).label("completed_count"),
+            count_if(Order.status == OrderStatus.CANCELLED).label("cancelled_count"),
+            func.coalesce(
+                func.sum(case((Order.payment_status == PaymentStatus.PAID, Order.total_amount), else_=0)), 0
+            ).label("total_spent"),
+        ).filter(Order.user_id == user_id).one()
+        return {
+            "total_orders": int(row.total_orders or 0),
+            "unpaid_count": int(row.unpaid_count),
+            "paid_count": int(row.paid_count),
+            "completed_count": int(row.completed_count),
+            "cancelled_count": int(row.cancelled_count),
+            "total_spent": float(row.total_spent),
+        }
+
+    def expire_overdue_batch(
+        self,
+        db: Session,
+        *,
+        now: Optional[datetime] = None,
+        batch_size: int = 500
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        取消一批已过 expired_at 仍未支付的订单并释放其占用的库存与已选座位，返回 (处理的订单数, 本批最早的过期时间)。
+        锁定选中的订单（MySQL 跳过已被锁定的行），订单状态、订单项票务状态、库存计数各用一条语句更新
+        """
+        now = now or datetime.utcnow()
+        rows = db.query(Order.order_id, Order.user_id, Order.expired_at).filter(
+            Order.payment_status == PaymentStatus.UNPAID,
+            Order.status == OrderStatus.PENDING,
+            Order.expired_at.isnot(None),
+            Order.expired_at <= now
+        ).order_by(Order.expired_at.asc()).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not rows:
+            db.rollback()
+            return 0, None
+        order_ids = [row.order_id for row in rows]
+
+        # 按 (航班, 日期, 舱位) 汇总要释放的座位，忽略未记录乘机日期的历史订单项
+        counts = {
+            (flight_id, flight_date, str(cabin)): int(n)
+            for flight_id, flight_date, cabin, n in db.query(
+                OrderItem.flight_id, OrderItem.flight_date, OrderItem.cabin_class, func.count(OrderItem.item_id)
+            ).filter(
+                OrderItem.order_id.in_(order_ids),
+                OrderItem.flight_date.isnot(None),
+            ).group_by(OrderItem.flight_id, OrderItem.flight_date, OrderItem.cabin_class).all()
+        }
+        flight_ids = {
+            flight_id for (flight_id,) in
+            db.query(OrderItem.flight_id).filter(OrderItem.order_id.in_(order_ids)).distinct().all()
+        }
+        seats = db.query(OrderItem.flight_id, OrderItem.flight_date, OrderItem.seat_number).filter(
+            OrderItem.order_id.in_(order_ids),
+            OrderItem.seat_number.isnot(None),
+        ).all()
+
+        db.query(Order).filter(
+            Order.order_id.in_(order_ids),
+            Order.status == OrderStatus.PENDING,
+        ).update(
+            {Order.status: OrderStatus.CANCELLED, Order.cancel_reason: CancelReason.EXPIRED},
+            synchronize_session=False,
+        )
+        seat_map.release_many(db, seats=seats)
+        db.query(OrderItem).filter(
+            OrderItem.order_id.in_(order_ids)
+        ).update(
+            {OrderItem.ticket_status: TicketStatus.CANCELLED, OrderItem.seat_number: None},
+            synchronize_session=False,
+        )
+        flight_inventory.release_held_many(db, counts=counts)
+        db.commit()
+
+        order_changed(flight_ids=flight_ids, user_ids={row.user_id for row in rows})
+        return len(rows), rows[0].expired_at
+
+    def expire_overdue_orders(
+        self,
+        db: Session,
+        *,
+        now: Optional[datetime] = None,
+        batch_size: int = 500
+    ) -> int:
+        """分批取消全部已过期未支付订单并释放座位，返回处理的订单数"""
+        now = now or datetime.utcnow()
+        total = 0
+        while True:
+            expired, _ = self.expire_overdue_batch(db, now=now, batch_size=batch_size)
+            total += expired
+            if expired < batch_size:
+                return total
+
+    def next_expiry(self, db: Session) -> Optional[datetime]:
+        """最早的待支付订单过期时间（无待支付订单时为 None）"""
+        return db.query(func.min(Order.expired_at)).filter(
+            Order.payment_status == PaymentStatus.UNPAID,
+            Order.status == OrderStatus.PENDING,
+        ).scalar()
+
 
 class CRUDOrderItem(CRUDBase[OrderItem, dict, dict]):
     """订单项CRUD操作"""
@@ -199,6 +561,26 @@ class CRUDOrderItem(CRUDBase[OrderItem, dict, dict]):
             db.refresh(item)
         return item
     
+    def mark_checked_in(self, db: Session, *, item_ids: List[int]) -> int:
+        """
+        单条 UPDATE 将尚未值机的订单项置为已值机，不提交事务；返回实际更新的条数，
+        少于给定条数说明其中有订单项已被并发请求值机
+        """
+        if not item_ids:
+            return 0
+        return db.query(OrderItem).filter(
+            OrderItem.item_id.in_(item_ids),
+            or_(OrderItem.check_in_status.is_(None), OrderItem.check_in_status != CheckInStatus.CHECKED),
+        ).update({OrderItem.check_in_status: CheckInStatus.CHECKED}, synchronize_session=False)
+
+    def set_seat_numbers(self, db: Session, *, seats: Dict[int, str]) -> int:
+        """单条 UPDATE 按订单项写入座位号（item_id -> seat_number），不提交事务"""
+        if not seats:
+            return 0
+        return db.query(OrderItem).filter(OrderItem.item_id.in_(list(seats))).update(
+            {OrderItem.seat_number: case(seats, value=OrderItem.item_id)}, synchronize_session=False
+        )
+    
     def update_ticket_status(
         self,
         db: Session,
@@ -206,9 +588,12 @@ class CRUDOrderItem(CRUDBase[OrderItem, dict, dict]):
         item_id: int,
         ticket_status: TicketStatus
     ) -> Optional[OrderItem]:
-        """更新票务状态"""
+        """更新票务状态；取消（退票）时在同一事务中释放座位图上的座位并清空座位号"""
         item = self.get(db, id=item_id)
         if item:
+            if TicketStatus(getattr(ticket_status, 'value', ticket_status)) == TicketStatus.CANCELLED and item.seat_number:
+                seat_map.release_many(db, seats=[(item.flight_id, item.flight_date, item.seat_number)])
+                item.seat_number = None
             item.ticket_status = ticket_status
             db.add(item)
             db.commit()
@@ -0,0 +1,66 @@
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase, insert_skip_duplicates
+from app.models.passenger import Passenger
+from app.schemas.passenger import PassengerCreate, PassengerUpdate
+
+# (id_card, name)，对应唯一索引 uk_passenger
+PassengerKey = Tuple[str, str]
+
+
+def identity_key(id_card: str, name: str) -> PassengerKey:
+    """
+    乘客身份的比较键：身份证号转大写，姓名去除重音并 casefold。
+    name 列使用大小写、重音不敏感的排序规则（ai_ci），SQL 认为相同的姓名在此得到相同的键
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    folded = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return id_card.upper(), folded
+
+
+class CRUDPassenger(CRUDBase[Passenger, PassengerCreate, PassengerUpdate]):
+    """乘客CRUD操作"""
+    def get(self, db: Session, id: int) -> Optional[Passenger]:
+        """根据主键passenger_id获取乘客"""
+        return db.query(Passenger).filter(Passenger.passenger_id == id).first()
+
+    def get_by_identity(self, db: Session, *, id_card: str, name: str) -> Optional[Passenger]:
+        """根据 (身份证号, 姓名) 获取乘客"""
+        return db.query(Passenger).filter(
+            Passenger.id_card == id_card.upper(), Passenger.name == name
+        ).first()
+
+    def get_many_by_identity(self, db: Session, *, keys: Iterable[PassengerKey]) -> Dict[PassengerKey, Passenger]:
+        """一次查询获取多个乘客，结果以 identity_key 为键（与请求姓名大小写不同也能对应），缺失的键不出现在结果中"""
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        rows = db.query(Passenger).filter(tuple_(Passenger.id_card, Passenger.name).in_(keys)).all()
+        return {identity_key(p.id_card, p.name): p for p in rows}
+
+    def get_or_create_many(self, db: Session, *, passengers: Iterable[PassengerCreate]) -> Dict[PassengerKey, Passenger]:
+        """
+        批量获取或创建乘客：一次 IN 查询已有乘客，缺失的以单条多行 INSERT 写入后再查一次。
+        返回以 identity_key 为键的映射，调用方用 identity_key(id_card, name) 取对应乘客。
+        已存在的乘客保留原资料；并发写入同一乘客时由唯一索引跳过重复行（ON DUPLICATE KEY UPDATE）
+        """
+        incoming: Dict[PassengerKey, PassengerCreate] = {}
+        for p in passengers:
+            incoming.setdefault(identity_key(p.id_card, p.name), p)
+        found = self.get_many_by_identity(db, keys=[(p.id_card.upper(), p.name) for p in incoming.values()])
+        missing: List[dict] = []
+        for key, p in incoming.items():
+            if key not in found:
+                row = p.model_dump()
+                row["id_card"] = key[0]
+                row["gender"] = p.gender.value if p.gender else None
+                missing.append(row)
+        if missing:
+            db.execute(insert_skip_duplicates(db, Passenger).values(missing))
+            found.update(self.get_many_by_identity(db, keys=[(r["id_card"], r["name"]) for r in missing]))
+        return found
+
+
+passenger = CRUDPassenger(Passenger)
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from typing import Dict, Optional
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase, insert_ignore
+from app.models.seat_hold import SeatHold
+
+
+class CRUDSeatHold(CRUDBase[SeatHold, dict, dict]):
+    """选座保留CRUD操作（各写操作自行提交，与业务事务相互独立）"""
+    def _query(self, db: Session, flight_id: int, flight_date: date):
+        return db.query(SeatHold).filter(SeatHold.flight_id == flight_id, SeatHold.flight_date == flight_date)
+
+    def hold(self, db: Session, *, flight_id: int, flight_date: date, seat_number: str,
+             order_item_id: int, now: datetime, expires_at: datetime) -> bool:
+        """
+        保留座位并释放该订单项在同一航班日的其他保留；已是自己的保留则续期。
+        新保留写入成功后才删除原保留，座位被其他订单项保留且未过期时回滚并返回 False（原保留不受影响）
+        """
+        self._query(db, flight_id, flight_date).filter(
+            SeatHold.seat_number == seat_number, SeatHold.expires_at <= now
+        ).delete(synchronize_session=False)
+        result = db.execute(insert_ignore(SeatHold).values(
+            flight_id=flight_id, flight_date=flight_date, seat_number=seat_number,
+            order_item_id=order_item_id, expires_at=expires_at,
+        ))
+        held = result.rowcount == 1
+        if not held:
+            held = self._query(db, flight_id, flight_date).filter(
+                SeatHold.seat_number == seat_number, SeatHold.order_item_id == order_item_id
+            ).update({SeatHold.expires_at: expires_at}, synchronize_session=False) == 1
+        if not held:
+            db.rollback()
+            return False
+        self._query(db, flight_id, flight_date).filter(
+            SeatHold.order_item_id == order_item_id, SeatHold.seat_number != seat_number
+        ).delete(synchronize_session=False)
+        db.commit()
+        return True
+
+    def release(self, db: Session, *, flight_id: int, flight_date: date, order_item_id: int,
+                seat_number: Optional[str] = None) -> int:
+        """释放订单项的保留（可限定座位），返回删除条数"""
+        query = self._query(db, flight_id, flight_date).filter(SeatHold.order_item_id == order_item_id)
+        if seat_number is not None:
+            query = query.filter(SeatHold.seat_number == seat_number)
+        released = query.delete(synchronize_session=False)
+        db.commit()
+        return released
+
+    def get_active(self, db: Session, *, flight_id: int, flight_date: date, now: datetime) -> Dict[str, int]:
+        """未过期的保留：座位号 -> 订单项ID"""
+        rows = self._query(db, flight_id, flight_date).filter(SeatHold.expires_at > now).with_entities(
+            SeatHold.seat_number, SeatHold.order_item_id
+        ).all()
+        return dict(rows)
+
+    def purge_expired(self, db: Session, *, now: Optional[datetime] = None, batch_size: int = 1000) -> int:
+        """分批删除已过期的保留，返回删除条数"""
+        now = now or datetime.utcnow()
+        purged = 0
+        while True:
+            keys = db.query(SeatHold.flight_id, SeatHold.flight_date, SeatHold.seat_number).filter(
+                SeatHold.expires_at <= now
+            ).order_by(SeatHold.expires_at).limit(batch_size).all()
+            if not keys:
+                break
+            db.query(SeatHold).filter(
+                tuple_(SeatHold.flight_id, SeatHold.flight_date, SeatHold.seat_number).in_([tuple(k) for k in keys]),
+                SeatHold.expires_at <= now,
+            ).delete(synchronize_session=False)
+            db.commit()
+            purged += len(keys)
+            if len(keys) < batch_size:
+                break
+        return purged
+
+
+seat_hold = CRUDSeatHold(SeatHold)
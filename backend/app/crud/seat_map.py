@@ -0,0 +1,170 @@
+from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase, insert_skip_duplicates
+from app.models.order import OrderItem, TicketStatus
+from app.models.seat_map import FlightSeatMap
+from app.services.seat_map import (
+    InvalidSeatError, SeatBitmap, SeatLayout, SeatUnavailableError, assign_seats, get_layout, layout_for_flight,
+)
+
+
+class CRUDSeatMap(CRUDBase[FlightSeatMap, dict, dict]):
+    """航班日座位图CRUD操作"""
+    def _query(self, db: Session, flight_id: int, flight_date: date):
+        return db.query(FlightSeatMap).filter(
+            FlightSeatMap.flight_id == flight_id, FlightSeatMap.flight_date == flight_date
+        )
+
+    def ensure(self, db: Session, *, flight_id: int, flight_date: date) -> None:
+        """
+        座位图不存在时按已有订单项的座位号初始化，不提交事务。
+        与库存行一样在调用方事务内写入、不另取连接；并发初始化由唯一键去重，只有一个生效
+        """
+        if self._query(db, flight_id, flight_date).with_entities(FlightSeatMap.version).first():
+            return
+        from app.models.flight import Flight
+        flight = db.get(Flight, flight_id)
+        layout = layout_for_flight(flight)
+        bitmap = SeatBitmap(layout.size)
+        seats = db.query(OrderItem.seat_number).filter(
+            OrderItem.flight_id == flight_id,
+            OrderItem.flight_date == flight_date,
+            OrderItem.seat_number.isnot(None),
+            or_(OrderItem.ticket_status.is_(None), OrderItem.ticket_status != TicketStatus.CANCELLED),
+        ).all()
+        for (seat_number,) in seats:
+            try:
+                bitmap.set(layout.index(seat_number))
+            except InvalidSeatError:
+                continue
+        db.execute(insert_skip_duplicates(db, FlightSeatMap).values(
+            flight_id=flight_id, flight_date=flight_date, layout_code=layout.code,
+            occupied=bitmap.to_bytes(), version=0,
+        ))
+
+    def get_bitmap(self, db: Session, *, flight_id: int, flight_date: date,
+                   for_update: bool = False) -> Tuple[FlightSeatMap, SeatLayout, SeatBitmap]:
+        """返回 (座位图行, 布局, 位图)；for_update 时锁定该行直到事务结束"""
+        self.ensure(db, flight_id=flight_id, flight_date=flight_date)
+        query = self._query(db, flight_id, flight_date).populate_existing()
+        if for_update:
+            query = query.with_for_update()
+        row = query.one()
+        layout = get_layout(row.layout_code)
+        return row, layout, SeatBitmap(layout.size, row.occupied)
+
+    def claim(
+        self,
+        db: Session,
+        *,
+        flight_id: int,
+        flight_date: date,
+        seat_number: str,
+        cabin_class: Optional[str] = None,
+        release_seat: Optional[str] = None
+    ) -> str:
+        """
+        原子占用座位（可同时释放原座位，用于换座）：锁定座位图行，校验并修改位图后写回，不提交事务。
+        座位不存在或与舱位不匹配时抛出 InvalidSeatError，已被占用时抛出 SeatUnavailableError；返回规范化的座位号
+        """
+        row, layout, bitmap = self.get_bitmap(db, flight_id=flight_id, flight_date=flight_date, for_update=True)
+        index = layout.index(seat_number)
+        if cabin_class is not None and layout.cabin_of(index) != cabin_class:
+            raise InvalidSeatError("座位与舱位不匹配")
+        if bitmap.is_set(index):
+            raise SeatUnavailableError(layout.seat(index))
+        bitmap.set(index)
+        if release_seat:
+            try:
+                bitmap.clear(layout.index(release_seat))
+            except InvalidSeatError:
+                pass
+        self._write(db, row, bitmap)
+        return layout.seat(index)
+
+    def assign(
+        self,
+        db: Session,
+        *,
+        flight_id: int,
+        flight_date: date,
+        cabin_class: str,
+        preferences: Sequence[Optional[str]],
+        exclude: Iterable[str] = ()
+    ) -> List[str]:
+        """
+        为一组乘客自动选座并一次性占用：锁定座位图行，在内存位图上运行选座算法，写回一次，不提交事务。
+        exclude 中的座位（如他人保留中的座位）不参与分配，也不写入位图。
+        返回与 preferences 顺序对应的座位号；余座不足时抛出 SeatMapFullError
+        """
+        row, layout, bitmap = self.get_bitmap(db, flight_id=flight_id, flight_date=flight_date, for_update=True)
+        candidates = SeatBitmap(layout.size, bitmap.to_bytes())
+        for seat_number in exclude:
+            try:
+                candidates.set(layout.index(seat_number))
+            except InvalidSeatError:
+                continue
+        indexes = assign_seats(layout, candidates, cabin_class, preferences)
+        for index in indexes:
+            bitmap.set(index)
+        if indexes:
+            self._write(db, row, bitmap)
+        return [layout.seat(i) for i in indexes]
+
+    def release(self, db: Session, *, flight_id: int, flight_date: date, seat_numbers: Iterable[str]) -> int:
+        """释放座位（取消值机、退票），不提交事务；返回实际释放的座位数"""
+        row, layout, bitmap = self.get_bitmap(db, flight_id=flight_id, flight_date=flight_date, for_update=True)
+        released = 0
+        for seat_number in seat_numbers:
+            try:
+                index = layout.index(seat_number)
+            except InvalidSeatError:
+                continue
+            if bitmap.is_set(index):
+                bitmap.clear(index)
+                released += 1
+        if released:
+            self._write(db, row, bitmap)
+        return released
+
+    def release_many(self, db: Session, *, seats: Iterable[Tuple[int, Optional[date], Optional[str]]]) -> int:
+        """
+        按 (flight_id, flight_date, seat_number) 批量释放座位（取消订单、退票、取消值机），不提交事务。
+        按航班日顺序逐个锁定座位图行、写回一次；座位图尚未初始化的航班日跳过，
+        之后初始化时按订单项的座位号重建，调用方须同时清空订单项的 seat_number。返回实际释放的座位数
+        """
+        grouped = {}
+        for flight_id, flight_date, seat_number in seats:
+            if flight_date is not None and seat_number:
+                grouped.setdefault((flight_id, flight_date), []).append(seat_number)
+        released = 0
+        for flight_id, flight_date in sorted(grouped):
+            row = self._query(db, flight_id, flight_date).populate_existing().with_for_update().first()
+            if row is None:
+                continue
+            layout = get_layout(row.layout_code)
+            bitmap = SeatBitmap(layout.size, row.occupied)
+            cleared = 0
+            for seat_number in grouped[(flight_id, flight_date)]:
+                try:
+                    index = layout.index(seat_number)
+                except InvalidSeatError:
+                    continue
+                if bitmap.is_set(index):
+                    bitmap.clear(index)
+                    cleared += 1
+            if cleared:
+                self._write(db, row, bitmap)
+                released += cleared
+        return released
+
+    def _write(self, db: Session, row: FlightSeatMap, bitmap: SeatBitmap) -> None:
+        self._query(db, row.flight_id, row.flight_date).update(
+            {FlightSeatMap.occupied: bitmap.to_bytes(), FlightSeatMap.version: FlightSeatMap.version + 1},
+            synchronize_session=False,
+        )
+
+
+seat_map = CRUDSeatMap(FlightSeatMap)
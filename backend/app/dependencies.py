@@ -55,3 +55,13 @@ def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def get_current_agency_user(
+    current_user: models.User = Depends(get_current_user),
+) -> models.User:
+    if current_user.role not in ("agency", "admin"):
+        raise HTTPException(
+            status_code=403, detail="Only agency accounts can place bulk bookings"
+        )
+    return current_user
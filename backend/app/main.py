@@ -2,6 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.v1.api import api_router
+from .core.config import settings
+from .core.pagination import NEXT_CURSOR_HEADER
+from .services.expiry_reaper import expiry_reaper
+from .services.idempotency import IDEMPOTENT_REPLAYED_HEADER
+from .services.timetable import load_timetable
 
 # 创建FastAPI应用实例
 app = FastAPI(
@@ -17,11 +22,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, IDEMPOTENT_REPLAYED_HEADER],  # 键集分页游标、幂等回放标记
 )
 
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
+
+@app.on_event("startup")
+def startup():
+    """启动时加载时刻表索引并启动过期订单回收线程"""
+    if settings.TIMETABLE_INDEX_ENABLED:
+        load_timetable()
+    if settings.EXPIRY_REAPER_ENABLED:
+        expiry_reaper.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """停止过期订单回收线程"""
+    expiry_reaper.stop()
+
+
 @app.get("/")
 async def root():
     """根路径"""
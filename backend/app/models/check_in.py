@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -6,15 +6,20 @@ class CheckIn(Base):
     __tablename__ = "check_ins"
 
     check_in_id = Column(BigInteger, primary_key=True, autoincrement=True, comment="值机记录唯一ID")
-    order_item_id = Column(BigInteger, ForeignKey("order_items.item_id"), unique=True, nullable=False, comment="关联的订单明细项")
+    # 列名与 check_ins 表一致（item_id / checked_at），属性名沿用接口中的 order_item_id / check_in_time
+    order_item_id = Column("item_id", BigInteger, ForeignKey("order_items.item_id", ondelete="CASCADE"), unique=True, nullable=False, comment="关联的订单明细项")
     passenger_id = Column(BigInteger, ForeignKey("passengers.passenger_id"), nullable=False, comment="关联的乘客")
-    check_in_time = Column(DateTime, nullable=False, comment="值机办理时间")
-    seat_number = Column(String(10), comment="分配的座位号")
-    boarding_pass_url = Column(String(255), comment="电子登机牌链接")
+    flight_id = Column(Integer, ForeignKey("flights.flight_id"), nullable=False, comment="航班ID")
+    seat_number = Column(String(10), nullable=False, comment="分配的座位号")
+    terminal = Column(String(10), comment="航站楼，如 T2、T3")
+    gate = Column(String(10), comment="登机口，如 A12、B05")
+    boarding_time = Column(DateTime, comment="登机开始时间")
+    check_in_time = Column("checked_at", DateTime, server_default=func.now(), comment="值机完成时间")
 
     # Relationships
     order_item = relationship("OrderItem", back_populates="check_in")
     passenger = relationship("Passenger", back_populates="check_ins")
+    flight = relationship("Flight")
 
     def __repr__(self):
-        return f"<CheckIn(id={self.check_in_id}, order_item_id={self.order_item_id})>"
\ No newline at end of file
+        return f"<CheckIn(id={self.check_in_id}, order_item_id={self.order_item_id})>"
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Date, Enum, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.models.base import Base, TimestampMixin
+
+
+class FlightInventory(Base, TimestampMixin):
+    """航班按日期、舱位的座位库存（增量维护，可由订单项重建）"""
+    __tablename__ = "flight_inventory"
+
+    flight_id = Column(Integer, ForeignKey("flights.flight_id", ondelete="CASCADE"), primary_key=True, comment="航班ID")
+    flight_date = Column(Date, primary_key=True, comment="航班日期")
+    cabin_class = Column(Enum("economy", "business", "first", name="cabin_class"), primary_key=True, comment="舱位")
+
+    capacity = Column(Integer, nullable=False, default=0, comment="舱位总座位数")
+    held = Column(Integer, nullable=False, default=0, comment="待支付订单占用的座位数")
+    sold = Column(Integer, nullable=False, default=0, comment="已支付订单占用的座位数")
+
+    # 关系
+    flight = relationship("Flight")
+
+    # 索引
+    __table_args__ = (
+        Index('idx_inventory_date', 'flight_date'),
+    )
+
+    @property
+    def available_seats(self) -> int:
+        return max(self.capacity - self.held - self.sold, 0)
+
+    def __repr__(self):
+        return (
+            f"<FlightInventory(flight_id={self.flight_id}, date={self.flight_date}, cabin={self.cabin_class}, "
+            f"capacity={self.capacity}, held={self.held}, sold={self.sold})>"
+        )
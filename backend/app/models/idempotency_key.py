@@ -0,0 +1,23 @@
+from sqlalchemy import Column, BigInteger, String, Integer, Text, DateTime, ForeignKey, Index
+from app.models.base import Base
+
+
+class IdempotencyKey(Base):
+    """幂等键：按 (用户, Idempotency-Key) 保存首次请求的响应，重试时直接回放"""
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, comment="用户ID")
+    idempotency_key = Column(String(64), primary_key=True, comment="客户端提供的幂等键")
+    request_hash = Column(String(64), nullable=False, comment="请求指纹（接口 + 参数的 SHA-256）")
+    status_code = Column(Integer, nullable=True, comment="响应状态码，为空表示首个请求仍在处理")
+    response_body = Column(Text, nullable=True, comment="响应体 JSON")
+    created_at = Column(DateTime, nullable=False, comment="首次请求时间")
+    expires_at = Column(DateTime, nullable=False, comment="过期时间，过期后由后台清理")
+
+    # 索引
+    __table_args__ = (
+        Index('idx_idempotency_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, key={self.idempotency_key}, status={self.status_code})>"
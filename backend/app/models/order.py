@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DECIMAL, Enum, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, BigInteger, String, DECIMAL, Enum, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base, TimestampMixin
@@ -33,6 +33,12 @@ class OrderStatus(enum.Enum):
     COMPLETED = "completed"
 
 
+class CancelReason(enum.Enum):
+    """订单取消原因"""
+    EXPIRED = "expired"
+    USER = "user"
+
+
 class Order(Base, TimestampMixin):
     """订单模型"""
     __tablename__ = "orders"
@@ -65,6 +71,11 @@ class Order(Base, TimestampMixin):
         comment="订单状态"
     )
     expired_at = Column(DateTime, nullable=True, comment="订单过期时间")
+    cancel_reason = Column(
+        Enum(CancelReason, values_callable=lambda x: [e.value for e in x], validate_strings=True),
+        nullable=True,
+        comment="取消原因：expired 超时未支付由回收线程取消，user 用户取消"
+    )
 
     # 关系
     user = relationship("User", back_populates="orders")
@@ -75,6 +86,8 @@ class Order(Base, TimestampMixin):
         Index('idx_user', 'user_id'),
         Index('idx_order_no', 'order_no'),
         Index('idx_status', 'status'),
+        # 订单列表按用户、状态过滤并按创建时间倒序分页
+        Index('idx_user_status_created', 'user_id', 'status', 'created_at'),
     )
 
     def __repr__(self):
@@ -101,6 +114,7 @@ class OrderItem(Base):
     order_id = Column(BigInteger, ForeignKey("orders.order_id", ondelete="CASCADE"), nullable=False, comment="所属订单")
     
     flight_id = Column(Integer, ForeignKey("flights.flight_id"), nullable=False, comment="航班ID")
+    flight_date = Column(Date, nullable=True, comment="乘机日期")
     cabin_class = Column(Enum("economy", "business", "first", name="cabin_class"), nullable=False, comment="舱位")
     passenger_id = Column(BigInteger, ForeignKey("passengers.passenger_id"), nullable=False, comment="乘机人ID")
     
@@ -133,6 +147,7 @@ class OrderItem(Base):
         Index('idx_order', 'order_id'),
         Index('idx_passenger', 'passenger_id'),
         Index('idx_flight', 'flight_id'),
+        Index('idx_flight_date', 'flight_id', 'flight_date'),
     )
 
     def __repr__(self):
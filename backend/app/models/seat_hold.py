@@ -0,0 +1,22 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, ForeignKey, Index
+from app.models.base import Base
+
+
+class SeatHold(Base):
+    """选座保留：确认选座前短时占住座位，过期后视为不存在（见 app/services/seat_hold.py）"""
+    __tablename__ = "seat_holds"
+
+    flight_id = Column(Integer, ForeignKey("flights.flight_id", ondelete="CASCADE"), primary_key=True, comment="航班ID")
+    flight_date = Column(Date, primary_key=True, comment="航班日期")
+    seat_number = Column(String(10), primary_key=True, comment="座位号")
+    order_item_id = Column(BigInteger, nullable=False, comment="持有保留的订单项ID")
+    expires_at = Column(DateTime, nullable=False, comment="过期时间")
+
+    # 索引
+    __table_args__ = (
+        Index('idx_seat_holds_holder', 'flight_id', 'flight_date', 'order_item_id'),
+        Index('idx_seat_holds_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<SeatHold(flight_id={self.flight_id}, date={self.flight_date}, seat={self.seat_number}, item={self.order_item_id})>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Date, LargeBinary, ForeignKey
+from app.models.base import Base, TimestampMixin
+
+
+class FlightSeatMap(Base, TimestampMixin):
+    """航班日座位图：按布局编号解释的占用位图"""
+    __tablename__ = "flight_seat_maps"
+
+    flight_id = Column(Integer, ForeignKey("flights.flight_id", ondelete="CASCADE"), primary_key=True, comment="航班ID")
+    flight_date = Column(Date, primary_key=True, comment="航班日期")
+    layout_code = Column(String(20), nullable=False, comment="座位布局编号")
+    occupied = Column(LargeBinary, nullable=False, comment="占用位图，第 i 位对应布局中第 i 个座位")
+    version = Column(Integer, nullable=False, default=0, comment="每次占用/释放递增")
+
+    def __repr__(self):
+        return f"<FlightSeatMap(flight_id={self.flight_id}, date={self.flight_date}, version={self.version})>"
@@ -19,7 +19,9 @@ from .flight import (
 )
 from .flight_search import (
     FlightSearchRequest, FlightSearchResult, FlightSearchResponse,
-    FlightAvailability
+    FlightAvailability, TimetableStatus, CacheStats,
+    FareCalendarRequest, FareCalendarDay, FareCalendarResponse,
+    ConnectionSearchRequest, ConnectionItinerary, ConnectionSearchResponse
 )
 from .passenger import (
     Passenger, PassengerCreate, PassengerUpdate, PassengerWithOrders,
@@ -28,12 +30,14 @@ from .passenger import (
 from .order import (
     Order, OrderCreate, OrderUpdate, OrderWithItems,
     OrderItem, OrderItemCreate, OrderItemWithDetails,
-    OrderPayment, OrderQuery, OrderSummary, OrderStats,
+    OrderPayment, OrderQuery, OrderSummary, OrderStats, ReaperStats,
+    BulkOrderCreate, BulkOrderResult, BulkOrderResponse, ExportFormat,
     PaymentMethod, PaymentStatus, OrderStatus, CheckInStatus, TicketStatus
 )
 from .check_in import (
     CheckIn, CheckInCreate, CheckInUpdate, CheckInWithDetails,
-    CheckInResponse, SeatSelection, BoardingPass
+    CheckInResponse, SeatSelection, BoardingPass, SeatMap, SeatMapCabin,
+    SeatPreference, AutoSeatAssignmentRequest, SeatAssignment, SeatHoldCreate, SeatHold
 )
 
 __all__ = [
@@ -57,7 +61,9 @@ __all__ = [
     
     # Flight search schemas
     "FlightSearchRequest", "FlightSearchResult", "FlightSearchResponse",
-    "FlightAvailability",
+    "FlightAvailability", "TimetableStatus", "CacheStats",
+    "FareCalendarRequest", "FareCalendarDay", "FareCalendarResponse",
+    "ConnectionSearchRequest", "ConnectionItinerary", "ConnectionSearchResponse",
     
     # Passenger schemas
     "Passenger", "PassengerCreate", "PassengerUpdate", "PassengerWithOrders",
@@ -66,10 +72,12 @@ __all__ = [
     # Order schemas
     "Order", "OrderCreate", "OrderUpdate", "OrderWithItems",
     "OrderItem", "OrderItemCreate", "OrderItemWithDetails",
-    "OrderPayment", "OrderQuery", "OrderSummary", "OrderStats",
+    "OrderPayment", "OrderQuery", "OrderSummary", "OrderStats", "ReaperStats",
+    "BulkOrderCreate", "BulkOrderResult", "BulkOrderResponse", "ExportFormat",
     "PaymentMethod", "PaymentStatus", "OrderStatus", "CheckInStatus", "TicketStatus",
     
     # Check-in schemas
     "CheckIn", "CheckInCreate", "CheckInUpdate", "CheckInWithDetails",
-    "CheckInResponse", "SeatSelection", "BoardingPass",
+    "CheckInResponse", "SeatSelection", "BoardingPass", "SeatMap", "SeatMapCabin",
+    "SeatPreference", "AutoSeatAssignmentRequest", "SeatAssignment", "SeatHoldCreate", "SeatHold",
 ]
@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, List
+
+from .order import OrderItem
 
 
 class CheckInBase(BaseModel):
@@ -17,10 +21,13 @@ class CheckInUpdate(CheckInBase):
 
 
 class CheckIn(CheckInBase):
-    id: int
-
-    class Config:
-        orm_mode = True
+    check_in_id: int
+    passenger_id: int
+    flight_id: int
+    terminal: str | None = None
+    gate: str | None = None
+    boarding_time: datetime | None = None
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CheckInWithDetails(CheckIn):
@@ -28,10 +35,12 @@ class CheckInWithDetails(CheckIn):
 
 
 class SeatSelection(BaseModel):
+    order_item_id: int
     seat_number: str
 
 
 class BoardingPass(BaseModel):
+    order_item_id: int | None = None
     passenger_name: str
     flight_number: str
     departure_time: datetime
@@ -44,4 +53,63 @@ class BoardingPass(BaseModel):
 
 class CheckInResponse(BaseModel):
     message: str
-    boarding_pass: BoardingPass | None = None
\ No newline at end of file
+    boarding_pass: BoardingPass | None = None
+
+
+class SeatMapCabin(BaseModel):
+    """座位图中的一个舱位：排号区间与座位列，以及余座数"""
+    cabin_class: str
+    first_row: int
+    last_row: int
+    columns: str
+    total: int
+    available: int
+
+
+class SeatMap(BaseModel):
+    """
+    航班日座位图：座位按舱位、排、列顺序编号，occupied 为 base64 编码的占用位图
+    （第 i 个座位对应第 i//8 个字节的第 i%8 位，低位在前）
+    """
+    flight_id: int
+    flight_date: date
+    layout: str
+    version: int
+    cabins: List[SeatMapCabin]
+    occupied: str
+    # 其他乘客保留中的座位（未计入 occupied）
+    held: List[str] = []
+
+
+class SeatPreference(str, Enum):
+    """座位偏好"""
+    WINDOW = "window"
+    AISLE = "aisle"
+
+
+class AutoSeatAssignmentRequest(BaseModel):
+    """订单自动选座：可按订单项指定靠窗/靠过道偏好"""
+    preferences: Dict[int, SeatPreference] = {}
+
+
+class SeatAssignment(BaseModel):
+    """订单项分配到的座位"""
+    item_id: int
+    passenger_id: int
+    flight_id: int
+    seat_number: str
+
+
+class SeatHoldCreate(BaseModel):
+    """为订单项保留座位"""
+    order_item_id: int
+    seat_number: str
+
+
+class SeatHold(BaseModel):
+    """座位保留结果，expires_at 之前确认选座即可占用"""
+    flight_id: int
+    flight_date: date
+    seat_number: str
+    order_item_id: int
+    expires_at: datetime
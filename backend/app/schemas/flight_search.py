@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional, List
-from datetime import date, time
+from datetime import date, time, datetime, timedelta
 from app.schemas.flight import CabinClass
 
 
@@ -8,6 +8,7 @@ class FlightSearchRequest(BaseModel):
     departure_city: str
     arrival_city: str
     departure_date: date
+    return_date: Optional[date] = Field(None, description="返程日期（往返搜索时提供）")
     cabin_class: Optional[CabinClass] = None
     adult_count: int = Field(1, ge=1)
     child_count: int = Field(0, ge=0)
@@ -27,12 +28,19 @@ class FlightSearchRequest(BaseModel):
             raise ValueError("Departure date cannot be in the past")
         return v
 
+    @model_validator(mode="after")
+    def validate_return_date(self):
+        if self.return_date is not None and self.return_date < self.departure_date:
+            raise ValueError("Return date cannot be earlier than departure date")
+        return self
+
     class Config:
         json_schema_extra = {
             "example": {
                 "departure_city": "上海",
                 "arrival_city": "广州",
                 "departure_date": "2025-11-04",
+                "return_date": "2025-11-08",
                 "cabin_class": "economy",
                 "adult_count": 1,
                 "child_count": 0,
@@ -80,10 +88,13 @@ class FlightSearchResponse(BaseModel):
     request: FlightSearchRequest = Field(..., description="搜索请求")
     outbound_flights: List[FlightSearchResult] = Field([], description="航班结果")
     total_count: int = Field(0, description="总结果数量")
+    return_flights: List[FlightSearchResult] = Field([], description="返程航班结果（往返搜索）")
+    return_count: int = Field(0, description="返程结果数量")
     
     # 搜索统计信息
     min_price: Optional[float] = Field(None, description="最低价格")
     max_price: Optional[float] = Field(None, description="最高价格")
+    return_min_price: Optional[float] = Field(None, description="返程最低价格")
     airlines: List[str] = Field([], description="涉及的航空公司")
     airports: List[str] = Field([], description="涉及的机场")
 
@@ -93,4 +104,119 @@ class FlightAvailability(BaseModel):
     flight_id: int = Field(..., description="航班ID")
     flight_date: date = Field(..., description="航班日期")
     cabin_class: CabinClass = Field(..., description="舱位")
-    available_seats: int = Field(..., description="可用座位数")
\ No newline at end of file
+    available_seats: int = Field(..., description="可用座位数")
+
+
+class TimetableStatus(BaseModel):
+    """时刻表索引状态"""
+    loaded: bool = Field(..., description="是否已加载")
+    version: int = Field(..., description="索引版本号，每次重载递增")
+    loaded_at: Optional[datetime] = Field(None, description="加载时间（UTC）")
+    flight_count: int = Field(0, description="索引中的航班数")
+
+
+class CacheStats(BaseModel):
+    """进程内缓存统计"""
+    size: int = Field(..., description="当前条目数")
+    maxsize: int = Field(..., description="容量上限")
+    ttl_seconds: float = Field(..., description="条目有效期（秒）")
+    hits: int = Field(0, description="命中次数")
+    misses: int = Field(0, description="未命中次数")
+    evictions: int = Field(0, description="LRU 淘汰次数")
+    expirations: int = Field(0, description="过期次数")
+    invalidations: int = Field(0, description="主动失效条数")
+
+
+class FareCalendarRequest(BaseModel):
+    """低价日历请求：城市对 + 日期窗口（不超过运营掩码覆盖的 21 天）"""
+    departure_city: str
+    arrival_city: str
+    start_date: date
+    end_date: Optional[date] = Field(None, description="结束日期（含），默认开始日期后 6 天")
+    cabin_class: Optional[CabinClass] = None
+    adult_count: int = Field(1, ge=1)
+    child_count: int = Field(0, ge=0)
+
+    @field_validator("cabin_class", mode="before")
+    def lowercase_cabin_class(cls, v):
+        if v:
+            return v.lower()
+        return v
+
+    @field_validator("start_date")
+    def validate_start_date(cls, v):
+        if v < date.today():
+            raise ValueError("Start date cannot be in the past")
+        return v
+
+    @model_validator(mode="after")
+    def validate_window(self):
+        if self.end_date is None:
+            self.end_date = self.start_date + timedelta(days=6)
+        if self.end_date < self.start_date:
+            raise ValueError("End date cannot be earlier than start date")
+        if (self.end_date - self.start_date).days >= 21:
+            raise ValueError("Date window cannot exceed 21 days")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "departure_city": "上海",
+                "arrival_city": "广州",
+                "start_date": "2025-11-04",
+                "end_date": "2025-11-10",
+                "cabin_class": "economy",
+                "adult_count": 1,
+                "child_count": 0
+            }
+        }
+
+
+class FareCalendarDay(BaseModel):
+    """低价日历中的单日结果"""
+    flight_date: date = Field(..., description="出发日期")
+    flight_count: int = Field(0, description="有足够座位的航班数")
+    min_price: Optional[float] = Field(None, description="当日最低价格，无航班时为空")
+    cheapest_flight_id: Optional[int] = Field(None, description="最低价航班ID")
+
+
+class FareCalendarResponse(BaseModel):
+    """低价日历响应"""
+    request: FareCalendarRequest = Field(..., description="日历请求")
+    days: List[FareCalendarDay] = Field([], description="按日期排列的结果")
+    min_price: Optional[float] = Field(None, description="窗口内最低价格")
+    cheapest_date: Optional[date] = Field(None, description="窗口内最低价日期")
+
+
+class ConnectionSearchRequest(FlightSearchRequest):
+    """一次中转联程搜索请求"""
+    min_connection_minutes: int = Field(60, ge=0, description="最短中转时间（分钟）")
+    max_connection_minutes: int = Field(360, ge=0, le=1440, description="最长中转时间（分钟）")
+    max_results: int = Field(20, ge=1, le=100, description="最多返回的行程数")
+
+    @model_validator(mode="after")
+    def validate_connection_window(self):
+        if self.max_connection_minutes < self.min_connection_minutes:
+            raise ValueError("max_connection_minutes cannot be less than min_connection_minutes")
+        return self
+
+
+class ConnectionItinerary(BaseModel):
+    """一次中转行程"""
+    legs: List[FlightSearchResult] = Field(..., description="各航段（按乘坐顺序）")
+    connection_airport_code: str = Field(..., description="中转机场代码")
+    connection_city: str = Field(..., description="中转城市")
+    connection_minutes: int = Field(..., description="中转时间（分钟）")
+    total_price: float = Field(..., description="总价格")
+    departure_date: date = Field(..., description="出发日期")
+    arrival_date: date = Field(..., description="最终到达日期")
+    available_seats: int = Field(..., description="全程可用座位数（各航段最小值）")
+
+
+class ConnectionSearchResponse(BaseModel):
+    """一次中转联程搜索响应"""
+    request: ConnectionSearchRequest = Field(..., description="搜索请求")
+    itineraries: List[ConnectionItinerary] = Field([], description="按总价、到达时间排序的行程")
+    total_count: int = Field(0, description="总结果数量")
+    min_price: Optional[float] = Field(None, description="最低价格")
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from enum import Enum
 from .passenger import PassengerBookingInfo, Passenger
 from .flight import FlightWithDetails
@@ -44,9 +44,17 @@ class TicketStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+class ExportFormat(str, Enum):
+    """订单导出格式"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+
 class OrderItemCreate(BaseModel):
     """创建订单明细模型"""
     flight_id: int = Field(..., description="航班ID")
+    flight_date: Optional[date] = Field(None, description="乘机日期（缺省为航班最近的运营日）")
     cabin_class: CabinClass = Field(..., description="舱位类型")
     passenger_info: PassengerBookingInfo = Field(..., description="乘客信息")
 
@@ -69,11 +77,35 @@ class OrderCreate(BaseModel):
         return v
 
 
+class BulkOrderCreate(BaseModel):
+    """旅行社批量下单请求"""
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=1000, description="订单列表，每单各自的乘客与航班")
+
+
+class BulkOrderResult(BaseModel):
+    """批量下单中单个订单的结果"""
+    index: int = Field(..., description="订单在请求中的序号（从0开始）")
+    success: bool
+    order_id: Optional[int] = None
+    order_no: Optional[str] = None
+    total_amount: Optional[float] = None
+    error: Optional[str] = Field(None, description="失败原因")
+
+
+class BulkOrderResponse(BaseModel):
+    """批量下单结果汇总"""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BulkOrderResult]
+
+
 class OrderItemInDBBase(BaseModel):
     """数据库订单明细基础模型"""
     item_id: int
     order_id: int
     flight_id: int
+    flight_date: Optional[date] = None
     cabin_class: str
     passenger_id: int
     original_price: float
@@ -168,3 +200,22 @@ class OrderStats(BaseModel):
     completed_count: int
     cancelled_count: int
     total_spent: float
+
+
+class ReaperStats(BaseModel):
+    """过期订单回收线程运行指标"""
+    running: bool
+    interval_seconds: float
+    batch_size: int
+    runs: int
+    batches: int
+    orders_expired: int
+    idempotency_keys_purged: int
+    seat_holds_purged: int
+    errors: int
+    last_run_at: Optional[datetime] = None
+    last_run_ms: float
+    last_run_expired: int
+    last_lag_seconds: float
+    max_lag_seconds: float
+    next_wakeup_at: Optional[datetime] = None
@@ -0,0 +1 @@
+# 进程内的业务服务（内存索引、缓存等），供 API 层调用
@@ -0,0 +1,201 @@
+"""
+旅行社批量下单
+
+一次请求提交数百个订单：先一次性加载航班与价格并校验乘机日期，再按 chunk_size 分批处理。
+每批在一个事务内按键序锁定涉及的全部库存行，按提交顺序在内存中逐单判断余量，
+随后以集合操作写入：一条 CASE UPDATE 占座、一次批量获取/创建乘客、多行 INSERT 写订单与订单项。
+单个订单失败（航班不存在、日期不可订、座位不足）不影响同批其他订单；整批写入出错时该批订单全部失败。
+"""
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.core.order_no import next_order_no
+from app.crud.flight_inventory import InventoryKey
+from app.crud.passenger import identity_key
+from app.models.flight import Flight
+from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod, PaymentStatus
+from app.schemas.passenger import PassengerCreate
+from app.services.order_events import order_changed
+
+logger = logging.getLogger(__name__)
+
+ORDER_EXPIRE_MINUTES = 30
+
+
+class BookingError(ValueError):
+    """订单无法预订（航班不存在、日期不可订等）"""
+
+
+def resolve_flight_date(flight: Flight, requested: Optional[date], today: date) -> date:
+    """校验乘机日期落在21天运营掩码内且当日运营；未指定时取最近的运营日"""
+    mask = flight.operating_days or ""
+    if requested is None:
+        for offset, bit in enumerate(mask):
+            if bit == '1':
+                return today + timedelta(days=offset)
+        raise BookingError(f"航班 {flight.flight_id} 近期无运营日")
+    day_diff = (requested - today).days
+    if day_diff < 0 or day_diff >= len(mask):
+        raise BookingError("航班日期不在运营掩码范围内")
+    if mask[day_diff] != '1':
+        raise BookingError("所选日期航班未运营")
+    return requested
+
+
+class _PlannedOrder(NamedTuple):
+    index: int
+    order_in: schemas.OrderCreate
+    item_dates: List[date]
+    seats: Dict[InventoryKey, int]
+
+
+def _plan(order_in: schemas.OrderCreate, flights: Dict[int, Flight], today: date) -> Tuple[List[date], Dict[InventoryKey, int]]:
+    item_dates: List[date] = []
+    seats: Dict[InventoryKey, int] = {}
+    for it in order_in.items:
+        flight = flights.get(it.flight_id)
+        if not flight:
+            raise BookingError(f"航班 {it.flight_id} 不存在")
+        flight_date = resolve_flight_date(flight, it.flight_date, today)
+        item_dates.append(flight_date)
+        key = (it.flight_id, flight_date, it.cabin_class.value)
+        seats[key] = seats.get(key, 0) + 1
+    return item_dates, seats
+
+
+def _book_chunk(
+    db: Session,
+    *,
+    user_id: int,
+    planned: Sequence[_PlannedOrder],
+    prices: Dict[Tuple[int, str], Decimal],
+    results: Dict[int, schemas.BulkOrderResult],
+) -> None:
+    """在一个事务内处理一批订单，结果写入 results"""
+    keys = {key for p in planned for key in p.seats}
+    crud.flight_inventory.ensure_rows(db, keys=keys)
+    rows = crud.flight_inventory.lock_many(db, keys=keys)
+    available = {key: row.available_seats for key, row in rows.items()}
+
+    # 按提交顺序逐单判断余量，整单满足才占座
+    admitted: List[_PlannedOrder] = []
+    held: Dict[InventoryKey, int] = {}
+    for p in planned:
+        short = next((key for key, n in sorted(p.seats.items()) if available.get(key, 0) < n), None)
+        if short is not None:
+            results[p.index] = schemas.BulkOrderResult(
+                index=p.index, success=False,
+                error=f"航班 {short[0]} 的 {short[2]} 座位不足（可用 {available.get(short, 0)}，需求 {p.seats[short]}）",
+            )
+            continue
+        for key, n in p.seats.items():
+            available[key] -= n
+            held[key] = held.get(key, 0) + n
+        admitted.append(p)
+    if not admitted:
+        db.rollback()
+        return
+
+    crud.flight_inventory.hold_many(db, counts=held)
+    passengers = crud.passenger.get_or_create_many(db, passengers=[
+        PassengerCreate(**it.passenger_info.model_dump()) for p in admitted for it in p.order_in.items
+    ])
+
+    now = datetime.utcnow()
+    order_rows = []
+    item_prices: List[List[Decimal]] = []
+    for p in admitted:
+        line = [prices.get((it.flight_id, it.cabin_class.value), Decimal('0.00')) for it in p.order_in.items]
+        total = sum(line, Decimal('0.00'))
+        item_prices.append(line)
+        order_rows.append({
+            "order_no": next_order_no(),
+            "user_id": user_id,
+            "total_amount_original": total,
+            "total_amount": total,
+            "currency": "CNY",
+            "payment_method": PaymentMethod(p.order_in.payment_method.value),
+            "payment_status": PaymentStatus.UNPAID,
+            "status": OrderStatus.PENDING,
+            "expired_at": now + timedelta(minutes=ORDER_EXPIRE_MINUTES),
+        })
+    db.execute(insert(Order).values(order_rows))
+    order_ids = dict(
+        db.query(Order.order_no, Order.order_id).filter(Order.order_no.in_([r["order_no"] for r in order_rows])).all()
+    )
+
+    item_rows = []
+    for p, order_row, line in zip(admitted, order_rows, item_prices):
+        for it, flight_date, price in zip(p.order_in.items, p.item_dates, line):
+            item_rows.append({
+                "order_id": order_ids[order_row["order_no"]],
+                "flight_id": it.flight_id,
+                "flight_date": flight_date,
+                "cabin_class": it.cabin_class.value,
+                "passenger_id": passengers[identity_key(it.passenger_info.id_card, it.passenger_info.name)].passenger_id,
+                "original_price": price,
+                "paid_price": price,
+                "contact_email": p.order_in.contact_email,
+            })
+    db.execute(insert(OrderItem).values(item_rows))
+    db.commit()
+
+    for p, order_row in zip(admitted, order_rows):
+        results[p.index] = schemas.BulkOrderResult(
+            index=p.index, success=True,
+            order_id=order_ids[order_row["order_no"]], order_no=order_row["order_no"],
+            total_amount=float(order_row["total_amount"]),
+        )
+
+
+def book_orders(
+    db: Session,
+    *,
+    user_id: int,
+    orders: Sequence[schemas.OrderCreate],
+    chunk_size: int,
+    today: Optional[date] = None,
+) -> schemas.BulkOrderResponse:
+    """批量下单，返回逐单结果（顺序与提交顺序一致）"""
+    today = today or date.today()
+    flight_ids = {it.flight_id for o in orders for it in o.items}
+    flights = {f.flight_id: f for f in db.query(Flight).filter(Flight.flight_id.in_(flight_ids)).all()}
+    prices = crud.flight_pricing.get_base_prices(db, flight_ids=flights)
+
+    results: Dict[int, schemas.BulkOrderResult] = {}
+    planned: List[_PlannedOrder] = []
+    for index, order_in in enumerate(orders):
+        try:
+            item_dates, seats = _plan(order_in, flights, today)
+        except BookingError as e:
+            results[index] = schemas.BulkOrderResult(index=index, success=False, error=str(e))
+            continue
+        planned.append(_PlannedOrder(index, order_in, item_dates, seats))
+
+    for start in range(0, len(planned), chunk_size):
+        chunk = planned[start:start + chunk_size]
+        try:
+            _book_chunk(db, user_id=user_id, planned=chunk, prices=prices, results=results)
+        except Exception:
+            db.rollback()
+            logger.exception("bulk booking chunk failed for user %s", user_id)
+            for p in chunk:
+                results[p.index] = schemas.BulkOrderResult(index=p.index, success=False, error="批量写入失败，请重试")
+
+    booked_flights = {
+        key[0] for p in planned if results[p.index].success for key in p.seats
+    }
+    if booked_flights:
+        order_changed(flight_ids=booked_flights, user_ids=[user_id])
+
+    ordered = [results[i] for i in range(len(orders))]
+    succeeded = sum(1 for r in ordered if r.success)
+    return schemas.BulkOrderResponse(
+        total=len(ordered), succeeded=succeeded, failed=len(ordered) - succeeded, results=ordered,
+    )
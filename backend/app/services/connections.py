@@ -0,0 +1,204 @@
+"""
+一次中转联程搜索
+
+基于时刻表快照构建航线邻接图，并预计算 (出发机场, 到达机场) -> 可中转枢纽列表。
+搜索时对每个枢纽：第一程按运营掩码过滤，第二程按起飞时刻有序数组二分出衔接窗口
+（允许跨天，第二程在第一程落地当天或次日起飞），同一第一程下丢弃起飞更晚且不更便宜的第二程，
+全局以最大堆保留最便宜的若干条候选并据此剪枝。座位库存由调用方对候选一次性批量校验。
+"""
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.services.timetable import MASK_DAYS, TimetableFlight, normalize_city, timetable
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+class Itinerary(NamedTuple):
+    """一次中转行程的内部表示"""
+    total_price: float
+    arrival_at: datetime
+    first: TimetableFlight
+    first_date: date
+    second: TimetableFlight
+    second_date: date
+    connection_minutes: int
+
+
+class _RouteLegs(NamedTuple):
+    flights: Tuple[TimetableFlight, ...]
+    # 按起飞时刻（分钟）排序，与 flights 一一对应
+    departures: Tuple[int, ...]
+
+
+class ConnectionGraph:
+    """某一版本时刻表上的航线邻接图"""
+
+    def __init__(self, snapshot):
+        self.version = snapshot.version
+        self.city_airports = snapshot.city_airports
+        self.airport_city: Dict[str, str] = {
+            code: city for city, codes in snapshot.city_airports.items() for code in codes
+        }
+        self.legs: Dict[Tuple[str, str], _RouteLegs] = {}
+        outgoing: Dict[str, List[str]] = {}
+        for (dep, arr), route_id in snapshot.routes.items():
+            flights = snapshot.route_flights.get(route_id, ())
+            if not flights:
+                continue
+            self.legs[(dep, arr)] = _RouteLegs(
+                flights, tuple(_minutes(f.scheduled_departure_time) for f in flights)
+            )
+            outgoing.setdefault(dep, []).append(arr)
+
+        # 预计算枢纽：A -> B -> C，B 与 A、C 不在同一城市
+        self.hubs: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        hubs: Dict[Tuple[str, str], List[str]] = {}
+        for origin, mids in outgoing.items():
+            origin_city = self.airport_city.get(origin)
+            for hub in mids:
+                hub_city = self.airport_city.get(hub)
+                if hub_city == origin_city:
+                    continue
+                for dest in outgoing.get(hub, ()):
+                    dest_city = self.airport_city.get(dest)
+                    if dest_city in (origin_city, hub_city):
+                        continue
+                    hubs.setdefault((origin, dest), []).append(hub)
+        self.hubs = {pair: tuple(sorted(codes)) for pair, codes in hubs.items()}
+
+    @property
+    def hub_pair_count(self) -> int:
+        return len(self.hubs)
+
+    def search(
+        self,
+        *,
+        departure_city: str,
+        arrival_city: str,
+        departure_date: date,
+        cabin_class: str,
+        min_connection_minutes: int,
+        max_connection_minutes: int,
+        price_max: Optional[float] = None,
+        limit: int = 20,
+        today: Optional[date] = None
+    ) -> List[Itinerary]:
+        """返回按总价、到达时间排序的至多 limit 条中转行程（未校验座位）"""
+        today = today or date.today()
+        day_diff = (departure_date - today).days
+        if not (0 <= day_diff < MASK_DAYS) or limit <= 0:
+            return []
+        bit = 1 << day_diff
+
+        # 最大堆（取负价格）保留最便宜的 limit 条；堆满后以堆顶价格剪枝
+        heap: List[Tuple[float, float, int, Itinerary]] = []
+        seq = 0
+
+        def price_bound() -> Optional[float]:
+            bound = price_max
+            if len(heap) >= limit:
+                worst = -heap[0][0]
+                bound = worst if bound is None else min(bound, worst)
+            return bound
+
+        origins = self.city_airports.get(normalize_city(departure_city), ())
+        dests = self.city_airports.get(normalize_city(arrival_city), ())
+        for origin in origins:
+            for dest in dests:
+                for hub in self.hubs.get((origin, dest), ()):
+                    first_legs = self.legs[(origin, hub)]
+                    second_legs = self.legs[(hub, dest)]
+                    cheapest_second = min(
+                        (f.prices[cabin_class] for f in second_legs.flights if cabin_class in f.prices),
+                        default=None,
+                    )
+                    if cheapest_second is None:
+                        continue
+
+                    for first in first_legs.flights:
+                        if not first.mask & bit or cabin_class not in first.prices:
+                            continue
+                        first_price = first.prices[cabin_class]
+                        bound = price_bound()
+                        if bound is not None and first_price + cheapest_second > bound:
+                            continue
+
+                        # 第一程落地时刻（相对出发日 0 点的分钟数），到达时刻早于起飞时刻视为次日到达
+                        landed = _minutes(first.scheduled_arrival_time)
+                        if first.scheduled_arrival_time < first.scheduled_departure_time:
+                            landed += MINUTES_PER_DAY
+                        earliest = landed + min_connection_minutes
+                        latest = landed + max_connection_minutes
+
+                        # 同一第一程下的帕累托前沿：窗口按起飞时间升序扫描，
+                        # 起飞更晚且不更便宜的第二程被支配
+                        best_price = None
+                        for day_offset in range(earliest // MINUTES_PER_DAY, latest // MINUTES_PER_DAY + 1):
+                            second_diff = day_diff + day_offset
+                            if not (0 <= second_diff < MASK_DAYS):
+                                continue
+                            second_bit = 1 << second_diff
+                            base = day_offset * MINUTES_PER_DAY
+                            lo = bisect_left(second_legs.departures, earliest - base)
+                            hi = bisect_right(second_legs.departures, latest - base)
+                            for i in range(lo, hi):
+                                second = second_legs.flights[i]
+                                if not second.mask & second_bit or cabin_class not in second.prices:
+                                    continue
+                                total = first_price + second.prices[cabin_class]
+                                if best_price is not None and total >= best_price:
+                                    continue
+                                bound = price_bound()
+                                if bound is not None and total > bound:
+                                    continue
+                                best_price = total
+
+                                second_date = departure_date + timedelta(days=day_offset)
+                                arrival_date = second_date
+                                if second.scheduled_arrival_time < second.scheduled_departure_time:
+                                    arrival_date += timedelta(days=1)
+                                itinerary = Itinerary(
+                                    total_price=total,
+                                    arrival_at=datetime.combine(arrival_date, second.scheduled_arrival_time),
+                                    first=first,
+                                    first_date=departure_date,
+                                    second=second,
+                                    second_date=second_date,
+                                    connection_minutes=base + second_legs.departures[i] - landed,
+                                )
+                                arrival_key = -itinerary.arrival_at.timestamp()
+                                seq += 1
+                                entry = (-total, arrival_key, seq, itinerary)
+                                if len(heap) < limit:
+                                    heapq.heappush(heap, entry)
+                                else:
+                                    heapq.heappushpop(heap, entry)
+
+        return sorted((entry[3] for entry in heap), key=lambda it: (it.total_price, it.arrival_at))
+
+
+_graph: Optional[ConnectionGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_connection_graph() -> Optional[ConnectionGraph]:
+    """返回与当前时刻表版本一致的邻接图，版本变化时重建"""
+    global _graph
+    snapshot = timetable.snapshot
+    if snapshot is None:
+        return None
+    graph = _graph
+    if graph is not None and graph.version == snapshot.version:
+        return graph
+    with _graph_lock:
+        if _graph is None or _graph.version != snapshot.version:
+            _graph = ConnectionGraph(snapshot)
+        return _graph
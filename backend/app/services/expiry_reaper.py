@@ -0,0 +1,165 @@
+"""
+过期订单回收
+
+后台线程按过期时间唤醒：每轮分批取消已过 expired_at 的未支付订单并释放座位，
+同时清理过期的幂等键与选座保留；随后查询最早的待支付过期时间，在它与最长轮询间隔之间取较早者休眠。
+吞吐与延迟（批次处理时最早过期订单已超时多久）通过 stats() 暴露。
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryReaper:
+    def __init__(self, session_factory: Callable[[], Session], *, interval: float, batch_size: int):
+        self._session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.batches = 0
+        self.orders_expired = 0
+        self.idempotency_keys_purged = 0
+        self.seat_holds_purged = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_ms = 0.0
+        self.last_run_expired = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self.next_wakeup_at: Optional[datetime] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="expiry-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """提前唤醒（例如新订单的过期时间早于当前计划的唤醒时间）"""
+        self._wake.set()
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """执行一轮回收，返回取消的订单数"""
+        from app import crud
+        from app.services import seat_hold
+
+        started = time.perf_counter()
+        expired_total = 0
+        batches = 0
+        lag = 0.0
+        purged = holds_purged = 0
+        db = self._session_factory()
+        try:
+            while not self._stop.is_set():
+                batch_now = now or datetime.utcnow()
+                expired, oldest = crud.order.expire_overdue_batch(db, now=batch_now, batch_size=self.batch_size)
+                if expired:
+                    batches += 1
+                    expired_total += expired
+                    lag = max(lag, (batch_now - oldest).total_seconds())
+                if expired < self.batch_size:
+                    break
+            purged = crud.idempotency_key.purge_expired(db, now=now, batch_size=self.batch_size)
+            holds_purged = seat_hold.purge_expired(now)
+        finally:
+            db.close()
+        with self._lock:
+            self.runs += 1
+            self.batches += batches
+            self.orders_expired += expired_total
+            self.idempotency_keys_purged += purged
+            self.seat_holds_purged += holds_purged
+            self.last_run_at = datetime.utcnow()
+            self.last_run_ms = (time.perf_counter() - started) * 1000
+            self.last_run_expired = expired_total
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        return expired_total
+
+    def _seconds_until_next_expiry(self) -> float:
+        from app import crud
+
+        db = self._session_factory()
+        try:
+            next_expiry = crud.order.next_expiry(db)
+        finally:
+            db.close()
+        if next_expiry is None:
+            return self.interval
+        return min(max((next_expiry - datetime.utcnow()).total_seconds(), 0.0), self.interval)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            delay = self.interval
+            try:
+                expired = self.run_once()
+                if expired:
+                    logger.info("expiry reaper cancelled %s overdue orders", expired)
+                delay = self._seconds_until_next_expiry()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                logger.exception("expiry reaper run failed")
+            # 过期时间精确到秒级即可，避免对即将到期的订单空转
+            delay = max(delay, 1.0)
+            with self._lock:
+                self.next_wakeup_at = datetime.utcfromtimestamp(time.time() + delay)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+                "runs": self.runs,
+                "batches": self.batches,
+                "orders_expired": self.orders_expired,
+                "idempotency_keys_purged": self.idempotency_keys_purged,
+                "seat_holds_purged": self.seat_holds_purged,
+                "errors": self.errors,
+                "last_run_at": self.last_run_at,
+                "last_run_ms": self.last_run_ms,
+                "last_run_expired": self.last_run_expired,
+                "last_lag_seconds": self.last_lag_seconds,
+                "max_lag_seconds": self.max_lag_seconds,
+                "next_wakeup_at": self.next_wakeup_at,
+            }
+
+
+def _session_factory() -> Session:
+    from app.database import SessionLocal
+
+    return SessionLocal()
+
+
+expiry_reaper = ExpiryReaper(
+    _session_factory,
+    interval=settings.EXPIRY_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.EXPIRY_REAPER_BATCH_SIZE,
+)
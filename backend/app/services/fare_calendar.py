@@ -0,0 +1,106 @@
+"""
+低价日历
+
+一次请求给出城市对在日期窗口内每天的最低价与航班数：
+候选航班只取一次（优先内存时刻表，未加载时一条 SQL），按运营掩码逐日判断是否执飞，
+窗口内的座位库存用一条区间查询取回，代替逐日调用 /flights/search。
+"""
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.crud.flight import flight as crud_flight
+from app.crud.flight_inventory import cabin_capacity, flight_inventory
+from app.models.flight_pricing import CabinClass
+from app.schemas.flight_search import FareCalendarDay, FareCalendarRequest, FareCalendarResponse
+from app.services.timetable import MASK_DAYS, mask_to_int, timetable
+
+
+class CalendarFlight(NamedTuple):
+    flight_id: int
+    mask: int
+    capacity: int
+    price: float
+
+
+def calendar_candidates(db: Session, request: FareCalendarRequest, cabin: CabinClass) -> List[CalendarFlight]:
+    """城市对之间在该舱位有定价的全部直飞航班"""
+    if timetable.is_loaded:
+        return [
+            CalendarFlight(
+                f.flight_id,
+                f.mask,
+                cabin_capacity(f, cabin.value),
+                f.prices[cabin.value],
+            )
+            for f in timetable.city_pair_flights(request.departure_city, request.arrival_city)
+            if cabin.value in f.prices
+        ]
+    return [
+        CalendarFlight(
+            row.flight_id,
+            mask_to_int(row.operating_days),
+            cabin_capacity(row, cabin.value),
+            float(row.base_price) if row.base_price is not None else 0.0,
+        )
+        for row in crud_flight.get_city_pair_flights(
+            db,
+            departure_city=request.departure_city.strip(),
+            arrival_city=request.arrival_city.strip(),
+            cabin_class=cabin,
+        )
+    ]
+
+
+def build_fare_calendar(
+    db: Session,
+    request: FareCalendarRequest,
+    *,
+    today: Optional[date] = None
+) -> FareCalendarResponse:
+    today = today or date.today()
+    cabin = CabinClass[request.cabin_class.name] if request.cabin_class else CabinClass.ECONOMY
+    passengers = request.adult_count + request.child_count
+
+    days = [
+        request.start_date + timedelta(days=i)
+        for i in range((request.end_date - request.start_date).days + 1)
+    ]
+    # 超出运营掩码范围的日期没有航班
+    in_horizon = [d for d in days if 0 <= (d - today).days < MASK_DAYS]
+
+    candidates = calendar_candidates(db, request, cabin) if in_horizon else []
+    inventory = flight_inventory.get_range(
+        db,
+        flight_ids=[f.flight_id for f in candidates],
+        cabin_class=cabin.value,
+        start_date=in_horizon[0],
+        end_date=in_horizon[-1],
+    ) if candidates else {}
+
+    best: Dict[date, FareCalendarDay] = {d: FareCalendarDay(flight_date=d) for d in days}
+    for d in in_horizon:
+        bit = 1 << (d - today).days
+        day = best[d]
+        for f in candidates:
+            if not f.mask & bit:
+                continue
+            # 无库存行说明该日尚无订单占座
+            row = inventory.get((f.flight_id, d, cabin.value))
+            available = row.available_seats if row else f.capacity
+            if available < passengers:
+                continue
+            day.flight_count += 1
+            if day.min_price is None or f.price < day.min_price:
+                day.min_price = f.price
+                day.cheapest_flight_id = f.flight_id
+
+    priced = [day for day in best.values() if day.min_price is not None]
+    cheapest = min(priced, key=lambda day: (day.min_price, day.flight_date)) if priced else None
+    return FareCalendarResponse(
+        request=request,
+        days=list(best.values()),
+        min_price=cheapest.min_price if cheapest else None,
+        cheapest_date=cheapest.flight_date if cheapest else None,
+    )
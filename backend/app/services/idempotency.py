@@ -0,0 +1,122 @@
+"""
+请求幂等
+
+客户端在 Idempotency-Key 请求头中携带幂等键，首个请求的成功响应按 (用户, 幂等键) 保存；
+相同键的重试只需一次主键查询即可回放保存的响应，不再重复执行占座与写入。
+失败的请求会释放幂等键，客户端可用同一键重试。
+
+业务事务提交时在同一事务中把幂等键标记为已提交（状态码），响应体随后保存：
+提交后、保存响应前崩溃的请求不会被重试重新执行；处理超过 IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+而被重试接管的慢请求，其业务事务在提交时发现占用已失效而整体回滚，不会重复下单。
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# 回放的响应带上该响应头，便于客户端区分
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyConflictError(Exception):
+    """幂等键正被其他请求占用，或已用于参数不同的请求"""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """接口名与请求参数的 SHA-256，用于识别同一幂等键被复用于不同请求"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def begin(db: Session, *, user_id: int, key: str, fingerprint: str,
+          now: Optional[datetime] = None) -> Optional[Tuple[int, Any]]:
+    """
+    返回 (状态码, 响应体) 表示应直接回放；返回 None 表示已占用幂等键（created_at 为 now），
+    调用方执行请求后须调用 finish 或 abort
+    """
+    now = now or _now()
+    record = crud.idempotency_key.get_by_key(db, user_id=user_id, key=key)
+    if record is not None:
+        stale = record.status_code is None and \
+            record.created_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+        if record.expires_at <= now or stale:
+            crud.idempotency_key.release(db, user_id=user_id, key=key)
+        elif record.request_hash != fingerprint:
+            raise IdempotencyConflictError("幂等键已用于参数不同的请求")
+        elif record.status_code is None:
+            raise IdempotencyConflictError("相同幂等键的请求正在处理中")
+        elif record.response_body is None:
+            raise IdempotencyConflictError("相同幂等键的请求已提交，响应尚未保存，请稍后重试")
+        else:
+            return record.status_code, json.loads(record.response_body)
+    reserved = crud.idempotency_key.reserve(
+        db, user_id=user_id, key=key, request_hash=fingerprint,
+        now=now, expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+    )
+    if not reserved:
+        raise IdempotencyConflictError("相同幂等键的请求正在处理中")
+    return None
+
+
+def finish(db: Session, *, user_id: int, key: str, status_code: int, body: Any) -> None:
+    crud.idempotency_key.complete(
+        db, user_id=user_id, key=key, status_code=status_code,
+        response_body=json.dumps(body, ensure_ascii=False),
+    )
+
+
+def abort(db: Session, *, user_id: int, key: str, created_at: Optional[datetime] = None) -> None:
+    db.rollback()
+    crud.idempotency_key.release(db, user_id=user_id, key=key, created_at=created_at)
+
+
+def _now() -> datetime:
+    # created_at 兼作占用标识，去掉微秒以与 DATETIME 列的存储精度一致
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def run(db: Session, *, user_id: int, key: Optional[str], fingerprint: str,
+        handler: Callable[[], Any], serialize: Callable[[Any], Any]) -> Tuple[int, Any, bool]:
+    """
+    以幂等方式执行 handler：返回 (状态码, 响应体, 是否为回放)。
+    未提供幂等键时直接执行；handler 抛出的异常原样抛出，业务事务尚未提交时释放幂等键。
+    handler 首次提交事务时在同一事务中标记幂等键已提交，占用已被接管时提交失败（IdempotencyConflictError）
+    """
+    if not key:
+        return 200, serialize(handler()), False
+    now = _now()
+    replay = begin(db, user_id=user_id, key=key, fingerprint=fingerprint, now=now)
+    if replay is not None:
+        return replay[0], replay[1], True
+
+    committed = []
+
+    def mark_committed(session: Session) -> None:
+        if committed:
+            return
+        if not crud.idempotency_key.mark_committed(session, user_id=user_id, key=key, created_at=now):
+            raise IdempotencyConflictError("请求处理超时，幂等键已被重试请求接管")
+        committed.append(True)
+
+    event.listen(db, "before_commit", mark_committed)
+    try:
+        try:
+            result = handler()
+        finally:
+            event.remove(db, "before_commit", mark_committed)
+        body = serialize(result)
+    except BaseException:
+        if committed:
+            db.rollback()
+        else:
+            abort(db, user_id=user_id, key=key, created_at=now)
+        raise
+    finish(db, user_id=user_id, key=key, status_code=200, body=body)
+    return 200, body, False
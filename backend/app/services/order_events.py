@@ -0,0 +1,10 @@
+"""订单变更通知：订单创建、支付、取消、过期后调用，失效依赖订单数据的缓存"""
+from typing import Iterable
+
+from app.services.order_stats import invalidate_users
+from app.services.search_cache import invalidate_flights
+
+
+def order_changed(*, flight_ids: Iterable[int], user_ids: Iterable[int] = ()) -> None:
+    invalidate_flights(flight_ids)
+    invalidate_users(user_ids)
@@ -0,0 +1,191 @@
+"""
+订单导出
+
+从 crud.order.export_query 的扁平投影（每个订单项一行）经服务端游标分批读取，
+边读边编码为 CSV / NDJSON / Parquet 并按需 gzip 压缩，内存占用与导出行数无关。
+Parquet 依赖可选的 pyarrow，按行组写出并使用列内 zstd 压缩。
+"""
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+from app.core.streaming import NDJSON_MEDIA_TYPE, STREAM_CHUNK_SIZE
+from app.schemas.order import ExportFormat
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: NDJSON_MEDIA_TYPE,
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+GZIP_MEDIA_TYPE = "application/gzip"
+
+
+class ExportFormatUnavailableError(Exception):
+    """导出格式依赖的库未安装"""
+
+
+def _plain(value: Any) -> Any:
+    """枚举取值；其余保持原类型，由各格式自行编码"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _text(value: Any) -> Any:
+    value = _plain(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def iter_batches(db: Session, stmt: Select, batch_size: int = STREAM_CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    """服务端游标（stream_results）分批读取，每批 batch_size 行"""
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        for partition in result.partitions(batch_size):
+            yield partition
+    finally:
+        result.close()
+
+
+def csv_chunks(columns: List[str], batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    # 带 BOM，Excel 直接打开中文不乱码
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_text(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(columns: List[str], batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, (_text(v) for v in row))), ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+class _DrainSink(io.RawIOBase):
+    """只追加的输出流，写入的字节由 drain() 取走，供 Parquet 按行组流式输出"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(pa, columns: List[str]):
+    money = pa.decimal128(10, 2)
+    types = {
+        "created_at": pa.timestamp("us"),
+        "paid_at": pa.timestamp("us"),
+        "total_amount": money,
+        "original_price": money,
+        "paid_price": money,
+        "item_id": pa.int64(),
+        "flight_date": pa.date32(),
+        "scheduled_departure_time": pa.time64("us"),
+    }
+    return pa.schema([(c, types.get(c, pa.string())) for c in columns])
+
+
+def parquet_chunks(columns: List[str], batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportFormatUnavailableError("服务器未安装 pyarrow，暂不支持 Parquet 导出") from e
+    schema = _arrow_schema(pa, columns)
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            data = list(zip(*[[_plain(v) for v in row] for row in batch]))
+            writer.write_table(pa.table(
+                {name: pa.array(col, type=schema.field(name).type) for name, col in zip(columns, data)},
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip 格式
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+ENCODERS = {
+    ExportFormat.CSV: csv_chunks,
+    ExportFormat.NDJSON: ndjson_chunks,
+    ExportFormat.PARQUET: parquet_chunks,
+}
+
+
+def check_available(fmt: ExportFormat) -> None:
+    """在开始流式输出前校验格式依赖，避免响应头已发出后才报错"""
+    if fmt == ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ExportFormatUnavailableError("服务器未安装 pyarrow，暂不支持 Parquet 导出") from e
+
+
+def export_chunks(db: Session, stmt: Select, *, fmt: ExportFormat, compress: bool,
+                  batch_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """导出字节流；Parquet 自带列压缩，不再套 gzip"""
+    columns = [c.key for c in stmt.selected_columns]
+    chunks = ENCODERS[fmt](columns, iter_batches(db, stmt, batch_size))
+    if compress and fmt != ExportFormat.PARQUET:
+        chunks = gzip_chunks(chunks)
+    return chunks
+
+
+def export_filename(fmt: ExportFormat, compress: bool, stem: str = "orders") -> str:
+    name = f"{stem}.{fmt.value}"
+    if compress and fmt != ExportFormat.PARQUET:
+        name += ".gz"
+    return name
+
+
+def export_media_type(fmt: ExportFormat, compress: bool) -> str:
+    if compress and fmt != ExportFormat.PARQUET:
+        return GZIP_MEDIA_TYPE
+    return MEDIA_TYPES[fmt]
@@ -0,0 +1,20 @@
+"""
+用户订单统计缓存
+
+GET /orders/stats/me 每次页面加载都会调用，结果按用户缓存；
+该用户的订单被创建、支付、取消或过期时失效。待支付数依赖当前时间（过期判断），由较短的 TTL 兜底。
+"""
+from typing import Iterable
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+stats_cache = TTLCache(
+    maxsize=settings.ORDER_STATS_CACHE_MAXSIZE,
+    ttl=settings.ORDER_STATS_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_users(user_ids: Iterable[int]) -> None:
+    for user_id in set(user_ids):
+        stats_cache.invalidate(user_id)
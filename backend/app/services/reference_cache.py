@@ -0,0 +1,62 @@
+"""
+静态引用数据缓存
+
+航线（含起降机场）与航司几乎不变，订单详情加载时从进程内缓存直接挂到航班上，不再逐层查询。
+缓存对象在独立会话中加载后脱离会话，只读共享；到期或时刻表重载时整体重新加载。
+"""
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.models.airline import Airline
+from app.models.route import Route
+
+
+class _References(NamedTuple):
+    loaded_at: float
+    routes: Dict[int, Route]
+    airlines: Dict[str, Airline]
+
+
+class ReferenceCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._refs: Optional[_References] = None
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session) -> _References:
+        # 在调用方会话已持有的连接上新建会话（不另从连接池取连接，也不提交或回滚调用方事务），
+        # 加载完毕后关闭，使对象脱离会话
+        session = Session(bind=db.connection())
+        try:
+            routes = session.query(Route).options(
+                joinedload(Route.departure_airport),
+                joinedload(Route.arrival_airport),
+            ).all()
+            airlines = session.query(Airline).all()
+        finally:
+            session.close()
+        return _References(
+            loaded_at=time.monotonic(),
+            routes={r.route_id: r for r in routes},
+            airlines={a.airline_code: a for a in airlines},
+        )
+
+    def get(self, db: Session) -> _References:
+        refs = self._refs
+        if refs is not None and time.monotonic() - refs.loaded_at < self.ttl:
+            return refs
+        with self._lock:
+            refs = self._refs
+            if refs is None or time.monotonic() - refs.loaded_at >= self.ttl:
+                refs = self._refs = self._load(db)
+            return refs
+
+    def clear(self) -> None:
+        self._refs = None
+
+
+reference_cache = ReferenceCache(ttl=settings.REFERENCE_CACHE_TTL_SECONDS)
@@ -0,0 +1,37 @@
+"""
+航班搜索结果缓存
+
+以搜索条件为键缓存 FlightSearchResponse，并以全部候选航班ID为标签：
+任一候选航班的订单被创建、支付、取消或过期时失效，避免座位数陈旧；时刻表重载时整体清空。
+缓存为进程内缓存，其他工作进程上的条目依靠 TTL 收敛。
+"""
+from typing import Hashable, Iterable
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.flight_search import FlightSearchRequest
+
+search_cache = TTLCache(
+    maxsize=settings.SEARCH_CACHE_MAXSIZE,
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+)
+
+
+def search_cache_key(request: FlightSearchRequest) -> Hashable:
+    return (
+        request.departure_city.strip().lower(),
+        request.arrival_city.strip().lower(),
+        request.departure_date,
+        request.return_date,
+        request.cabin_class.value if request.cabin_class is not None else None,
+        request.adult_count,
+        request.child_count,
+        request.infant_count,
+        request.price_min,
+        request.price_max,
+    )
+
+
+def invalidate_flights(flight_ids: Iterable[int]) -> int:
+    """失效包含任一给定航班的搜索结果"""
+    return search_cache.invalidate_tags(set(flight_ids))
@@ -0,0 +1,195 @@
+"""
+选座保留
+
+用户在座位图上点选座位后先保留一段时间（SEAT_HOLD_TTL_SECONDS），确认选座时再转为正式占用：
+保留期间其他乘客的选座、自动选座都会避开该座位，座位列表中也将其显示为不可选。
+保留以 (flight_id, flight_date, seat_number) 为键，每个订单项在一个航班日最多保留一个座位；
+过期不主动通知，读写时跳过并清除过期条目（惰性过期）。
+
+存储可替换：默认的进程内实现只在单个工作进程内可见；
+多进程部署配置 SEAT_HOLD_BACKEND=database，使用 seat_holds 表在各进程间共享。
+保留只是提示性的，座位的最终归属仍以座位图位图（crud.seat_map.claim）为准。
+"""
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+HoldKey = Tuple[int, date]
+
+
+class SeatHeldError(Exception):
+    """座位已被其他乘客保留"""
+    def __init__(self, seat_number: str):
+        self.seat_number = seat_number
+        super().__init__(f"座位 {seat_number} 已被其他乘客保留")
+
+
+class SeatHoldBackend(ABC):
+    """选座保留存储接口"""
+
+    @abstractmethod
+    def hold(self, flight_id: int, flight_date: date, seat_number: str, order_item_id: int,
+             expires_at: datetime, now: datetime) -> bool:
+        """保留座位并释放该订单项在同一航班日的其他保留（已是自己的保留则续期）；被他人保留时返回 False"""
+
+    @abstractmethod
+    def release(self, flight_id: int, flight_date: date, order_item_id: int,
+                seat_number: Optional[str] = None) -> int:
+        """释放订单项的保留（可限定座位），返回释放条数"""
+
+    @abstractmethod
+    def holds(self, flight_id: int, flight_date: date, now: datetime) -> Dict[str, int]:
+        """未过期的保留：座位号 -> 订单项ID"""
+
+    @abstractmethod
+    def purge_expired(self, now: datetime) -> int:
+        """清除全部过期保留，返回清除条数"""
+
+
+class InMemorySeatHoldBackend(SeatHoldBackend):
+    """进程内实现，线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (flight_id, flight_date) -> {seat_number: (order_item_id, expires_at)}
+        self._holds: Dict[HoldKey, Dict[str, Tuple[int, datetime]]] = {}
+
+    def _live(self, key: HoldKey, now: datetime) -> Dict[str, Tuple[int, datetime]]:
+        seats = self._holds.get(key)
+        if seats is None:
+            return {}
+        for seat_number in [s for s, (_, expires_at) in seats.items() if expires_at <= now]:
+            del seats[seat_number]
+        if not seats:
+            del self._holds[key]
+        return seats
+
+    def hold(self, flight_id, flight_date, seat_number, order_item_id, expires_at, now):
+        key = (flight_id, flight_date)
+        with self._lock:
+            seats = self._live(key, now)
+            current = seats.get(seat_number)
+            if current is not None and current[0] != order_item_id:
+                return False
+            for other in [s for s, (holder, _) in seats.items() if holder == order_item_id]:
+                del seats[other]
+            self._holds.setdefault(key, seats)[seat_number] = (order_item_id, expires_at)
+            return True
+
+    def release(self, flight_id, flight_date, order_item_id, seat_number=None):
+        key = (flight_id, flight_date)
+        with self._lock:
+            seats = self._holds.get(key, {})
+            released = [
+                s for s, (holder, _) in seats.items()
+                if holder == order_item_id and (seat_number is None or s == seat_number)
+            ]
+            for s in released:
+                del seats[s]
+            if key in self._holds and not seats:
+                del self._holds[key]
+            return len(released)
+
+    def holds(self, flight_id, flight_date, now):
+        with self._lock:
+            return {s: holder for s, (holder, _) in self._live((flight_id, flight_date), now).items()}
+
+    def purge_expired(self, now):
+        with self._lock:
+            before = sum(len(seats) for seats in self._holds.values())
+            for key in list(self._holds):
+                self._live(key, now)
+            return before - sum(len(seats) for seats in self._holds.values())
+
+
+class DatabaseSeatHoldBackend(SeatHoldBackend):
+    """基于 seat_holds 表，在多个工作进程间共享；每次操作使用独立的短事务"""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+
+    def hold(self, flight_id, flight_date, seat_number, order_item_id, expires_at, now):
+        from app import crud
+
+        with self._session_factory() as db:
+            return crud.seat_hold.hold(
+                db, flight_id=flight_id, flight_date=flight_date, seat_number=seat_number,
+                order_item_id=order_item_id, now=now, expires_at=expires_at,
+            )
+
+    def release(self, flight_id, flight_date, order_item_id, seat_number=None):
+        from app import crud
+
+        with self._session_factory() as db:
+            return crud.seat_hold.release(
+                db, flight_id=flight_id, flight_date=flight_date, order_item_id=order_item_id, seat_number=seat_number,
+            )
+
+    def holds(self, flight_id, flight_date, now):
+        from app import crud
+
+        with self._session_factory() as db:
+            return crud.seat_hold.get_active(db, flight_id=flight_id, flight_date=flight_date, now=now)
+
+    def purge_expired(self, now):
+        from app import crud
+
+        with self._session_factory() as db:
+            return crud.seat_hold.purge_expired(db, now=now)
+
+
+def _session_factory() -> Session:
+    from app.database import SessionLocal
+
+    return SessionLocal()
+
+
+def _default_backend() -> SeatHoldBackend:
+    if settings.SEAT_HOLD_BACKEND == "database":
+        return DatabaseSeatHoldBackend(_session_factory)
+    return InMemorySeatHoldBackend()
+
+
+seat_hold_backend: SeatHoldBackend = _default_backend()
+
+
+def set_seat_hold_backend(backend: SeatHoldBackend) -> None:
+    """替换全局保留存储（例如接入 Redis 等共享存储）"""
+    global seat_hold_backend
+    seat_hold_backend = backend
+
+
+def hold_seat(flight_id: int, flight_date: date, seat_number: str, order_item_id: int,
+              now: Optional[datetime] = None) -> datetime:
+    """为订单项保留座位，返回过期时间；座位被他人保留时抛出 SeatHeldError"""
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=settings.SEAT_HOLD_TTL_SECONDS)
+    if not seat_hold_backend.hold(flight_id, flight_date, seat_number, order_item_id, expires_at, now):
+        raise SeatHeldError(seat_number)
+    return expires_at
+
+
+def release_seat(flight_id: int, flight_date: date, order_item_id: int, seat_number: Optional[str] = None) -> int:
+    return seat_hold_backend.release(flight_id, flight_date, order_item_id, seat_number)
+
+
+def held_seats(flight_id: int, flight_date: date, now: Optional[datetime] = None) -> Dict[str, int]:
+    """未过期的保留：座位号 -> 订单项ID"""
+    return seat_hold_backend.holds(flight_id, flight_date, now or datetime.utcnow())
+
+
+def check_not_held(flight_id: int, flight_date: date, seat_number: str, order_item_id: int,
+                   now: Optional[datetime] = None) -> None:
+    """确认选座前校验：座位被其他订单项保留时抛出 SeatHeldError"""
+    holder = held_seats(flight_id, flight_date, now).get(seat_number)
+    if holder is not None and holder != order_item_id:
+        raise SeatHeldError(seat_number)
+
+
+def purge_expired(now: Optional[datetime] = None) -> int:
+    return seat_hold_backend.purge_expired(now or datetime.utcnow())
@@ -0,0 +1,257 @@
+"""
+座位图
+
+座位布局按机型定义（各舱位的排号区间与座位列），布局内的每个座位对应一个固定序号；
+每个 (flight_id, flight_date) 的占用情况存为一个位图（第 i 位为 1 表示第 i 个座位已占用），
+查询某座位是否可用只需一次位运算，整张座位图可以几十字节返回给客户端。
+"""
+import base64
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+
+class InvalidSeatError(ValueError):
+    """座位号不存在或与舱位不匹配"""
+
+
+class SeatUnavailableError(Exception):
+    """座位已被占用"""
+    def __init__(self, seat_number: str):
+        self.seat_number = seat_number
+        super().__init__(f"座位 {seat_number} 已被占用")
+
+
+class SeatMapFullError(Exception):
+    """舱位余座不足以安排全部乘客"""
+
+
+class CabinLayout(NamedTuple):
+    cabin_class: str
+    first_row: int
+    last_row: int
+    columns: str
+    # 过道位于这些列序号之后（如 ABC|DEF 为 (2,)），用于区分靠过道座位与跨过道相邻
+    aisles: Tuple[int, ...] = ()
+
+
+class SeatLayout:
+    """机型座位布局：座位按舱位、排、列顺序编号"""
+
+    def __init__(self, code: str, cabins: List[CabinLayout]):
+        self.code = code
+        self.cabins = cabins
+        self._seats: List[str] = []
+        self._cabin_of: List[str] = []
+        self._cabin_ranges: Dict[str, range] = {}
+        self._cabins: Dict[str, CabinLayout] = {c.cabin_class: c for c in cabins}
+        for cabin in cabins:
+            start = len(self._seats)
+            for row in range(cabin.first_row, cabin.last_row + 1):
+                for column in cabin.columns:
+                    self._seats.append(f"{row}{column}")
+                    self._cabin_of.append(cabin.cabin_class)
+            self._cabin_ranges[cabin.cabin_class] = range(start, len(self._seats))
+        self._index = {seat: i for i, seat in enumerate(self._seats)}
+
+    @property
+    def size(self) -> int:
+        return len(self._seats)
+
+    def index(self, seat_number: str) -> int:
+        """座位号 -> 序号，座位不存在时抛出 InvalidSeatError"""
+        index = self._index.get(seat_number.upper().strip())
+        if index is None:
+            raise InvalidSeatError(f"座位 {seat_number} 不存在")
+        return index
+
+    def seat(self, index: int) -> str:
+        return self._seats[index]
+
+    def cabin_of(self, index: int) -> str:
+        return self._cabin_of[index]
+
+    def cabin_range(self, cabin_class: str) -> range:
+        return self._cabin_ranges.get(cabin_class, range(0))
+
+    def cabin(self, cabin_class: str) -> Optional[CabinLayout]:
+        return self._cabins.get(cabin_class)
+
+
+class SeatBitmap:
+    """定长占用位图，字节内低位在前"""
+
+    def __init__(self, size: int, data: Optional[bytes] = None):
+        self.size = size
+        self._bits = bytearray((size + 7) // 8)
+        if data:
+            self._bits[:len(data)] = data[:len(self._bits)]
+
+    def is_set(self, index: int) -> bool:
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def set(self, index: int) -> None:
+        self._bits[index >> 3] |= 1 << (index & 7)
+
+    def clear(self, index: int) -> None:
+        self._bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def iter_set(self, indexes: Optional[range] = None) -> Iterator[int]:
+        for i in indexes if indexes is not None else range(self.size):
+            if self._bits[i >> 3] & (1 << (i & 7)):
+                yield i
+
+    def count(self, indexes: range) -> int:
+        return sum(1 for _ in self.iter_set(indexes))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self._bits).decode()
+
+
+# 机型布局；"default" 与原先值机接口中的座位规则一致：头等舱 1-4 排 A/B，公务舱 5-10 排 A/B/D/E，经济舱 11-30 排 A-F
+SEAT_LAYOUTS: Dict[str, SeatLayout] = {
+    "default": SeatLayout("default", [
+        CabinLayout("first", 1, 4, "AB"),
+        CabinLayout("business", 5, 10, "ABDE", (1,)),
+        CabinLayout("economy", 11, 30, "ABCDEF", (2,)),
+    ]),
+    "A320": SeatLayout("A320", [
+        CabinLayout("first", 1, 2, "AC", (0,)),
+        CabinLayout("business", 3, 6, "ACDF", (1,)),
+        CabinLayout("economy", 7, 31, "ABCDEF", (2,)),
+    ]),
+    "B737": SeatLayout("B737", [
+        CabinLayout("first", 1, 2, "AF", (0,)),
+        CabinLayout("business", 3, 5, "ACDF", (1,)),
+        CabinLayout("economy", 6, 32, "ABCDEF", (2,)),
+    ]),
+}
+
+
+def get_layout(code: str) -> SeatLayout:
+    return SEAT_LAYOUTS.get(code) or SEAT_LAYOUTS["default"]
+
+
+def layout_for_flight(flight) -> SeatLayout:
+    """航班暂未记录机型，统一使用配置的默认布局；座位图生成后记录布局编号，布局调整不影响已有航班日"""
+    return get_layout(settings.SEAT_MAP_DEFAULT_LAYOUT)
+
+
+# 自动选座的座位偏好
+SEAT_PREFERENCE_WINDOW = "window"
+SEAT_PREFERENCE_AISLE = "aisle"
+
+
+def _seat_kinds(cabin: CabinLayout, column: int) -> Tuple[bool, bool]:
+    """(是否靠窗, 是否靠过道)"""
+    window = column == 0 or column == len(cabin.columns) - 1
+    aisle = column in cabin.aisles or (column - 1) in cabin.aisles
+    return window, aisle
+
+
+def _free_runs(cabin: CabinLayout, bitmap: SeatBitmap, start: int, row: int) -> List[List[int]]:
+    """某排连续空座（列序号）的分段；跨过道的相邻座位视为连续"""
+    width = len(cabin.columns)
+    base = start + row * width
+    runs: List[List[int]] = []
+    current: List[int] = []
+    for column in range(width):
+        if bitmap.is_set(base + column):
+            if current:
+                runs.append(current)
+            current = []
+        else:
+            current.append(column)
+    if current:
+        runs.append(current)
+    return runs
+
+
+def _pick_from_run(cabin: CabinLayout, run: List[int], size: int, want_window: int, want_aisle: int) -> List[int]:
+    """从一段连续空座中取 size 个相邻座位：少跨过道，尽量满足靠窗/靠过道偏好"""
+    best, best_score = run[:size], None
+    for offset in range(len(run) - size + 1):
+        columns = run[offset:offset + size]
+        crossings = sum(1 for c in columns[:-1] if c in cabin.aisles)
+        kinds = [_seat_kinds(cabin, c) for c in columns]
+        hits = min(want_window, sum(1 for w, _ in kinds if w)) + min(want_aisle, sum(1 for _, a in kinds if a))
+        score = crossings * 3 - hits
+        if best_score is None or score < best_score:
+            best, best_score = columns, score
+    return best
+
+
+def _pick_block(cabin: CabinLayout, row_runs: List[List[List[int]]], rows: range,
+                count: int, want_window: int, want_aisle: int) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+    """在连续的若干排内选 count 个座位，返回 (评分, [(排序号, 列序号)])；余座不足返回 None"""
+    runs = [(row, run) for row in rows for run in row_runs[row]]
+    if sum(len(run) for _, run in runs) < count:
+        return None
+    # 先用最长的连续段，尽量少拆分
+    runs.sort(key=lambda r: (-len(r[1]), r[0]))
+    chosen: List[Tuple[int, int]] = []
+    segments = crossings = 0
+    for row, run in runs:
+        need = count - len(chosen)
+        if need <= 0:
+            break
+        columns = _pick_from_run(cabin, run, min(need, len(run)), want_window, want_aisle)
+        crossings += sum(1 for c in columns[:-1] if c in cabin.aisles)
+        segments += 1
+        chosen.extend((row, c) for c in columns)
+    kinds = [_seat_kinds(cabin, c) for _, c in chosen]
+    hits = min(want_window, sum(1 for w, _ in kinds if w)) + min(want_aisle, sum(1 for _, a in kinds if a))
+    return segments * 10 + crossings * 3 - hits, chosen
+
+
+def assign_seats(layout: SeatLayout, bitmap: SeatBitmap, cabin_class: str,
+                 preferences: Sequence[Optional[str]]) -> List[int]:
+    """
+    为同一订单的一组乘客在指定舱位中自动选座，返回与 preferences 顺序对应的座位序号（不修改位图）。
+    优先同排相邻，其次跨越最少的相邻排；同等条件下少跨过道、满足更多靠窗/靠过道偏好、靠前排。
+    余座不足时抛出 SeatMapFullError
+    """
+    count = len(preferences)
+    cabin = layout.cabin(cabin_class)
+    seats = layout.cabin_range(cabin_class)
+    if cabin is None or len(seats) - bitmap.count(seats) < count:
+        raise SeatMapFullError(f"{cabin_class} 舱余座不足 {count} 个")
+    if count == 0:
+        return []
+    want_window = sum(1 for p in preferences if p == SEAT_PREFERENCE_WINDOW)
+    want_aisle = sum(1 for p in preferences if p == SEAT_PREFERENCE_AISLE)
+    row_count = cabin.last_row - cabin.first_row + 1
+    width = len(cabin.columns)
+
+    row_runs = [_free_runs(cabin, bitmap, seats.start, row) for row in range(row_count)]
+    free_per_row = [sum(len(run) for run in runs) for runs in row_runs]
+    best = None
+    for span in range(1, row_count + 1):
+        for first in range(row_count - span + 1):
+            if sum(free_per_row[first:first + span]) < count:
+                continue
+            picked = _pick_block(cabin, row_runs, range(first, first + span), count, want_window, want_aisle)
+            if picked is not None and (best is None or picked[0] < best[0]):
+                best = picked
+        if best is not None:
+            break
+
+    # 按偏好分配：靠窗、靠过道的乘客先取对应座位，其余按排列顺序
+    pool = sorted(best[1])
+    result: List[Optional[int]] = [None] * count
+    for wanted, kind in ((SEAT_PREFERENCE_WINDOW, 0), (SEAT_PREFERENCE_AISLE, 1)):
+        for i, preference in enumerate(preferences):
+            if preference != wanted:
+                continue
+            match = next((seat for seat in pool if _seat_kinds(cabin, seat[1])[kind]), None)
+            if match is not None:
+                pool.remove(match)
+                result[i] = seats.start + match[0] * width + match[1]
+    for i in range(count):
+        if result[i] is None:
+            row, column = pool.pop(0)
+            result[i] = seats.start + row * width + column
+    return result
@@ -0,0 +1,241 @@
+"""
+进程内时刻表索引
+
+启动时从 flights/routes/airports/airlines/flight_pricing 构建：
+归一化城市名 -> 机场三字码 -> 航线 -> 按起飞时刻排序的航班数组，运营掩码存为整数位图。
+搜索在内存中用位运算过滤，只有实时库存需要访问数据库。航班计划变更后需调用 reload 刷新。
+"""
+import logging
+import threading
+from datetime import date, datetime, time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.models.flight import Flight
+from app.models.flight_pricing import FlightPricing, CabinClass
+from app.models.route import Route
+from app.schemas.flight_search import FlightSearchRequest
+
+logger = logging.getLogger(__name__)
+
+# 运营掩码覆盖的天数（与 flights.operating_days 长度一致）
+MASK_DAYS = 21
+
+
+def normalize_city(city: str) -> str:
+    return (city or "").strip().lower()
+
+
+def mask_to_int(operating_days: str) -> int:
+    """'1010...' -> 第 i 位表示距今第 i 天是否运营"""
+    bits = 0
+    for i, c in enumerate((operating_days or "")[:MASK_DAYS]):
+        if c == '1':
+            bits |= 1 << i
+    return bits
+
+
+class TimetableFlight(NamedTuple):
+    """时刻表中的单个航班（字段顺序与 crud.flight.search_flights 的结果行一致，末尾附加掩码与定价）"""
+    flight_id: int
+    flight_number: str
+    scheduled_departure_time: time
+    scheduled_arrival_time: time
+    economy_seats: int
+    business_seats: int
+    first_seats: int
+    route_id: int
+    dep_code: str
+    dep_name: str
+    dep_city: str
+    arr_code: str
+    arr_name: str
+    arr_city: str
+    airline_code: str
+    airline_name: str
+    mask: int
+    prices: Dict[str, float]
+
+    def operates_on(self, day_diff: int) -> bool:
+        return 0 <= day_diff < MASK_DAYS and (self.mask >> day_diff) & 1 == 1
+
+    def as_search_row(self, cabin_class: str) -> tuple:
+        """转换为与 crud.flight.search_flights 相同结构的结果行"""
+        return tuple(self[:16]) + (self.prices.get(cabin_class),)
+
+
+class _Snapshot(NamedTuple):
+    version: int
+    loaded_at: datetime
+    city_airports: Dict[str, Tuple[str, ...]]
+    routes: Dict[Tuple[str, str], int]
+    route_flights: Dict[int, Tuple[TimetableFlight, ...]]
+    flights: Dict[int, TimetableFlight]
+
+
+class TimetableIndex:
+    """时刻表索引；构建完成后整体替换快照，读操作无需加锁"""
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._reload_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    @property
+    def loaded_at(self) -> Optional[datetime]:
+        return self._snapshot.loaded_at if self._snapshot else None
+
+    @property
+    def flight_count(self) -> int:
+        return len(self._snapshot.flights) if self._snapshot else 0
+
+    @property
+    def snapshot(self) -> Optional[_Snapshot]:
+        """当前快照（只读），需要一致视图的调用方应持有同一快照"""
+        return self._snapshot
+
+    def reload(self, db: Session) -> int:
+        """从数据库重建索引并递增版本号，返回新版本号"""
+        with self._reload_lock:
+            airports = {a.airport_code: a for a in db.query(Airport).all()}
+            airlines = {a.airline_code: a.airline_name for a in db.query(Airline).all()}
+            routes = {r.route_id: r for r in db.query(Route).all()}
+
+            prices: Dict[int, Dict[str, float]] = {}
+            for flight_id, cabin, base_price in db.query(
+                FlightPricing.flight_id, FlightPricing.cabin_class, FlightPricing.base_price
+            ).all():
+                cabin_value = cabin.value if isinstance(cabin, CabinClass) else str(cabin)
+                prices.setdefault(flight_id, {})[cabin_value] = float(base_price) if base_price is not None else 0.0
+
+            city_airports: Dict[str, List[str]] = {}
+            for code, airport in airports.items():
+                city_airports.setdefault(normalize_city(airport.city), []).append(code)
+
+            route_flights: Dict[int, List[TimetableFlight]] = {}
+            flights: Dict[int, TimetableFlight] = {}
+            # 仅选择必要字段，避免加载 Flight.status
+            for row in db.query(
+                Flight.flight_id,
+                Flight.flight_number,
+                Flight.scheduled_departure_time,
+                Flight.scheduled_arrival_time,
+                Flight.economy_seats,
+                Flight.business_seats,
+                Flight.first_seats,
+                Flight.route_id,
+                Flight.airline_code,
+                Flight.operating_days,
+            ).all():
+                route = routes.get(row.route_id)
+                if not route or row.airline_code not in airlines:
+                    continue
+                dep = airports.get(route.departure_airport_code)
+                arr = airports.get(route.arrival_airport_code)
+                if not dep or not arr:
+                    continue
+                tf = TimetableFlight(
+                    flight_id=row.flight_id,
+                    flight_number=row.flight_number,
+                    scheduled_departure_time=row.scheduled_departure_time,
+                    scheduled_arrival_time=row.scheduled_arrival_time,
+                    economy_seats=row.economy_seats,
+                    business_seats=row.business_seats,
+                    first_seats=row.first_seats,
+                    route_id=route.route_id,
+                    dep_code=dep.airport_code,
+                    dep_name=dep.airport_name,
+                    dep_city=dep.city,
+                    arr_code=arr.airport_code,
+                    arr_name=arr.airport_name,
+                    arr_city=arr.city,
+                    airline_code=row.airline_code,
+                    airline_name=airlines[row.airline_code],
+                    mask=mask_to_int(row.operating_days),
+                    prices=prices.get(row.flight_id, {}),
+                )
+                route_flights.setdefault(route.route_id, []).append(tf)
+                flights[tf.flight_id] = tf
+
+            snapshot = _Snapshot(
+                version=self.version + 1,
+                loaded_at=datetime.utcnow(),
+                city_airports={city: tuple(sorted(codes)) for city, codes in city_airports.items()},
+                routes={(r.departure_airport_code, r.arrival_airport_code): r.route_id for r in routes.values()},
+                route_flights={
+                    rid: tuple(sorted(fs, key=lambda f: f.scheduled_departure_time))
+                    for rid, fs in route_flights.items()
+                },
+                flights=flights,
+            )
+            self._snapshot = snapshot
+            logger.info("timetable index v%s loaded: %s flights", snapshot.version, len(flights))
+            return snapshot.version
+
+    def get_flight(self, flight_id: int) -> Optional[TimetableFlight]:
+        return self._snapshot.flights.get(flight_id) if self._snapshot else None
+
+    def airports_in(self, city: str) -> Tuple[str, ...]:
+        return self._snapshot.city_airports.get(normalize_city(city), ()) if self._snapshot else ()
+
+    def city_pair_flights(self, departure_city: str, arrival_city: str) -> List[TimetableFlight]:
+        """城市对之间的全部直飞航班（不按日期过滤），按起飞时刻排序"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        result: List[TimetableFlight] = []
+        for dep_code in snapshot.city_airports.get(normalize_city(departure_city), ()):
+            for arr_code in snapshot.city_airports.get(normalize_city(arrival_city), ()):
+                route_id = snapshot.routes.get((dep_code, arr_code))
+                if route_id is not None:
+                    result.extend(snapshot.route_flights.get(route_id, ()))
+        result.sort(key=lambda f: f.scheduled_departure_time)
+        return result
+
+    def search(self, request: FlightSearchRequest, *, today: Optional[date] = None) -> List[tuple]:
+        """与 crud.flight.search_flights 语义一致的内存搜索，返回相同结构的结果行"""
+        day_diff = (request.departure_date - (today or date.today())).days
+        if not (0 <= day_diff < MASK_DAYS):
+            return []
+        cabin = request.cabin_class.value if request.cabin_class is not None else CabinClass.ECONOMY.value
+        bit = 1 << day_diff
+
+        rows = []
+        for f in self.city_pair_flights(request.departure_city, request.arrival_city):
+            if not f.mask & bit:
+                continue
+            price = f.prices.get(cabin)
+            if price is None:
+                continue
+            if request.price_min is not None and price < request.price_min:
+                continue
+            if request.price_max is not None and price > request.price_max:
+                continue
+            rows.append(f.as_search_row(cabin))
+        return rows
+
+
+timetable = TimetableIndex()
+
+
+def load_timetable() -> None:
+    """应用启动时加载时刻表索引；失败时记录日志，搜索回退到数据库查询"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        timetable.reload(db)
+    except Exception:
+        logger.exception("timetable index load failed, flight search falls back to database")
+    finally:
+        db.close()
@@ -0,0 +1,67 @@
+"""
+旅行社批量下单基准：同一批订单在不同 chunk_size 下的 SQL 次数、耗时与吞吐
+（chunk_size=1 相当于逐单提交事务）
+
+用法: python scripts/bench_bulk_booking.py [--orders 500] [--passengers 3] [--chunk-sizes 1,10,100,500]
+"""
+import argparse
+from datetime import date, timedelta
+
+from bench_common import (
+    QueryCounter, Timer, make_session_factory, seed_reference_data, seed_route_flights, seed_user,
+)
+
+from app import schemas
+from app.services.bulk_booking import book_orders
+
+
+def build_orders(count: int, passengers: int, flights: int, run: int):
+    """每个 run 使用不同的身份证号段，乘客均为新建"""
+    orders = []
+    for n in range(count):
+        items = []
+        for k in range(passengers):
+            seq = (run * count + n) * passengers + k
+            items.append({
+                "flight_id": 1 + n % flights,
+                "flight_date": date.today() + timedelta(days=1 + n % 7),
+                "cabin_class": "economy",
+                "passenger_info": {"name": f"旅客{seq}", "id_card": f"{110101199001000000 + seq}"},
+            })
+        orders.append(schemas.OrderCreate(items=items))
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--passengers", type=int, default=3, help="每单乘客数（不超过9）")
+    parser.add_argument("--flights", type=int, default=20)
+    parser.add_argument("--chunk-sizes", default="1,10,100,500")
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory()
+    db = session_factory()
+    seed_reference_data(db)
+    # 座位充足，各轮之间不因售罄产生差异
+    seed_route_flights(db, route_id=1, dep="SHA", arr="CAN", count=args.flights, seats=(100000, 1000, 100))
+    seed_user(db, user_id=1, role="agency")
+    db.commit()
+    db.close()
+
+    print(f"{'chunk':>6} | {'orders':>6} | {'ok':>6} | {'queries':>7} | {'ms':>9} | {'orders/s':>9}")
+    for run, chunk_size in enumerate(int(s) for s in args.chunk_sizes.split(",")):
+        orders = build_orders(args.orders, args.passengers, args.flights, run)
+        db = session_factory()
+        try:
+            with QueryCounter(engine) as counter, Timer() as timer:
+                result = book_orders(db, user_id=1, orders=orders, chunk_size=chunk_size)
+        finally:
+            db.close()
+        rate = args.orders / (timer.elapsed_ms / 1000)
+        print(f"{chunk_size:>6} | {args.orders:>6} | {result.succeeded:>6} | {counter.count:>7} | {timer.elapsed_ms:>9.1f} | {rate:>9.0f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""基准测试/压测脚本共用的工具：SQLite 测试库、SQL 计数器与示例数据"""
+import sys
+import time as _time
+from datetime import time
+from pathlib import Path
+
+# ensure backend package in path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud  # noqa: F401  确保全部模型完成映射
+from app.models.base import Base
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.models.route import Route
+from app.models.flight import Flight
+from app.models.flight_pricing import FlightPricing
+from app.models.user import User
+
+
+@compiles(BigInteger, "sqlite")
+def _compile_big_int_sqlite(type_, compiler, **kw):
+    # SQLite 仅对 INTEGER PRIMARY KEY 自增
+    return "INTEGER"
+
+
+def make_session_factory(database_url: str = "sqlite://"):
+    """创建引擎并建表；默认使用内存 SQLite，也可传入 MySQL 连接串"""
+    kwargs = {}
+    if database_url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False, "timeout": 30}
+        if database_url == "sqlite://":
+            kwargs["poolclass"] = StaticPool
+    engine = create_engine(database_url, **kwargs)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class QueryCounter:
+    """统计引擎上执行的 SQL 语句数"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+class Timer:
+    def __enter__(self):
+        self.start = _time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = (_time.perf_counter() - self.start) * 1000
+
+
+def seed_reference_data(db, *, airports=(("SHA", "虹桥国际机场", "上海"), ("CAN", "白云国际机场", "广州"))):
+    """写入航司与机场"""
+    db.add_all([
+        Airline(airline_code="MU", airline_name="中国东方航空"),
+        Airline(airline_code="CA", airline_name="中国国际航空"),
+    ])
+    db.add_all([Airport(airport_code=code, airport_name=name, city=city) for code, name, city in airports])
+    db.flush()
+
+
+def seed_route_flights(db, *, route_id: int, dep: str, arr: str, count: int, first_flight_id: int = 1,
+                       seats=(150, 30, 10), price: float = 800.0):
+    """在一条航线上生成 count 个每日运营的航班（三舱定价齐全）"""
+    db.add(Route(route_id=route_id, departure_airport_code=dep, arrival_airport_code=arr))
+    for i in range(count):
+        flight_id = first_flight_id + i
+        db.add(Flight(
+            flight_id=flight_id,
+            route_id=route_id,
+            airline_code="MU" if i % 2 else "CA",
+            flight_number=f"{'MU' if i % 2 else 'CA'}{flight_id:04d}",
+            scheduled_departure_time=time(6 + i % 16, (i * 7) % 60),
+            scheduled_arrival_time=time((8 + i % 16) % 24, (i * 7) % 60),
+            economy_seats=seats[0],
+            business_seats=seats[1],
+            first_seats=seats[2],
+            operating_days="1" * 21,
+        ))
+        for cabin, factor in (("economy", 1), ("business", 3), ("first", 6)):
+            db.add(FlightPricing(flight_id=flight_id, cabin_class=cabin, base_price=price * factor + i))
+    db.flush()
+
+
+def seed_user(db, *, user_id: int = 1, role: str = "individual") -> User:
+    user = User(
+        id=user_id,
+        username=f"bench{user_id}",
+        password="x",
+        real_name="压测用户",
+        id_card=f"{110101199001010000 + user_id}",
+        role=role,
+    )
+    db.add(user)
+    db.flush()
+    return user
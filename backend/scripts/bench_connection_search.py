@@ -0,0 +1,125 @@
+"""
+中转联程搜索基准：在合成航线网络上测量邻接图构建耗时与单次搜索延迟（p50/p95/max）
+
+网络为若干枢纽机场两两互通，其余机场仅与部分枢纽相连，保证大部分城市对没有直飞只能中转。
+用法: python scripts/bench_connection_search.py [--airports 60] [--hubs 8] [--flights-per-route 6] [--searches 500]
+"""
+import argparse
+import random
+from datetime import date, time, timedelta
+
+from bench_common import Timer, make_session_factory, seed_reference_data
+
+from app.models.flight import Flight
+from app.models.flight_pricing import FlightPricing
+from app.models.route import Route
+from app.services.connections import ConnectionGraph
+from app.services.timetable import TimetableIndex
+
+
+def seed_network(db, *, airports: int, hubs: int, flights_per_route: int, spokes_per_airport: int, seed: int):
+    """写入合成网络，返回 (城市列表, 航班数)"""
+    rng = random.Random(seed)
+    codes = [f"A{i:02d}" for i in range(airports)]
+    cities = [f"城市{i:02d}" for i in range(airports)]
+    seed_reference_data(db, airports=[(code, f"{city}机场", city) for code, city in zip(codes, cities)])
+
+    hub_codes = codes[:hubs]
+    pairs = set()
+    for a in hub_codes:
+        for b in hub_codes:
+            if a != b:
+                pairs.add((a, b))
+    for code in codes[hubs:]:
+        for hub in rng.sample(hub_codes, spokes_per_airport):
+            pairs.add((code, hub))
+            pairs.add((hub, code))
+
+    flight_id = 0
+    for route_id, (dep, arr) in enumerate(sorted(pairs), start=1):
+        db.add(Route(route_id=route_id, departure_airport_code=dep, arrival_airport_code=arr))
+        for _ in range(flights_per_route):
+            flight_id += 1
+            dep_minutes = rng.randrange(6 * 60, 23 * 60, 5)
+            arr_minutes = (dep_minutes + rng.randrange(60, 240, 5)) % (24 * 60)
+            db.add(Flight(
+                flight_id=flight_id,
+                route_id=route_id,
+                airline_code="MU" if flight_id % 2 else "CA",
+                flight_number=f"X{flight_id:05d}",
+                scheduled_departure_time=time(dep_minutes // 60, dep_minutes % 60),
+                scheduled_arrival_time=time(arr_minutes // 60, arr_minutes % 60),
+                economy_seats=150,
+                business_seats=30,
+                first_seats=10,
+                operating_days="".join(rng.choice("1110") for _ in range(21)),
+            ))
+            db.add(FlightPricing(flight_id=flight_id, cabin_class="economy", base_price=rng.randrange(300, 1500)))
+    db.commit()
+    return cities, flight_id
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--airports", type=int, default=60)
+    parser.add_argument("--hubs", type=int, default=8)
+    parser.add_argument("--spokes", type=int, default=3, help="每个非枢纽机场连接的枢纽数")
+    parser.add_argument("--flights-per-route", type=int, default=6)
+    parser.add_argument("--searches", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=60, help="单次搜索保留的候选数")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory()
+    db = session_factory()
+    cities, flight_count = seed_network(
+        db,
+        airports=args.airports,
+        hubs=args.hubs,
+        flights_per_route=args.flights_per_route,
+        spokes_per_airport=args.spokes,
+        seed=args.seed,
+    )
+
+    index = TimetableIndex()
+    with Timer() as load_timer:
+        index.reload(db)
+    db.close()
+    with Timer() as build_timer:
+        graph = ConnectionGraph(index.snapshot)
+
+    rng = random.Random(args.seed)
+    latencies = []
+    found = 0
+    for _ in range(args.searches):
+        dep_city, arr_city = rng.sample(cities, 2)
+        with Timer() as timer:
+            result = graph.search(
+                departure_city=dep_city,
+                arrival_city=arr_city,
+                departure_date=date.today() + timedelta(days=rng.randrange(0, 14)),
+                cabin_class="economy",
+                min_connection_minutes=60,
+                max_connection_minutes=360,
+                limit=args.limit,
+            )
+        latencies.append(timer.elapsed_ms)
+        found += bool(result)
+
+    print(f"flights: {flight_count}, airports: {args.airports}, hub pairs: {graph.hub_pair_count}")
+    print(f"timetable load: {load_timer.elapsed_ms:.1f} ms, graph build: {build_timer.elapsed_ms:.1f} ms")
+    print(
+        f"searches: {args.searches}, with results: {found}, "
+        f"p50 {percentile(latencies, 0.5):.3f} ms, p95 {percentile(latencies, 0.95):.3f} ms, "
+        f"max {max(latencies):.3f} ms"
+    )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
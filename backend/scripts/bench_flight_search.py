@@ -0,0 +1,111 @@
+"""
+航班搜索基准：对比逐航班 COUNT 与批量分组聚合两种占座统计方式的 SQL 次数与耗时
+
+用法: python scripts/bench_flight_search.py [--sizes 10,40,80,160] [--repeat 20]
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, or_
+
+from bench_common import (
+    QueryCounter, Timer, make_session_factory, seed_reference_data, seed_route_flights, seed_user,
+)
+
+from app import crud, schemas
+from app.api.v1.flights import _search_flights
+from app.models.flight_pricing import CabinClass
+from app.models.order import Order, OrderItem, OrderStatus, PaymentStatus
+from app.models.passenger import Passenger
+from app.services.search_cache import search_cache
+
+
+def seed_orders(db, *, flight_ids, flight_date, per_flight: int = 3):
+    """每个航班写入若干经济舱订单项，使占座统计有数据可扫"""
+    passenger = Passenger(name="基准乘客", id_card="110101199001011111")
+    db.add(passenger)
+    db.flush()
+    now = datetime.utcnow()
+    for n, flight_id in enumerate(flight_ids):
+        order = Order(
+            order_no=f"BENCH{flight_id:08d}",
+            user_id=1,
+            total_amount_original=Decimal("0"),
+            total_amount=Decimal("0"),
+            payment_status=PaymentStatus.PAID if n % 2 else PaymentStatus.UNPAID,
+            status=OrderStatus.PAID if n % 2 else OrderStatus.PENDING,
+            expired_at=now + timedelta(minutes=30),
+        )
+        db.add(order)
+        db.flush()
+        for _ in range(per_flight):
+            db.add(OrderItem(
+                order_id=order.order_id, flight_id=flight_id, flight_date=flight_date, cabin_class="economy",
+                passenger_id=passenger.passenger_id, original_price=Decimal("800"), paid_price=Decimal("800"),
+            ))
+    db.commit()
+    crud.flight_inventory.rebuild(db)
+
+
+def legacy_search(db, request):
+    """旧实现：搜索后对每个候选航班单独 COUNT 一次"""
+    rows = crud.flight.search_flights(db, request=request)
+    now = datetime.utcnow()
+    for row in rows:
+        db.query(func.count(OrderItem.item_id)).join(Order, OrderItem.order_id == Order.order_id).filter(
+            OrderItem.flight_id == row[0],
+            OrderItem.cabin_class == CabinClass.ECONOMY.value,
+            or_(Order.status == OrderStatus.PENDING, Order.status == OrderStatus.PAID),
+            or_(Order.expired_at.is_(None), Order.expired_at > now),
+        ).scalar()
+    return rows
+
+
+def batched_search(db, request):
+    # 测量未命中缓存时的查询路径
+    search_cache.clear()
+    return _search_flights(db, search_request=request)
+
+
+def measure(engine, session_factory, fn, request, repeat: int):
+    queries = 0
+    elapsed = 0.0
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            with QueryCounter(engine) as counter, Timer() as timer:
+                fn(db, request)
+            queries = counter.count
+            elapsed += timer.elapsed_ms
+        finally:
+            db.close()
+    return queries, elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,40,80,160", help="同一城市对上的航班数量列表")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'flights':>8} | {'legacy queries':>14} | {'legacy ms':>9} | {'batched queries':>15} | {'batched ms':>10}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        engine, session_factory = make_session_factory()
+        db = session_factory()
+        seed_reference_data(db)
+        seed_user(db)
+        seed_route_flights(db, route_id=1, dep="SHA", arr="CAN", count=size)
+        departure_date = date.today() + timedelta(days=1)
+        seed_orders(db, flight_ids=range(1, size + 1), flight_date=departure_date)
+        db.close()
+
+        request = schemas.FlightSearchRequest(departure_city="上海", arrival_city="广州", departure_date=departure_date)
+        legacy_q, legacy_ms = measure(engine, session_factory, legacy_search, request, args.repeat)
+        batched_q, batched_ms = measure(engine, session_factory, batched_search, request, args.repeat)
+        print(f"{size:>8} | {legacy_q:>14} | {legacy_ms:>9.2f} | {batched_q:>15} | {batched_ms:>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+订单详情加载基准：对比 joined / selectin / cached 三种加载策略在不同订单量用户上的
+SQL 次数、数据库返回行数与单元格数、耗时（含序列化为 OrderWithItems）
+
+用法: python scripts/bench_order_loading.py [--sizes 10,100,1000] [--passengers 3] [--repeat 5]
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from bench_common import (
+    QueryCounter, Timer, make_session_factory, seed_reference_data, seed_route_flights, seed_user,
+)
+
+from app import crud, schemas
+from app.crud.order import ORDER_LOAD_CACHED, ORDER_LOAD_JOINED, ORDER_LOAD_SELECTIN
+from app.models.order import Order, OrderItem, OrderStatus, PaymentStatus
+from app.models.passenger import Passenger
+from app.services.reference_cache import reference_cache
+
+STRATEGIES = (ORDER_LOAD_JOINED, ORDER_LOAD_SELECTIN, ORDER_LOAD_CACHED)
+
+
+def seed_orders(db, *, user_id: int, count: int, passengers: int, flight_ids):
+    """为用户写入 count 个订单，每单 passengers 名乘客，航班轮换"""
+    people = [Passenger(name=f"乘客{i}", id_card=f"{110101199001010000 + user_id * 10 + i}") for i in range(passengers)]
+    db.add_all(people)
+    db.flush()
+    now = datetime.utcnow()
+    flight_ids = list(flight_ids)
+    for n in range(count):
+        order = Order(
+            order_no=f"B{user_id:04d}{n:07d}",
+            user_id=user_id,
+            total_amount_original=Decimal("0"),
+            total_amount=Decimal("0"),
+            payment_status=PaymentStatus.PAID,
+            status=OrderStatus.PAID,
+            created_at=now - timedelta(minutes=n),
+        )
+        db.add(order)
+        db.flush()
+        flight_id = flight_ids[n % len(flight_ids)]
+        for person in people:
+            db.add(OrderItem(
+                order_id=order.order_id, flight_id=flight_id, flight_date=date.today(), cabin_class="economy",
+                passenger_id=person.passenger_id, original_price=Decimal("800"), paid_price=Decimal("800"),
+            ))
+    db.commit()
+
+
+def count_rows(engine, statements):
+    """重放捕获的语句统计数据库返回的行数与单元格数（行数 x 列数）"""
+    rows = cells = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = conn.exec_driver_sql(statement, parameters)
+            fetched = len(result.fetchall())
+            rows += fetched
+            cells += fetched * len(result.keys())
+    return rows, cells
+
+
+def measure(engine, session_factory, user_id: int, strategy: str, repeat: int):
+    elapsed = 0.0
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            with QueryCounter(engine) as counter, Timer() as timer:
+                orders, _ = crud.order.get_user_orders_with_items(
+                    db, user_id=user_id, limit=100000, strategy=strategy
+                )
+                [schemas.OrderWithItems.model_validate(o) for o in orders]
+            elapsed += timer.elapsed_ms
+        finally:
+            db.close()
+    rows, cells = count_rows(engine, counter.statements)
+    return counter.count, rows, cells, elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000", help="每个用户的订单数列表")
+    parser.add_argument("--passengers", type=int, default=3, help="每单乘客数")
+    parser.add_argument("--flights", type=int, default=20, help="订单轮换使用的航班数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    engine, session_factory = make_session_factory()
+    db = session_factory()
+    seed_reference_data(db)
+    seed_route_flights(db, route_id=1, dep="SHA", arr="CAN", count=args.flights)
+    for user_id, size in enumerate(sizes, start=1):
+        seed_user(db, user_id=user_id)
+        seed_orders(db, user_id=user_id, count=size, passengers=args.passengers, flight_ids=range(1, args.flights + 1))
+    db.close()
+
+    # 预热引用缓存，cached 策略测量的是稳态开销
+    warm = session_factory()
+    reference_cache.get(warm)
+    warm.close()
+
+    print(f"{'orders':>7} | {'strategy':>8} | {'queries':>7} | {'db rows':>8} | {'db cells':>9} | {'ms':>9}")
+    for user_id, size in enumerate(sizes, start=1):
+        for strategy in STRATEGIES:
+            queries, rows, cells, ms = measure(engine, session_factory, user_id, strategy, args.repeat)
+            print(f"{size:>7} | {strategy:>8} | {queries:>7} | {rows:>8} | {cells:>9} | {ms:>9.2f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
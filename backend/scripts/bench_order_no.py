@@ -0,0 +1,44 @@
+"""
+订单号生成微基准：单线程与多线程下的生成速率，并与原先按秒时间戳拼接的方案对比冲突情况
+
+用法: python scripts/bench_order_no.py [--count 1000000] [--threads 8]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bench_common import Timer
+
+from app.core.order_no import SnowflakeOrderNoGenerator
+
+
+def legacy_order_no() -> str:
+    return f"ORD{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+
+
+def run(label: str, fn, count: int, threads: int):
+    per_thread = count // threads
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            chunks = list(pool.map(lambda _: [fn() for _ in range(per_thread)], range(threads)))
+    total = per_thread * threads
+    unique = len({v for chunk in chunks for v in chunk})
+    rate = total / (timer.elapsed_ms / 1000)
+    print(f"{label:>10} | {threads:>7} | {total:>9} | {timer.elapsed_ms:>9.1f} | {rate:>12,.0f} | {total - unique:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000000, help="每轮生成的订单号数量")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    generator = SnowflakeOrderNoGenerator(node_id=1)
+    print(f"{'generator':>10} | {'threads':>7} | {'ids':>9} | {'ms':>9} | {'ids/s':>12} | {'duplicates':>10}")
+    for threads in sorted({1, args.threads}):
+        run("snowflake", generator.next, args.count, threads)
+        run("legacy", legacy_order_no, args.count, threads)
+
+
+if __name__ == "__main__":
+    main()
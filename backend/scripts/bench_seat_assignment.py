@@ -0,0 +1,106 @@
+"""
+自动选座基准：不同上座率与团体人数下选座算法的耗时与相邻程度，以及座位图一次性占用的数据库开销
+
+选座只在内存位图上运算，每个航班日每舱位一次加锁、一次写回；
+对比逐个乘客调用 claim（每人一次加锁与写回）时的语句数。
+
+用法: python scripts/bench_seat_assignment.py [--rounds 200] [--seed 1]
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from bench_common import QueryCounter, Timer, make_session_factory, seed_reference_data, seed_route_flights
+
+from app import crud
+from app.services.seat_map import SeatBitmap, SeatMapFullError, assign_seats, get_layout
+
+FILL_LEVELS = (0.5, 0.7, 0.85, 0.9, 0.95, 0.98)
+GROUP_SIZES = (1, 2, 3, 4, 6, 9)
+
+
+def random_bitmap(layout, cabin_class: str, fill: float, rng: random.Random) -> SeatBitmap:
+    bitmap = SeatBitmap(layout.size)
+    for index in layout.cabin_range(cabin_class):
+        if rng.random() < fill:
+            bitmap.set(index)
+    return bitmap
+
+
+def row_span(layout, indexes) -> int:
+    rows = {int(layout.seat(i)[:-1]) for i in indexes}
+    return max(rows) - min(rows) + 1
+
+
+def bench_algorithm(rounds: int, rng: random.Random):
+    layout = get_layout("default")
+    print(f"{'fill':>5} | {'group':>5} | {'avg us':>8} | {'max us':>8} | {'same row':>8} | {'avg rows':>8} | {'full':>5}")
+    for fill in FILL_LEVELS:
+        for size in GROUP_SIZES:
+            total_ms = worst_ms = 0.0
+            same_row = spans = assigned = full = 0
+            for _ in range(rounds):
+                bitmap = random_bitmap(layout, "economy", fill, rng)
+                preferences = [rng.choice((None, None, "window", "aisle")) for _ in range(size)]
+                with Timer() as timer:
+                    try:
+                        indexes = assign_seats(layout, bitmap, "economy", preferences)
+                    except SeatMapFullError:
+                        indexes = None
+                total_ms += timer.elapsed_ms
+                worst_ms = max(worst_ms, timer.elapsed_ms)
+                if indexes is None:
+                    full += 1
+                    continue
+                span = row_span(layout, indexes)
+                assigned += 1
+                spans += span
+                same_row += span == 1
+            print(
+                f"{fill:>5.0%} | {size:>5} | {total_ms / rounds * 1000:>8.1f} | {worst_ms * 1000:>8.1f} | "
+                f"{same_row / max(assigned, 1):>8.0%} | {spans / max(assigned, 1):>8.2f} | {full:>5}"
+            )
+
+
+def bench_database(group_size: int):
+    engine, session_factory = make_session_factory()
+    flight_date = date.today() + timedelta(days=1)
+    with session_factory() as db:
+        seed_reference_data(db)
+        seed_route_flights(db, route_id=1, dep="SHA", arr="CAN", count=1)
+        db.commit()
+
+    layout = get_layout("default")
+    seats = [layout.seat(i) for i in layout.cabin_range("economy")]
+    print(f"\n{'path':>12} | {'group':>5} | {'statements':>10} | {'ms':>8}")
+    for label in ("per-seat", "assign"):
+        with session_factory() as db:
+            crud.seat_map.ensure(db, flight_id=1, flight_date=flight_date)
+            with QueryCounter(engine) as counter, Timer() as timer:
+                if label == "assign":
+                    crud.seat_map.assign(
+                        db, flight_id=1, flight_date=flight_date, cabin_class="economy", preferences=[None] * group_size,
+                    )
+                else:
+                    # 逐人找第一个空座并占用
+                    for _ in range(group_size):
+                        _, _, bitmap = crud.seat_map.get_bitmap(db, flight_id=1, flight_date=flight_date)
+                        seat = next(s for s in seats if not bitmap.is_set(layout.index(s)))
+                        crud.seat_map.claim(db, flight_id=1, flight_date=flight_date, seat_number=seat, cabin_class="economy")
+                db.rollback()
+            print(f"{label:>12} | {group_size:>5} | {counter.count:>10} | {timer.elapsed_ms:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200, help="每种上座率与人数组合的随机座位图数量")
+    parser.add_argument("--group-size", type=int, default=9, help="数据库对比中的团体人数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    bench_algorithm(args.rounds, random.Random(args.seed))
+    bench_database(args.group_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+订单导出：按用户或旅行社将订单明细（每个订单项一行）流式写出为 CSV / NDJSON / Parquet，
+服务端游标分批读取，内存占用与导出行数无关
+
+用法: python scripts/export_orders.py --format csv --output orders.csv.gz [--user-id 12 | --agency-id 3]
+      [--start-date 2026-01-01] [--end-date 2026-06-30] [--no-gzip] [--database-url mysql+pymysql://...]
+--output 为 - 时写到标准输出
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# ensure backend package in path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.core.streaming import STREAM_CHUNK_SIZE
+from app.schemas.order import ExportFormat
+from app.services import order_export
+
+
+def run(args):
+    if args.database_url:
+        session_factory = sessionmaker(bind=create_engine(args.database_url))
+    else:
+        from app.database import SessionLocal as session_factory
+    fmt = ExportFormat(args.format)
+    compress = not args.no_gzip
+    order_export.check_available(fmt)
+    stmt = crud.order.export_query(
+        user_id=args.user_id, agency_id=args.agency_id, start_date=args.start_date, end_date=args.end_date,
+    )
+    db = session_factory()
+    started = time.perf_counter()
+    written = 0
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in order_export.export_chunks(db, stmt, fmt=fmt, compress=compress, batch_size=args.batch_size):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        db.close()
+    print(f"[OK] wrote {written} bytes in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat], default=ExportFormat.CSV.value)
+    parser.add_argument("--output", required=True, help="输出文件路径，- 表示标准输出")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument("--user-id", type=int, default=None, help="仅导出指定用户")
+    scope.add_argument("--agency-id", type=int, default=None, help="导出旅行社全部账号的订单")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="下单起始日期（含）")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="下单结束日期（含）")
+    parser.add_argument("--no-gzip", action="store_true", help="CSV/NDJSON 不压缩")
+    parser.add_argument("--batch-size", type=int, default=STREAM_CHUNK_SIZE, help="每批从数据库读取的行数")
+    parser.add_argument("--database-url", default=None, help="缺省使用 settings.SQLALCHEMY_DATABASE_URI")
+    run(parser.parse_args())
@@ -0,0 +1,38 @@
+"""
+座位库存对账：先将过期未支付订单置为取消，再按 order_items 重建 flight_inventory
+
+用法: python scripts/reconcile_flight_inventory.py [--flight-id 12]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# ensure backend package in path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app import crud
+from app.database import SessionLocal
+
+
+def run(flight_id=None):
+    db = SessionLocal()
+    try:
+        expired = crud.order.expire_overdue_orders(db)
+        print(f"[OK] expired {expired} overdue unpaid orders")
+        touched = crud.flight_inventory.rebuild(db, flight_id=flight_id)
+        print(f"[OK] rebuilt {touched} flight_inventory rows")
+    except Exception as e:
+        db.rollback()
+        print("[ERROR] reconcile failed:", e)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flight-id", type=int, default=None, help="仅对账指定航班")
+    args = parser.parse_args()
+    run(args.flight_id)
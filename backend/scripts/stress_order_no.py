@@ -0,0 +1,79 @@
+"""
+订单号并发唯一性测试：多个进程（spawn 与 fork 两种启动方式）各自多线程生成订单号，
+汇总校验全局无重复、单进程内严格递增、长度不超过 order_no 列宽
+
+fork 方式下父进程先生成过订单号，用于验证子进程不会沿用父进程的 PID 与序号状态。
+
+用法: python scripts/stress_order_no.py [--processes 8] [--per-process 250000] [--threads 4]
+"""
+import argparse
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_common import Timer
+
+from app.core import order_no
+from app.models.order import Order
+
+ORDER_NO_LENGTH = Order.__table__.c.order_no.type.length
+
+
+def generate(args):
+    count, threads = args
+    per_thread = count // threads
+    ints = []
+
+    def worker(_):
+        return [order_no.order_no_generator.next() for _ in range(per_thread)]
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        chunks = list(pool.map(worker, range(threads)))
+    # 单线程内的生成顺序即全局加锁顺序的子序列，须严格递增
+    for chunk in chunks:
+        if any(a >= b for a, b in zip(chunk, chunk[1:])):
+            raise AssertionError("同一线程内订单号未严格递增")
+        ints.extend(int(v[len(order_no.ORDER_NO_PREFIX):]) for v in chunk)
+    max_length = max(len(v) for chunk in chunks for v in chunk)
+    return ints, max_length
+
+
+def run(method: str, processes: int, per_process: int, threads: int) -> bool:
+    context = multiprocessing.get_context(method)
+    with Timer() as timer:
+        with context.Pool(processes) as pool:
+            results = pool.map(generate, [(per_process, threads)] * processes)
+    seen = set()
+    total = 0
+    pids = set()
+    for ints, max_length in results:
+        total += len(ints)
+        seen.update(ints)
+        pids.update((v >> order_no.PID_SHIFT) & order_no.MAX_PID for v in ints)
+        if max_length > ORDER_NO_LENGTH:
+            print(f"订单号长度 {max_length} 超过列宽 {ORDER_NO_LENGTH}")
+            return False
+    duplicates = total - len(seen)
+    rate = total / (timer.elapsed_ms / 1000)
+    print(f"{method:>6} | {processes:>9} | {len(pids):>4} | {total:>10} | {timer.elapsed_ms:>9.1f} | {rate:>12,.0f} | {duplicates:>10}")
+    return duplicates == 0 and len(pids) == processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--per-process", type=int, default=250000, help="每个进程生成的订单号数量")
+    parser.add_argument("--threads", type=int, default=4, help="每个进程内的生成线程数")
+    args = parser.parse_args()
+
+    # 父进程先推进生成器状态，fork 出的子进程须自行切换 PID
+    order_no.next_order_no()
+    methods = [m for m in ("spawn", "fork") if m in multiprocessing.get_all_start_methods()]
+    print(f"{'start':>6} | {'processes':>9} | {'pids':>4} | {'ids':>10} | {'ms':>9} | {'ids/s':>12} | {'duplicates':>10}")
+    ok = all([run(m, args.processes, args.per_process, args.threads) for m in methods])
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
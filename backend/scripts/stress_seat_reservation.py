@@ -0,0 +1,136 @@
+"""
+占座并发压测：数百个并发订单同时抢同一航班的座位，校验不超售、不死锁
+
+每个订单直接调用 POST /orders/ 的实现 _create_order（一个事务内 reserve 条件更新占座、写入乘客、订单与订单项并提交），
+部分订单同时占用两个舱位且以随机顺序给出，以验证固定加锁顺序。
+
+用法: python scripts/stress_seat_reservation.py [--orders 400] [--threads 32] [--database-url mysql+pymysql://...]
+默认使用临时目录下的 SQLite 文件库。
+"""
+import argparse
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, timedelta
+
+from fastapi import HTTPException
+
+from bench_common import Timer, make_session_factory, seed_reference_data, seed_route_flights, seed_user
+
+from app import crud, schemas
+from app.api.v1.orders import _create_order
+from app.models.order import OrderItem
+from app.models.user import User
+
+
+def place_order(session_factory, *, order_index: int, flight_date: date, cabins):
+    """返回 (是否成功, 错误)；座位不足（409）视为正常拒绝"""
+    order_in = schemas.OrderCreate(items=[
+        schemas.OrderItemCreate(
+            flight_id=1,
+            flight_date=flight_date,
+            cabin_class=cabin,
+            passenger_info={"name": f"压测乘客{order_index}-{n}", "id_card": f"{110101199001000000 + order_index * 10 + n}"},
+        )
+        for n, cabin in enumerate(cabins)
+    ])
+    db = session_factory()
+    try:
+        _create_order(db, order_in=order_in, current_user=db.get(User, 1))
+        return True, None
+    except HTTPException as e:
+        db.rollback()
+        # 死锁、锁等待超时等在 _create_order 中包装为 500，均视为失败
+        return False, None if e.status_code == 409 else e
+    except Exception as e:
+        db.rollback()
+        return False, e
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--economy-seats", type=int, default=150)
+    parser.add_argument("--business-seats", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=120.0, help="全部订单完成的时限（秒），超时视为死锁")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="skytrip-stress-")
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'stress.db')}"
+    engine, session_factory = make_session_factory(database_url)
+
+    db = session_factory()
+    seed_reference_data(db)
+    seed_user(db)
+    seed_route_flights(db, route_id=1, dep="SHA", arr="CAN", count=1,
+                       seats=(args.economy_seats, args.business_seats, 0))
+    db.commit()
+    db.close()
+
+    flight_date = date.today() + timedelta(days=1)
+    rng = random.Random(42)
+    plans = []
+    for i in range(args.orders):
+        cabins = ["economy"] * rng.randint(1, 3)
+        if rng.random() < 0.5:
+            cabins.append("business")
+        rng.shuffle(cabins)
+        plans.append(cabins)
+
+    pool = ThreadPoolExecutor(max_workers=args.threads)
+    with Timer() as timer:
+        futures = [
+            pool.submit(place_order, session_factory, order_index=i, flight_date=flight_date, cabins=cabins)
+            for i, cabins in enumerate(plans)
+        ]
+        done, not_done = wait(futures, timeout=args.timeout)
+    # 不等待未完成的订单：离开 with ThreadPoolExecutor 会阻塞到全部完成，死锁时脚本将挂起而无法报告
+    pool.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        print(f"[FAIL] {len(not_done)} orders did not finish within {args.timeout}s (deadlock?)", flush=True)
+        # 卡住的工作线程在解释器退出时仍会被等待，直接结束进程
+        os._exit(1)
+    results = [f.result() for f in done]
+    accepted = sum(1 for ok, _ in results if ok)
+    errors = [e for ok, e in results if e is not None]
+
+    db = session_factory()
+    problems = []
+    for cabin, capacity in (("economy", args.economy_seats), ("business", args.business_seats)):
+        inventory = crud.flight_inventory.get(db, id=(1, flight_date, cabin))
+        booked = db.query(OrderItem).filter(
+            OrderItem.flight_id == 1, OrderItem.flight_date == flight_date, OrderItem.cabin_class == cabin
+        ).count()
+        held = inventory.held if inventory else 0
+        print(f"{cabin:>9}: capacity={capacity} booked={booked} inventory.held={held}")
+        if booked > capacity:
+            problems.append(f"{cabin} oversold: {booked} > {capacity}")
+        if booked != held:
+            problems.append(f"{cabin} inventory drift: held={held} booked={booked}")
+    db.close()
+
+    print(f"orders={args.orders} accepted={accepted} rejected={len(results) - accepted - len(errors)} "
+          f"errors={len(errors)} elapsed={timer.elapsed_ms:.0f}ms")
+    for e in errors[:5]:
+        print("  error:", repr(e)[:200])
+    if errors:
+        problems.append(f"{len(errors)} orders failed with database errors")
+
+    engine.dispose()
+    if problems:
+        for p in problems:
+            print("[FAIL]", p)
+        raise SystemExit(1)
+    print("[OK] no oversell, no deadlock")
+
+
+if __name__ == "__main__":
+    main()